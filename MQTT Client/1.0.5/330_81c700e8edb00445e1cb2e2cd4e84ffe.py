@@ -77,8 +77,10 @@ import paho.mqtt.client as mqtt
 #import paho.mqtt.publish as publish
 import time
 import random
-from threading import Event, Thread
+from threading import Event, Thread, Lock
+from collections import deque
 from ast import literal_eval
+from json import loads
 
 
 
@@ -107,6 +109,9 @@ class Text:
     thr_abort = "Thread is terminating: "
     connection_problem = 'MQTT Client: Trying to reconnect with...'
     connected = 'Succesfully connected with MQTT broker...'
+    pub_connection_problem = 'MQTT publisher: Connection refused by'
+    pub_dropped = 'MQTT publisher: Queue is full, message dropped:'
+    pub_lost = 'MQTT publisher: Connection lost, QoS 0 messages dropped:'
     
     
 class MQTTclientTxt:
@@ -132,6 +137,288 @@ class publishMQTTtxt:
     messageName = "Message: "
     qosName =     "QOS:                   "
     retainName =  "Retain:                "
+    waitName =    "Wait for delivery:     "
+    noAck = 'MQTT publisher: No acknowledge received for topic:'
+
+
+class benchmarkRoutingTxt:
+    name = "Benchmark message routing"
+    description = (
+        "Replays synthetic messages of all supported sources through the "
+        "topic router and the payload decoders"
+    )
+    topicName =    "Subscribed topic: "
+    messagesName = "Messages:         "
+    topicsName =   "Topics per source:"
+    result = (
+        'MQTT routing (%s): %d messages, %d routed, '
+        'Match %.0f msg/s, Match + decode %.0f msg/s'
+    )
+
+
+
+# Payload decoders, they return (key, event) for the received message
+def DecodeCSV(msg):
+    event = str(msg.payload).split(',')
+    return event[0], event
+
+
+def DecodeKeyValue(msg):
+    event = str(msg.payload).split('id: ')
+    return event[1].split(',')[0], event
+
+
+def DecodeRaw(msg):
+    return str(msg.payload), str(msg.qos) + " " + str(msg.payload)
+
+
+DOMOTICZ_FIELDS = (
+    "Battery", 
+    "RSSI", 
+    "dtype", 
+    "id", 
+    "idx", 
+    "name", 
+    "nvalue", 
+    "stype", 
+    "svalue1", 
+    "svalue2", 
+    "switchType", 
+    "unit"
+)
+
+
+def DecodeJSON(msg):
+    try:
+        event = loads(msg.payload)
+    except ValueError:
+        event = literal_eval(msg.payload)
+    result = [event[item] for item in DOMOTICZ_FIELDS if item in event]
+    return str(result[4]), result
+
+
+
+class TopicRouter:
+    """
+    Maps MQTT topic filters (with the + and # wildcards) to routes. A topic
+    is looked up level by level in a trie, if more filters match, the one
+    added first wins. The results are cached per topic.
+    """
+    cacheSize = 10000
+
+    def __init__(self):
+        self.root = {}
+        self.count = 0
+        self.cache = {}
+
+
+    def Add(self, topicFilter, route):
+        node = self.root
+        for level in topicFilter.split('/'):
+            node = node.setdefault(level, {})
+        if None not in node:
+            node[None] = (self.count, route)
+            self.count += 1
+        self.cache = {}
+
+
+    def Match(self, topic):
+        try:
+            return self.cache[topic]
+        except KeyError:
+            pass
+        found = []
+        nodes = [self.root]
+        # wildcards at the first level do not match topics beginning with $
+        wild = not topic.startswith('$')
+        for level in topic.split('/'):
+            children = []
+            for node in nodes:
+                if wild and '#' in node and None in node['#']:
+                    found.append(node['#'][None])
+                if level in node:
+                    children.append(node[level])
+                if wild and '+' in node:
+                    children.append(node['+'])
+            nodes = children
+            wild = True
+            if not nodes:
+                break
+        for node in nodes:
+            if None in node:
+                found.append(node[None])
+            # "a/#" matches "a" too
+            if '#' in node and None in node['#']:
+                found.append(node['#'][None])
+        route = min(found)[1] if found else None
+        if len(self.cache) >= self.cacheSize:
+            self.cache = {}
+        self.cache[topic] = route
+        return route
+
+
+
+class PublisherMQTT:
+    """
+    Long-lived connection used by publishMQTT for one (host, port, client id).
+    The network loop of paho runs in its own thread, so Publish only queues
+    the message and returns. Messages published while the connection is
+    down are kept (up to maxQueued) and sent when it is up again.
+    """
+    text = Text
+    maxInflight = 20    # QoS 1/2 messages waiting for their acknowledge
+    maxQueued = 1000    # messages kept while disconnected
+    ackTimeout = 10.0
+
+    def __init__(self, host, port, cid, clean_session):
+        self.host = host
+        self.port = port
+        self.lock = Lock()
+        self.connected = False
+        self.queued = deque()
+        self.pending = {}  # mid: (time of Publish, Event or None, qos)
+        self.early = {}
+        self.published = 0
+        self.dropped = 0
+        self.latencySum = 0.0
+        self.latencyMax = 0.0
+        self.mqttc = mqtt.Client(
+            str(cid),
+            clean_session=clean_session,
+            userdata=None,
+            protocol=4
+        )
+        self.mqttc.max_inflight_messages_set(self.maxInflight)
+        self.mqttc.on_connect = self.on_connect
+        self.mqttc.on_disconnect = self.on_disconnect
+        self.mqttc.on_publish = self.on_publish
+        self.mqttc.connect_async(
+            host=host,
+            port=port,
+            keepalive=60,
+            bind_address=""
+        )
+        self.mqttc.loop_start()
+
+
+    def on_connect(self, client, userdata, flags, rc):
+        if rc != 0:
+            print self.text.pub_connection_problem, self.host, rc
+            return
+        with self.lock:
+            # sent while the connection was going down
+            self.DropUnsent()
+        # messages published meanwhile are queued too, so the order is kept
+        while True:
+            with self.lock:
+                if not self.queued:
+                    self.connected = True
+                    return
+                queued = self.queued
+                self.queued = deque()
+            for item in queued:
+                self.Send(*item)
+
+
+    def on_disconnect(self, client, userdata, rc):
+        with self.lock:
+            self.connected = False
+            self.DropUnsent()
+
+
+    def DropUnsent(self):
+        # paho forgets the QoS 0 messages not written yet when the
+        # connection is lost, on_publish never comes for them
+        lost = [mid for mid, item in self.pending.iteritems() if not item[2]]
+        if not lost:
+            return
+        for mid in lost:
+            done = self.pending.pop(mid)[1]
+            if done is not None:
+                done.set()
+        self.dropped += len(lost)
+        print self.text.pub_lost, self.host, len(lost)
+
+
+    def on_publish(self, client, userdata, mid):
+        now = time.time()
+        with self.lock:
+            if mid not in self.pending:
+                # acknowledged before Send has registered it
+                self.early[mid] = now
+                return
+            self.Delivered(self.pending.pop(mid), now)
+
+
+    def Delivered(self, item, now):
+        latency = now - item[0]
+        self.published += 1
+        self.latencySum += latency
+        self.latencyMax = max(self.latencyMax, latency)
+        if item[1] is not None:
+            item[1].set()
+
+
+    def Send(self, topic, payload, qos, retain, t, done):
+        # paho calls on_publish with its own locks held, so self.lock
+        # must not be held here
+        rc, mid = self.mqttc.publish(
+            topic=topic,
+            payload=payload,
+            qos=qos,
+            retain=retain
+        )
+        with self.lock:
+            if rc == mqtt.MQTT_ERR_SUCCESS or qos > 0:
+                # QoS 1/2 messages are kept by paho until delivered
+                if mid in self.early:
+                    self.Delivered((t, done), self.early.pop(mid))
+                else:
+                    self.pending[mid] = (t, done, qos)
+            else:
+                self.connected = False
+                self.Queue((topic, payload, qos, retain, t, done))
+
+
+    def Queue(self, item):
+        if len(self.queued) >= self.maxQueued:
+            print self.text.pub_dropped, self.queued.popleft()[0]
+            self.dropped += 1
+        self.queued.append(item)
+
+
+    def Publish(self, topic, payload, qos = 0, retain = False, wait = False):
+        """
+        Queues the message. Returns an Event which is set when the broker
+        has received the message, if wait is True.
+        """
+        done = Event() if wait else None
+        item = (topic, payload, qos, retain, time.time(), done)
+        with self.lock:
+            if not self.connected:
+                self.Queue(item)
+                return done
+        self.Send(*item)
+        return done
+
+
+    def GetMetrics(self):
+        with self.lock:
+            return {
+                "connected": self.connected,
+                "queued": len(self.queued),
+                "inflight": len(self.pending),
+                "published": self.published,
+                "dropped": self.dropped,
+                "latencyAvg": self.latencySum / self.published \
+                    if self.published else 0.0,
+                "latencyMax": self.latencyMax
+            }
+
+
+    def Close(self):
+        self.mqttc.disconnect()
+        self.mqttc.loop_stop()
 
 
 
@@ -241,19 +528,19 @@ class ThreadMQTT(Thread):
         def TriggerEvent2(msg, result):
             smsg = (msg.topic.decode('utf-8')+
                 '/'+
-                str(result[2])+
+                unicode(result[2])+
                 '/'+
-                str(result[4])
+                unicode(result[4])
             )
             if result[7] == "Switch":
                 if result[9] == "On/Off":
                     smsg = (msg.topic.decode('utf-8')+
                         '/'+
-                        str(result[2])+
+                        unicode(result[2])+
                         '/'+
-                        str(result[4])+
+                        unicode(result[4])+
                         '/'+
-                        str(result[6])
+                        unicode(result[6])
                     )
             eg.TriggerEvent(
                 smsg,
@@ -275,107 +562,16 @@ class ThreadMQTT(Thread):
             pass
 
         
-        def on_message(client, userdata, msg):
-            if msg.topic.find('domoticz') != -1:
-                event = literal_eval(msg.payload)
-                result = []
-                allowed = [
-                    "Battery", 
-                    "RSSI", 
-                    "dtype", 
-                    "id", 
-                    "idx", 
-                    "name", 
-                    "nvalue", 
-                    "stype", 
-                    "svalue1", 
-                    "svalue2", 
-                    "switchType", 
-                    "unit"
-                ]
-                for item in allowed:
-                    try:
-                        result.append(event[item])
-                    except:
-                        pass
-                res_key = msg.topic + ', ' + str(result[4])
-                res_base = str(msg.qos)+" "+str(result)
-                ProcessEvent2(msg, False, 0.0, res_key, result)
-                return
-
-            if self.topic.find('/openHAB/') != -1:
-                event = str(msg.payload).split(',')
-                res_key = msg.topic + ', ' + event[0]
-                res_base = str(msg.qos)+" "+str(msg.payload)
-                ProcessEvent(msg, False, 0.0, res_key, event)
-                return
-
-            if self.topic == '#':
-                event = str(msg.payload).split(',')
-                res_key = msg.topic + ', ' + event[0]
-                res_base = str(msg.qos)+" "+str(msg.payload)
-                ProcessEvent(msg, True, 1.0, res_key, event)
-                return
-
-            if str(msg.topic) == self.topic:
-                event = str(msg.payload).split(',')
-                res_key = msg.topic + ', ' + event[0]
-                res_base = str(msg.qos)+" "+str(msg.payload)
-                ProcessEvent(msg, True, 1.0, res_key, event)
-                return
-
-            if (
-                self.topic.find('/#') > 0
-                and
-                str(msg.topic).find(self.topic.split('/#')[0]) > -1
-            ):
-                event = str(msg.payload).split(',')
-                res_key = msg.topic + ', ' + event[0]
-                res_base = str(msg.qos)+" "+str(msg.payload)
-                ProcessEvent(msg, True, 5.0, res_key, event)
-                return
+        router = self.CreateRouter(ProcessEvent, ProcessEvent2)
 
-            if str(msg.topic).find('zwave') > 0:
-                event = str(msg.payload).split(',')
-                res_key = msg.topic + ', ' + event[0]
-                res_base = str(msg.qos)+" "+str(msg.payload)
-                ProcessEvent(msg, True, 10.0, res_key, event)
-                return
-
-            if str(msg.topic).find('rfxtrx') > 0:
-                event = str(msg.payload).split('id: ')
-                res_key = msg.topic + ', ' + event[1].split(',')[0]
-                res_base = str(msg.payload)
-                ProcessEvent(msg, True, 1.0, res_key, event)
-                return
-            
-            if str(msg.topic).find('nethomeserver') > 0:
-                event = str(msg.payload).split(',')
-                res_key = msg.topic + ', ' + event[0]
-                res_base = str(msg.qos)+" "+str(msg.payload)
-                ProcessEvent(msg, True, 1.0, res_key, event)
-                return
-
-            if str(msg.topic).find('switchking') > -1:
-                event = msg.payload
-                res_key = str(msg.topic) + ', ' + str(msg.payload)
-                res_base = str(msg.qos) + " "+ str(msg.payload)
-                ProcessEvent(msg, True, 1.0, res_key, res_base)
-                return
-
-            if str(msg.topic).find('NRED') > -1:
-                event = msg.payload
-                res_key = str(msg.topic) + ', ' + str(msg.payload)
-                res_base = str(msg.qos) + " "+ str(msg.payload)
-                ProcessEvent(msg, True, 1.0, res_key, res_base)
-                return
-
-            if str(msg.topic).find(self.topic.split('/')[1]) > 0:
-                event = str(msg.payload).split(',')
-                res_key = msg.topic + ', ' + event[0]
-                res_base = str(msg.qos)+" "+str(msg.payload)
-                ProcessEvent(msg, True, 5.0, res_key, event)
+        def on_message(client, userdata, msg):
+            route = router.Match(msg.topic)
+            if route is None:
                 return
+            decoder, process, bDelay, delay = route
+            key, event = decoder(msg)
+            res_key = msg.topic + ', ' + key
+            process(msg, bDelay, delay, res_key, event)
             
         
         cs = 1
@@ -421,6 +617,38 @@ class ThreadMQTT(Thread):
             self.finished.clear()
 
 
+    def CreateRouter(self, processEvent, processEvent2):
+        """
+        Routes (decoder, process, bDelay, delay) of the supported sources, in
+        the order of precedence.
+        """
+        router = TopicRouter()
+        csv = (DecodeCSV, processEvent, True)
+        router.Add('domoticz/#', (DecodeJSON, processEvent2, False, 0.0))
+        router.Add('+/domoticz/#', (DecodeJSON, processEvent2, False, 0.0))
+        if self.topic.find('/openHAB/') != -1:
+            router.Add('#', (DecodeCSV, processEvent, False, 0.0))
+        if self.topic == '#':
+            router.Add('#', csv + (1.0,))
+        if self.topic.find('+') == -1 and self.topic.find('#') == -1:
+            router.Add(self.topic, csv + (1.0,))
+        if self.topic.find('/#') > 0:
+            router.Add(self.topic, csv + (5.0,))
+        for source, decoder, delay in (
+            ('zwave', DecodeCSV, 10.0),
+            ('rfxtrx', DecodeKeyValue, 1.0),
+            ('nethomeserver', DecodeCSV, 1.0),
+            ('switchking', DecodeRaw, 1.0),
+            ('NRED', DecodeRaw, 1.0)
+        ):
+            route = (decoder, processEvent, True, delay)
+            router.Add(source + '/#', route)
+            router.Add('+/' + source + '/#', route)
+        # everything else of the subscription
+        router.Add(self.topic, csv + (5.0,))
+        return router
+
+
     def CancelTasks(self):
         for key in self.taskObj:
             try:
@@ -438,6 +666,101 @@ class ThreadMQTT(Thread):
         self.CancelTasks()
 
 
+
+class SyntheticMessage:
+    __slots__ = ('topic', 'payload', 'qos')
+
+    def __init__(self, topic, payload, qos = 0):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+
+
+def SyntheticMessages(count, topics = 50, seed = 1):
+    """
+    Returns count messages in the formats of the supported sources (Domoticz
+    JSON, zwave, rfxtrx, nethomeserver, switchking, Node-RED and plain CSV),
+    spread over topics devices per source.
+    """
+    rnd = random.Random(seed)
+    messages = []
+    for i in xrange(count):
+        n = rnd.randrange(topics)
+        kind = rnd.randrange(7)
+        if kind == 0:
+            messages.append(SyntheticMessage(
+                'domoticz/out',
+                '{"Battery": 255, "RSSI": 12, "dtype": "Light/Switch", '
+                '"id": "%04X", "idx": %d, "name": "Lamp %d", "nvalue": %d, '
+                '"stype": "Switch", "svalue1": "0", "switchType": "On/Off", '
+                '"unit": 1}' % (n, n, n, i % 2)
+            ))
+        elif kind == 1:
+            messages.append(SyntheticMessage(
+                '/zwave/node%d' % n, '%d,%d' % (n, i % 3)
+            ))
+        elif kind == 2:
+            messages.append(SyntheticMessage(
+                '/rfxtrx/temp', 'type: temp, id: %04X, val: %d' % (n, i % 5)
+            ))
+        elif kind == 3:
+            messages.append(SyntheticMessage(
+                '/nethomeserver/ev%d' % n, 'dev%d,%d' % (n, i % 2)
+            ))
+        elif kind == 4:
+            messages.append(SyntheticMessage(
+                '/switchking/dev%d' % n, 'on' if i % 2 else 'off'
+            ))
+        elif kind == 5:
+            messages.append(SyntheticMessage(
+                '/NRED/flow%d' % n, 'p%d' % (i % 4)
+            ))
+        else:
+            messages.append(SyntheticMessage(
+                '/home/sensor%d' % n, '%d,%d' % (n, i % 7)
+            ))
+    return messages
+
+
+def BenchmarkRouting(topic = '#', messages = 100000, topics = 50):
+    """
+    Replays synthetic messages through the router of a subscription to
+    topic, first TopicRouter.Match alone, then Match plus the decoder of
+    the route (as on_message does, without triggering events).
+    """
+    from timeit import default_timer
+    msgs = SyntheticMessages(messages, topics)
+    processed = []
+
+    def process(msg, bDelay, delay, res_key, event):
+        processed.append(res_key)
+
+    thread = ThreadMQTT('benchmark', '', 0, topic, False, '', False)
+
+    router = thread.CreateRouter(process, process)
+    start = default_timer()
+    for msg in msgs:
+        router.Match(msg.topic)
+    matchTime = default_timer() - start
+
+    router = thread.CreateRouter(process, process)
+    start = default_timer()
+    for msg in msgs:
+        route = router.Match(msg.topic)
+        if route is None:
+            continue
+        decoder, handler, bDelay, delay = route
+        key, event = decoder(msg)
+        handler(msg, bDelay, delay, msg.topic + ', ' + key, event)
+    decodeTime = default_timer() - start
+    return dict(
+        messages = len(msgs),
+        routed = len(processed),
+        match = len(msgs) / matchTime if matchTime else 0.0,
+        decode = len(msgs) / decodeTime if decodeTime else 0.0
+    )
+
+
                
 class MQTTthreads(eg.PluginClass):
     text = Text
@@ -445,9 +768,12 @@ class MQTTthreads(eg.PluginClass):
     def __init__(self):
         self.AddAction(MQTTclient)
         self.AddAction(publishMQTT)
+        self.AddAction(benchmarkRouting)
         self.AllMQTTsubscribers = []
         self.lastMQTTName = ""
         self.MQTTThreads = {}
+        self.publishers = {}
+        self.publishersLock = Lock()
         self.OkButtonClicked = False
         self.started = False
 
@@ -470,11 +796,13 @@ class MQTTthreads(eg.PluginClass):
     def __stop__(self):
         self.mainThreadEvent.set()
         self.AbortAllMQTTs()
+        self.CloseAllPublishers()
         self.started = False
 
 
     def __close__(self):
         self.AbortAllMQTTs()
+        self.CloseAllPublishers()
         self.started = False
 
 
@@ -484,6 +812,36 @@ class MQTTthreads(eg.PluginClass):
             #print "Main thread is running..."
 
 
+    #methods to Control the publishers
+    def GetPublisher(self, host, port, cid, clean_session):
+        key = (host, port, str(cid))
+        with self.publishersLock:
+            if key not in self.publishers:
+                self.publishers[key] = PublisherMQTT(
+                    host,
+                    port,
+                    cid,
+                    clean_session
+                )
+            return self.publishers[key]
+
+
+    def GetPublisherMetrics(self):
+        with self.publishersLock:
+            publishers = self.publishers.items()
+        return dict(
+            (key, publisher.GetMetrics()) for key, publisher in publishers
+        )
+
+
+    def CloseAllPublishers(self):
+        with self.publishersLock:
+            publishers = self.publishers.values()
+            self.publishers = {}
+        for publisher in publishers:
+            publisher.Close()
+
+
     #methods to Control MQTTs
     def StartMQTTs(
         self,
@@ -1004,7 +1362,8 @@ class publishMQTT(eg.ActionClass):
         message,
         qos,
         retain,
-        cid
+        cid,
+        wait=False
     ):
         self.name = name
         self.cid = cid
@@ -1020,44 +1379,21 @@ class publishMQTT(eg.ActionClass):
         if self.qos > 0:
             self.clean_session = 0
 
-        mqttc = mqtt.Client(
-            str(self.cid), 
-            clean_session=self.clean_session, 
-            userdata=None, 
-            protocol=4
+        publisher = self.plugin.GetPublisher(
+            self.host,
+            self.port,
+            self.cid,
+            self.clean_session
         )
-
-        mqttc.connect(
-            host=self.host, 
-            port=self.port, 
-            keepalive=60,
-            bind_address="" 
+        done = publisher.Publish(
+            topic=self.topic,
+            payload=self.message,
+            qos=self.qos,
+            retain=self.retain,
+            wait=wait
         )
-
-        mqttc.publish(
-            topic=self.topic, 
-            payload=self.message, 
-            qos=self.qos, 
-            retain=self.retain
-        )        
-        
-#        publish.single(
-#            topic=self.topic, 
-#            payload=self.message, 
-#            qos=self.qos, 
-#            retain=self.retain, 
-#            hostname=self.host, 
-#            port=self.port, 
-#            client_id=self.cid, 
-#            keepalive=5, 
-#            will=None, 
-#            auth=None, 
-#            tls=None, 
-#            protocol=4
-#        ) 
-
-        time.sleep(0.05) 
-        mqttc.disconnect()
+        if done is not None and not done.wait(publisher.ackTimeout):
+            print self.text.noAck, self.topic
 
              
     def Configure(
@@ -1069,7 +1405,8 @@ class publishMQTT(eg.ActionClass):
         message=u"{eg.event.string}",
         qos=0,
         retain=False,
-        cid=''
+        cid='',
+        wait=False
     ):
         plugin = self.plugin
         panel = eg.ConfigPanel(self)
@@ -1080,6 +1417,7 @@ class publishMQTT(eg.ActionClass):
         mySizer_5 = wx.GridBagSizer(10, 10)
         mySizer_6 = wx.GridBagSizer(10, 10)
         mySizer_7 = wx.GridBagSizer(10, 10)
+        mySizer_8 = wx.GridBagSizer(10, 10)
 
         #name
         nameCtrl = wx.TextCtrl(panel, -1, name)
@@ -1124,6 +1462,13 @@ class publishMQTT(eg.ActionClass):
         mySizer_7.Add(wx.StaticText(panel, -1, self.text.retainName), (1,0))
         mySizer_7.Add(retainCtrl, (1,1))
 
+        #wait
+        waitCtrl = wx.CheckBox(panel, -1, '')               
+        waitCtrl.SetValue(wait)
+        waitCtrl.SetInitialSize((50,-1))
+        mySizer_8.Add(wx.StaticText(panel, -1, self.text.waitName), (1,0))
+        mySizer_8.Add(waitCtrl, (1,1))
+
         panel.sizer.Add(mySizer_1, 0, flag = wx.EXPAND)
         panel.sizer.Add(mySizer_2, 0, flag = wx.EXPAND)
         panel.sizer.Add(mySizer_3, 0, flag = wx.EXPAND)
@@ -1131,6 +1476,7 @@ class publishMQTT(eg.ActionClass):
         panel.sizer.Add(mySizer_5, 0, flag = wx.EXPAND)
         panel.sizer.Add(mySizer_6, 0, flag = wx.EXPAND)
         panel.sizer.Add(mySizer_7, 0, flag = wx.EXPAND)
+        panel.sizer.Add(mySizer_8, 0, flag = wx.EXPAND)
 
         if cid == '':
             random.jumpahead(168)
@@ -1145,6 +1491,7 @@ class publishMQTT(eg.ActionClass):
             message = messageCtrl.GetValue()
             qos = qosCtrl.GetValue()
             retain = retainCtrl.GetValue()
+            wait = waitCtrl.GetValue()
             panel.SetResult(
                 name,
                 host,
@@ -1153,6 +1500,49 @@ class publishMQTT(eg.ActionClass):
                 message,
                 qos,
                 retain,
-                cid
+                cid,
+                wait
             )
 
+
+
+class benchmarkRouting(eg.ActionClass):
+    text = benchmarkRoutingTxt
+
+    def __call__(self, topic = '#', messages = 100000, topics = 50):
+        res = BenchmarkRouting(topic, messages, topics)
+        print self.text.result % (
+            topic,
+            res['messages'],
+            res['routed'],
+            res['match'],
+            res['decode']
+        )
+        return res
+
+
+    def Configure(self, topic = '#', messages = 100000, topics = 50):
+        panel = eg.ConfigPanel(self)
+        mySizer = wx.GridBagSizer(10, 10)
+
+        topicCtrl = wx.TextCtrl(panel, -1, topic)
+        topicCtrl.SetInitialSize((250,-1))
+        mySizer.Add(wx.StaticText(panel, -1, self.text.topicName), (0,0))
+        mySizer.Add(topicCtrl, (0,1))
+
+        messagesCtrl = panel.SpinIntCtrl(messages, min=1, max=10000000)
+        mySizer.Add(wx.StaticText(panel, -1, self.text.messagesName), (1,0))
+        mySizer.Add(messagesCtrl, (1,1))
+
+        topicsCtrl = panel.SpinIntCtrl(topics, min=1, max=100000)
+        mySizer.Add(wx.StaticText(panel, -1, self.text.topicsName), (2,0))
+        mySizer.Add(topicsCtrl, (2,1))
+
+        panel.sizer.Add(mySizer, 0, flag = wx.EXPAND)
+
+        while panel.Affirmed():
+            panel.SetResult(
+                topicCtrl.GetValue(),
+                messagesCtrl.GetValue(),
+                topicsCtrl.GetValue()
+            )
@@ -79,14 +79,16 @@ eg.RegisterPlugin(
 import eg
 import socket
 import httplib
+import json
 import time
 import os
 import sys
 import winsound
-import calendar
 import random
-from datetime import datetime, timedelta
-from threading import Event, Thread
+from datetime import date, datetime
+from collections import deque
+from threading import Event, Lock, Thread
+from Queue import Queue, Full
 
 
 
@@ -116,6 +118,7 @@ class Text:
     ka_threadStarted = "Keep Alive thread started"    
     ka_threadStopped = "Keep Alive thread ended"    
     read_error = "Read error: "
+    queue_full = "Event queue full, event dropped for logger: "
     txt_signal_back = "Recovered contact with sensor"
     txt_taskObj = "Lost contact with sensor"
 
@@ -182,8 +185,324 @@ class Text:
 
 
 
+class NHSEvent(object):
+    """
+    One line received from NetHomeServer, split and classified once and
+    then shared (read only) by all loggers.
+    """
+    __slots__ = ('fields', 'text', 'iPronto', 'isEvent')
+
+    def __init__(self, line):
+        fields = ("NetHomeServer" + "," + line).split(',')
+        if (
+            fields.count('UPM.HouseCode') > 0
+            and fields.count('UPM.SequenceNumber') > 0
+        ):
+            fields = fields[:15]
+        self.fields = fields
+        self.text = str(fields)
+        try:
+            self.iPronto = fields.index('Pronto.Message')
+        except ValueError:
+            self.iPronto = -1 # no match
+        self.isEvent = (
+            fields.count("NetHomeServer") > 0 and
+            fields.count("event") > 0 and 
+            fields.count("Value") > 0
+        )
+
+
+
+class RestClient(object):
+    """
+    Keep-alive connections to the OpenNetHome REST interface, pooled per
+    host and port, and a time limited cache of the item catalogue.
+    """
+    maxIdle = 4
+
+    def __init__(self, ttl = 300.0, timeout = 10.0):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.lock = Lock()
+        self.idle = {} # (host, port) -> idle connections
+        self.catalogue = {} # (host, port, category) -> (expires, objects)
+
+
+    def Acquire(self, key):
+        with self.lock:
+            idle = self.idle.get(key)
+            if idle:
+                return idle.pop(), True
+        conn = httplib.HTTPConnection(key[0], key[1], timeout = self.timeout)
+        return conn, False
+
+
+    def Release(self, key, conn):
+        with self.lock:
+            idle = self.idle.setdefault(key, [])
+            if len(idle) < self.maxIdle:
+                idle.append(conn)
+                return
+        conn.close()
+
+
+    def Get(self, host, port, URL):
+        # Returns the decoded JSON body or None if the server did not
+        # answer 200. A pooled connection that the server has closed in
+        # the meantime is retried once on a new connection.
+        key = (host, int(port))
+        while True:
+            conn, reused = self.Acquire(key)
+            try:
+                conn.request('GET', URL)
+                resp = conn.getresponse()
+                content = resp.read()
+            except (httplib.HTTPException, socket.error):
+                conn.close()
+                if reused:
+                    continue
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self.Release(key, conn)
+            if resp.status != 200:
+                return None
+            return json.loads(content)
+
+
+    def GetCatalogue(self, host, port, category):
+        # Returns {item name: actions} for all items in the category
+        key = (host, int(port), category)
+        now = time.time()
+        with self.lock:
+            entry = self.catalogue.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        items = self.Get(host, port, '/rest/items')
+        if items is None:
+            return None
+        objects = {}
+        for item in items:
+            if item['category'] == category:
+                details = self.Get(host, port, '/rest/items/'+item['id'])
+                if details is not None:
+                    objects[item['name']] = details['actions']
+        with self.lock:
+            self.catalogue[key] = (now + self.ttl, objects)
+        return objects
+
+
+    def Invalidate(self, host = None, port = None):
+        with self.lock:
+            for key in self.catalogue.keys():
+                if (
+                    (host is None or key[0] == host)
+                    and (port is None or key[1] == int(port))
+                ):
+                    del self.catalogue[key]
+
+
+    def Close(self):
+        with self.lock:
+            idle = self.idle
+            self.idle = {}
+        for conns in idle.itervalues():
+            for conn in conns:
+                conn.close()
+
+
+
+class RollingWindow(object):
+    """
+    Count, sum, min and max of the samples seen during the last 'span'
+    seconds. Samples are folded into time buckets kept in a ring, so the
+    cost per sample does not depend on how many samples the window holds.
+    """
+    __slots__ = (
+        'span', 'resolution', 'size', 'head',
+        'counts', 'sums', 'count', 'total', 'minQ', 'maxQ'
+    )
+
+    def __init__(self, span, resolution = None):
+        if resolution is None:
+            resolution = max(1, span / 60)
+        self.span = span
+        self.resolution = resolution
+        self.size = max(1, -(-span // resolution))
+        self.head = None # bucket number of the newest bucket
+        self.counts = [0]*self.size
+        self.sums = [0.0]*self.size
+        self.count = 0
+        self.total = 0.0
+        # (bucket, value) pairs, values rising in minQ and falling in maxQ
+        self.minQ = deque()
+        self.maxQ = deque()
+
+
+    def Advance(self, now):
+        bucket = int(now // self.resolution)
+        if self.head is None:
+            self.head = bucket
+        steps = bucket - self.head
+        if steps <= 0:
+            return self.head # Clock went backwards, keep the newest bucket
+        if steps >= self.size:
+            self.Clear()
+        else:
+            for i in range(self.head + 1, bucket + 1):
+                i %= self.size
+                if self.counts[i]:
+                    self.count -= self.counts[i]
+                    self.total -= self.sums[i]
+                    self.counts[i] = 0
+                    self.sums[i] = 0.0
+            if not self.count:
+                self.total = 0.0
+        self.head = bucket
+        oldest = bucket - self.size
+        while self.minQ and self.minQ[0][0] <= oldest:
+            self.minQ.popleft()
+        while self.maxQ and self.maxQ[0][0] <= oldest:
+            self.maxQ.popleft()
+        return bucket
+
+
+    def Add(self, value, now):
+        bucket = self.Advance(now)
+        i = bucket % self.size
+        self.counts[i] += 1
+        self.sums[i] += value
+        self.count += 1
+        self.total += value
+        minQ = self.minQ
+        if not (minQ and minQ[-1][0] == bucket and minQ[-1][1] <= value):
+            while minQ and minQ[-1][1] >= value:
+                minQ.pop()
+            minQ.append((bucket, value))
+        maxQ = self.maxQ
+        if not (maxQ and maxQ[-1][0] == bucket and maxQ[-1][1] >= value):
+            while maxQ and maxQ[-1][1] <= value:
+                maxQ.pop()
+            maxQ.append((bucket, value))
+
+
+    def Clear(self):
+        self.counts = [0]*self.size
+        self.sums = [0.0]*self.size
+        self.count = 0
+        self.total = 0.0
+        self.minQ.clear()
+        self.maxQ.clear()
+
+
+    def Stats(self, now):
+        # Returns (count, sum, mean, min, max), None where there are no samples
+        self.Advance(now)
+        if not self.count:
+            return (0, 0.0, None, None, None)
+        return (
+            self.count,
+            self.total,
+            self.total / self.count,
+            self.minQ[0][1],
+            self.maxQ[0][1]
+        )
+
+
+    def GetState(self):
+        buckets = []
+        if self.head is not None:
+            for b in range(self.head - self.size + 1, self.head + 1):
+                i = b % self.size
+                if self.counts[i]:
+                    buckets.append((b, self.counts[i], self.sums[i]))
+        return (
+            self.span,
+            self.resolution,
+            self.head,
+            buckets,
+            list(self.minQ),
+            list(self.maxQ)
+        )
+
+
+    def SetState(self, state):
+        span, resolution, head, buckets, minQ, maxQ = state
+        if (span, resolution) != (self.span, self.resolution):
+            return False # Window layout changed, start over
+        self.Clear()
+        self.head = head
+        for b, count, total in buckets:
+            self.counts[b % self.size] = count
+            self.sums[b % self.size] = total
+            self.count += count
+            self.total += total
+        self.minQ.extend(tuple(item) for item in minQ)
+        self.maxQ.extend(tuple(item) for item in maxQ)
+        return True
+
+
+
+class RollingStatistics(object):
+    """
+    A set of named gauges, each one followed over a number of time windows.
+    Every logger owns one and saves it in WeatherData when it is aborted.
+    """
+
+    def __init__(self):
+        self.gauges = {}
+
+
+    def AddGauge(self, name, spans):
+        windows = self.gauges.get(name)
+        if windows is None:
+            windows = self.gauges[name] = {}
+        for span in spans:
+            if span not in windows:
+                windows[span] = RollingWindow(span)
+        return windows
+
+
+    def Add(self, name, value, now = None):
+        if now is None:
+            now = time.time()
+        for window in self.gauges[name].itervalues():
+            window.Add(value, now)
+
+
+    def Stats(self, name, span, now = None):
+        if now is None:
+            now = time.time()
+        return self.gauges[name][span].Stats(now)
+
+
+    def GetState(self):
+        state = {}
+        for name, windows in self.gauges.iteritems():
+            state[name] = [w.GetState() for w in windows.itervalues()]
+        return state
+
+
+    def SetState(self, state):
+        for name, windowStates in state.iteritems():
+            windows = self.gauges.get(name)
+            if windows is None:
+                continue
+            for windowState in windowStates:
+                window = windows.get(windowState[0])
+                if window is not None:
+                    try:
+                        window.SetState(windowState)
+                    except (TypeError, ValueError):
+                        window.Clear()
+
+
+
 class loggerThread(Thread):
     text = Text
+    windWindows = (60, 600, 900, 3600, 86400) # seconds
+    rainWindows = (3600, 7200, 86400) # seconds
 
     def __init__(
         self,
@@ -212,6 +531,14 @@ class loggerThread(Thread):
         self.abort = False
         self.bTaskAdded = False
         self.plugin = plugin
+        self.events = Queue(1000)
+        self.lastEvent = ""
+        self.stats = RollingStatistics()
+        self.stats.AddGauge('wind', self.windWindows)
+        self.stats.AddGauge('rain', self.rainWindows)
+        # the last 15 and 60 wind speeds, as reported by GetAverageWindLevels
+        self.wdLevels_15 = deque(maxlen = 15)
+        self.wdLevels_60 = deque(maxlen = 60)
         self.wDirection = [
             'N',
             'NNE',
@@ -233,19 +560,11 @@ class loggerThread(Thread):
 
    
     def run(self):
-        self.rain_levels = [0.0, 0.0]
-        self.rain_Hour = [0.0]*4
-        self.rain_Hour_previous = 0.0
-        self.rain_Today = [0.0, 0.0]
-        self.rain_Yesterday = 0.0
+        self.rain_Level = None
+        self.rain_Day = None
+        self.rain_Today = 0.0
         self.rain_Week_levels = [0.0]*7
         self.rain_Week_dates = ['']*7
-        self.rain_Week_sum = 0.0
-        self.bNewDay = False
-        self.wj = 0
-        self.wi = 0
-        self.wdLevels_15 = []
-        self.wdLevels_60 = []
         self.wdLabel = ""
         self.wdLabelPrevious = "Unknown"
         self.old_lst = []
@@ -259,37 +578,31 @@ class loggerThread(Thread):
             self.rain_Week_dates = WeatherData.rain_Week_dates[self.name]
         except:
             pass
+        try:
+            (
+                self.rain_Day,
+                self.rain_Today,
+                self.rain_Level
+            ) = WeatherData.rain_Today[self.name]
+        except:
+            pass
+        try:
+            self.stats.SetState(WeatherData.rolling_Stats[self.name])
+        except:
+            pass
+        self.rain_Week_sum = sum(self.rain_Week_levels)
 
         while (self.abort == False):
-            self.finished.wait(0.05)
-            lst = []
-            iPronto = 0
+            record = self.events.get() # Blocks until an event arrives
             
-            if self.abort:
-                self.finished.wait(1)
+            if self.abort or record is None:
                 break
             
-            if self.plugin.event_NHS != "":
-                lst = self.plugin.event_NHS.split(',')
-                self.plugin.event_NHS = ""
-                
-                if (
-                    lst.count('UPM.HouseCode') > 0
-                    and lst.count('UPM.SequenceNumber') > 0
-                ):
-                    #print lst
-                    lst = lst[:15]
+            lst = record.fields
+            iPronto = record.iPronto
+            self.lastEvent = record.text
 
-                try:
-                    iPronto = lst.index('Pronto.Message')
-                except ValueError:
-                    iPronto = -1 # no match
-
-            if (
-                lst.count("NetHomeServer") > 0 and
-                lst.count("event") > 0 and 
-                lst.count("Value") > 0
-            ):
+            if record.isEvent:
                 if not self.bTaskAdded:
                     try:
                         eg.scheduler.CancelTask(taskObj)
@@ -345,7 +658,10 @@ class loggerThread(Thread):
                     #####################################
     
                     if len(lst) > 0 or iPronto > 0:
-                        s_lst = str(lst)
+                        if lst is record.fields:
+                            s_lst = record.text
+                        else:
+                            s_lst = str(lst)
 
                         if (s_lst.find('Pronto.Message') > -1
                         ):
@@ -740,79 +1056,49 @@ class loggerThread(Thread):
 
     
     def CalcRainData(self, rLevel ):
-        self.rain_Week_sum = 0.0
         rainLevel = float(rLevel) * 0.7
-        self.rain_levels[0] = self.rain_levels[1]
-        self.rain_levels[1] = rainLevel
-        date = str(time.strftime("%m/%d/%Y", time.localtime()))
-        ydate = datetime.today() - timedelta(1)
-        toDate = str(time.strftime("%Y-%m-%d", time.localtime()))
-        yesterDate = str(ydate).split(' ')[0]
-        d = self.GetDayOfWeek(date) # Monday = 0
-        dy = 0 
-
-        if d == 0:
-            dy = 6
-        else:
-            dy = d - 1
+        now = time.time()
+        today = date.fromtimestamp(now).toordinal()
 
-        if (self.rain_levels[0] > self.rain_levels[1]): # Rain gauge reset
-            self.rain_levels = [0.0, 0.0]
+        if self.rain_Day != today:
+            self.NewRainDay(today)
 
-        if ( # Plugin startup
-            self.rain_Today[0] == 0.0
-            and
-            self.rain_Today[1] == 0.0
-        ):
-            start = time.clock()
-            self.rain_Hour[1] = start
-            
-        if (self.rain_levels[1] >= self.rain_levels[0]):
-            now = time.clock()
-            self.rain_Hour[2] += self.rain_levels[1] - self.rain_levels[0]
-            self.rain_Hour[3] = now
-            self.rain_Today[1] += self.rain_levels[1] - self.rain_levels[0]
-
-            #Last hour
-            h_diff_time = now - self.rain_Hour[1]
-            #print h_diff_time
-            if (h_diff_time > 3600): # One hour has elapsed
-                self.rain_Hour[0] = self.rain_Hour[2]
-                self.rain_Hour[2] = 0.0
-                self.rain_Hour[1] = now
-                self.rain_Hour_previous = self.rain_Hour[0]
-                
-            #Last day & yesterday & week
-            t_now = time.strftime("%H", time.localtime())
-            if (int(t_now) == 0 and not self.bNewDay):
-                self.bNewDay = True # A new day begins
-                self.rain_Today[0] = self.rain_Today[1]
-                self.rain_Today[1] = 0.0
-                self.rain_Week_levels[dy] = self.rain_Today[0]
-                self.rain_Week_dates[dy] = yesterDate
-            if (int(t_now) > 0 and self.bNewDay):
-                self.bNewDay = False
-                                          
-        for item in self.rain_Week_levels:
-            self.rain_Week_sum += item
-
-        self.rain_Yesterday = self.rain_Week_levels[dy]
+        if self.rain_Level is None: # Plugin startup
+            rain = 0.0
+        elif self.rain_Level > rainLevel: # Rain gauge reset
+            rain = rainLevel
+        else:
+            rain = rainLevel - self.rain_Level
+        self.rain_Level = rainLevel
+        self.rain_Today += rain
+        self.stats.Add('rain', rain, now)
+
+        #Last hour & previous hour
+        rain_Hour = self.stats.Stats('rain', 3600, now)[1]
+        rain_Hour_previous = max(
+            0.0,
+            self.stats.Stats('rain', 7200, now)[1] - rain_Hour
+        )
+
+        #Yesterday & week
+        dy = date.fromordinal(today - 1).weekday() # Monday = 0
+        rain_Yesterday = self.rain_Week_levels[dy]
         date_Yesterday = self.rain_Week_dates[dy]
         self.plugin.rain_level_values_last_week = self.rain_Week_levels
         self.plugin.rain_level_dates_last_week = self.rain_Week_dates
         p_lod = (    
             "UPM.RainLastHour|"+
-            str(self.rain_Hour[2])+"|"+
+            str(rain_Hour)+"|"+
             "mm"+"|"+
             "UPM.RainPreviousHour|"+
-            str(self.rain_Hour_previous)+"|"+
+            str(rain_Hour_previous)+"|"+
             "mm"+"|"+
             "UPM.RainToday|"+
-            str(self.rain_Today[1])+"|"+
+            str(self.rain_Today)+"|"+
             "mm"+"|"+
             "UPM.RainYesterday|"+
             str(date_Yesterday)+"|"+
-            str(self.rain_Yesterday)+"|"+
+            str(rain_Yesterday)+"|"+
             "mm"+"|"+
             "UPM.RainLastWeek|"+
             str(self.rain_Week_sum)+"|"+
@@ -822,12 +1108,28 @@ class loggerThread(Thread):
             "mm"+"|"
         )
         return p_lod
+
+
+    def NewRainDay(self, today):
+        # Books the finished day(s) into the week, days without any
+        # readings get zero rain. At most one week needs to be touched.
+        if self.rain_Day is not None:
+            for day in range(max(self.rain_Day, today - 7), today):
+                dy = date.fromordinal(day).weekday()
+                if day == self.rain_Day:
+                    level = self.rain_Today
+                else:
+                    level = 0.0
+                self.rain_Week_sum += level - self.rain_Week_levels[dy]
+                self.rain_Week_levels[dy] = level
+                self.rain_Week_dates[dy] = date.fromordinal(day).isoformat()
+        self.rain_Today = 0.0
+        self.rain_Day = today
         
         
     def CalcWindData(self, wSpeed, wDir):    
         wdSpeed = float(wSpeed)
-        windSpeedSum_15 = 0.0
-        windSpeedSum_60 = 0.0
+        now = time.time()
 
         if (int(wDir) <= 30):
             if (self.wdLabel != ""):
@@ -836,43 +1138,26 @@ class loggerThread(Thread):
             self.wdLabel = self.wDirection[int(wDir)/2]
         else:
             print "Wind direction out of range:", self.wdLabel
-            print "Raw message: ", self.plugin.event_NHS
+            print "Raw message: ", self.lastEvent
             self.wdLabel = "Out of range"
 
         if self.plugin.bSpeed_ms:
             wdSpeed = (wdSpeed*1000)/3600
 
-        if len(self.wdLevels_15) < 15:
-            self.wdLevels_15.append(wdSpeed)
-        else:
-            self.wdLevels_15[self.wi] = wdSpeed
-
-        if len(self.wdLevels_60) < 60:
-            self.wdLevels_60.append(wdSpeed)
-        else:
-            self.wdLevels_60[self.wj] = wdSpeed
-        
-        self.wi += 1
-        self.wj += 1
-        
-        for k in range(len(self.wdLevels_15)):
-            windSpeedSum_15 += self.wdLevels_15[k] 
-
-        wdSpeedAv_15 = windSpeedSum_15 / self.wi
-
-        for m in range(len(self.wdLevels_60)):
-            windSpeedSum_60 += self.wdLevels_60[m] 
-
-        wdSpeedAv_60 = windSpeedSum_60 / self.wj
-
-        if (self.wi > 14):
-            self.wi = 0
-
-        if (self.wj > 59):
-            self.wj = 0
-
-        self.plugin.wind_level_average_15 = self.wdLevels_15
-        self.plugin.wind_level_average_60 = self.wdLevels_60
+        self.stats.Add('wind', wdSpeed, now)
+        # (count, sum, mean, min, max) over 10 min, 15 min, 1 h and 24 h
+        wd_10 = self.stats.Stats('wind', 600, now)
+        wd_15 = self.stats.Stats('wind', 900, now)
+        wd_60 = self.stats.Stats('wind', 3600, now)
+        wd_1440 = self.stats.Stats('wind', 86400, now)
+
+        self.wdLevels_15.append(wdSpeed)
+        self.wdLevels_60.append(wdSpeed)
+        self.plugin.wind_level_average_15 = list(self.wdLevels_15)
+        self.plugin.wind_level_average_60 = list(self.wdLevels_60)
+        # (mean, min, max) over the last 15 min and 1 h
+        self.plugin.wind_stats_15 = wd_15[2:]
+        self.plugin.wind_stats_60 = wd_60[2:]
         p_lod = (    
             "UPM.WindDirection|"+
             self.wdLabel+"|"+
@@ -881,20 +1166,17 @@ class loggerThread(Thread):
             "UPM.WindSpeed|"+
             str(wdSpeed)+"|"+
             "UPM.WindSpeedAverage_15|"+
-            str(wdSpeedAv_15)+"|"+
+            str(wd_15[2])+"|"+
             "UPM.WindSpeedAverage_60|"+
-            str(wdSpeedAv_60)+"|"
+            str(wd_60[2])+"|"+
+            "UPM.WindSpeedAverage_1440|"+
+            str(wd_1440[2])+"|"+
+            "UPM.WindGust_10|"+
+            str(wd_10[4])+"|"
          )
         return p_lod
 
 
-    def GetDayOfWeek(self, dateString):
-        # day of week (monday = 0) of a given month/day/year
-        ds = dateString.split('/')
-        dayOfWeek = int(calendar.weekday(int(ds[2]),int(ds[0]),int(ds[1])))
-        return(dayOfWeek)
-
-
     def ClearBuffer(self):
         self.old_lst = []
         self.bTaskAdded = False
@@ -903,10 +1185,20 @@ class loggerThread(Thread):
     def Abortlogger(self):
         WeatherData.rain_Week_levels[self.name] = self.rain_Week_levels
         WeatherData.rain_Week_dates[self.name] = self.rain_Week_dates
+        WeatherData.rain_Today[self.name] = (
+            self.rain_Day,
+            self.rain_Today,
+            self.rain_Level
+        )
+        WeatherData.rolling_Stats[self.name] = self.stats.GetState()
         print self.text.thr_abort, self.text.n_loggerThread
         self.finished.wait(1.0)
         self.abort = True
         self.finished.set()
+        try:
+            self.events.put_nowait(None) # Wake up run()
+        except Full:
+            pass
         time.sleep(3.0)
 
        
@@ -969,6 +1261,8 @@ class CurrentStateData(eg.PersistentData):
 class WeatherData(eg.PersistentData):
     rain_Week_levels = {}
     rain_Week_dates = {}
+    rain_Today = {}
+    rolling_Stats = {}
 
 
 
@@ -980,6 +1274,7 @@ class NetHomeServer(eg.PluginClass):
         self.AddAction(SendCommand)
         self.AddAction(RollerTrolCommand)
         self.AddAction(ClearSensorsStatus)
+        self.AddAction(ClearRestCache)
         self.AddAction(GetWeeklyRainLevels)
         self.AddAction(GetAverageWindLevels)
         self.AddAction(prontoCmd)
@@ -998,7 +1293,10 @@ class NetHomeServer(eg.PluginClass):
         self.rain_level_dates_last_week = []
         self.wind_level_average_15 = []
         self.wind_level_average_60 = []
+        self.wind_stats_15 = (None, None, None)
+        self.wind_stats_60 = (None, None, None)
         self.sensors_status = CurrentStateData.sensors_status
+        self.rest = RestClient()
         self.OkButtonClicked = False
         self.started = False
 
@@ -1017,7 +1315,7 @@ class NetHomeServer(eg.PluginClass):
         self.bSpeed_ms = bSpeed_ms
         self.started = True
         self.conn_error = True
-        self.event_NHS = ""
+        self.droppedEvents = 0
         self.semaPhore = True
         self.rest_port = 8020
         self.prefix = 'OpenNetHome'
@@ -1030,8 +1328,7 @@ class NetHomeServer(eg.PluginClass):
         self.RestartAllLoggers()
         self.msgCounter = {}
         self.msgCounterPrev = {}
-        self.resp = None
-        self.conn = None
+        self.rest.Invalidate()
         self.reconnects = 0
 #        if self.OkButtonClicked:
 #            self.OkButtonClicked = False
@@ -1136,8 +1433,7 @@ class NetHomeServer(eg.PluginClass):
                 try:
                     self.KeepAlive()
                 except:
-                    print 'Exception occured: ', self.conn
-                    self.conn = None
+                    print 'Exception occured: ', sys.exc_info()[1]
                     self.reconnects += 1
                 finally:
                     if self.reconnects > 0:
@@ -1146,88 +1442,60 @@ class NetHomeServer(eg.PluginClass):
             else:
                 counter += 1
             keepAliveThreadEvent.wait(1.0)
-        self.conn = None
+        self.rest.Close()
         print self.text.ka_threadStopped
 
 
     def KeepAlive(self):
         objects = {}
-        if self.conn == None:
-            self.conn = httplib.HTTPConnection(
-                self.hostName+
-                ':'+
-                str(self.rest_port),
-                timeout=30
-            )
-        self.conn.request(
-            'GET', 
-            "http://"+
-            self.hostName+
-            ':'+
-            str(self.rest_port)+
-            '/rest/items'
-        )
-        try:
-            self.resp = self.conn.getresponse()
-        except:
-            self.resp = None
-        finally:
-            pass
-        if self.resp <> None:
-            if int(self.resp.status) == 200:
-                content = self.resp.read()
-                content = eval(content)
-                for item in content:
-                    if item['category']=='Hardware':
-                        self.conn.request(
-                            'GET', 
-                            "http://"+self.hostName+
-                            ':'+
-                            str(self.rest_port)+
-                            '/rest/items/'+
-                            item['id']
-                        )
-                        self.resp = self.conn.getresponse()
-                        hw = self.resp.read().replace('true', 'True')
-                        hw.replace('false', 'False')
-                        className = eval(hw)['name']
-                        attribs = eval(hw)['attributes']
-                        objects[className] = attribs[0]['value']
-                        self.msgCounter[className] = 0
-                        for item in attribs:
-                            if(
-                                item['name'] == 'ReceivedMessages' or 
-                                item['name'] == 'Received'
-                            ):
-                                self.msgCounter[className] = int(item['value'])
-                for item in objects:
+        content = self.rest.Get(self.hostName, self.rest_port, '/rest/items')
+        if content <> None:
+            for item in content:
+                if item['category']=='Hardware':
+                    hw = self.rest.Get(
+                        self.hostName,
+                        self.rest_port,
+                        '/rest/items/'+item['id']
+                    )
+                    if hw == None:
+                        continue
+                    className = hw['name']
+                    attribs = hw['attributes']
+                    objects[className] = attribs[0]['value']
+                    self.msgCounter[className] = 0
+                    for item in attribs:
+                        if(
+                            item['name'] == 'ReceivedMessages' or 
+                            item['name'] == 'Received'
+                        ):
+                            self.msgCounter[className] = int(item['value'])
+            for item in objects:
+                try:
                     try:
-                        try:
-                            p = self.msgCounterPrev[item]
-                        except:
-                            self.msgCounterPrev[item] = 0
-                        if self.msgCounter[item] == self.msgCounterPrev[item]:
-                            if self.msgCounter[item] > 0:
-                                eg.TriggerEvent(
-                                    item+' is disconnected',
-                                    prefix = self.prefix
-                                )
+                        p = self.msgCounterPrev[item]
                     except:
-                        pass
-                    print(
-                        self.prefix, 
-                        'Checking connection with...', 
-                        item, 
-                        self.msgCounter[item], 
-                        self.msgCounterPrev[item]
-                    )
-                    self.msgCounterPrev[item] = self.msgCounter[item]
-            else:
-                eg.TriggerEvent(
-                    'No response from REST interface...will keep on trying',
-                    prefix = self.prefix
+                        self.msgCounterPrev[item] = 0
+                    if self.msgCounter[item] == self.msgCounterPrev[item]:
+                        if self.msgCounter[item] > 0:
+                            eg.TriggerEvent(
+                                item+' is disconnected',
+                                prefix = self.prefix
+                            )
+                except:
+                    pass
+                print(
+                    self.prefix, 
+                    'Checking connection with...', 
+                    item, 
+                    self.msgCounter[item], 
+                    self.msgCounterPrev[item]
                 )
-                self.conn = None
+                self.msgCounterPrev[item] = self.msgCounter[item]
+        else:
+            eg.TriggerEvent(
+                'No response from REST interface...will keep on trying',
+                prefix = self.prefix
+            )
 
 
     def main(self,mainThreadEvent):
@@ -1359,8 +1627,7 @@ class NetHomeServer(eg.PluginClass):
                     for myEvent in e_lst:
                         if myEvent != '':
                             #print myEvent, e_lst
-                            self.event_NHS = "NetHomeServer" + "," + myEvent
-                            mainThreadEvent.wait(0.2)
+                            self.DispatchEvent(myEvent)
     
                 if self.connectionError:
                     mainThreadEvent.wait(5.0)
@@ -1386,6 +1653,16 @@ class NetHomeServer(eg.PluginClass):
         )
 
     
+    def DispatchEvent(self, line):
+        record = NHSEvent(line)
+        for t in self.loggerThreads.values():
+            try:
+                t.events.put(record, True, 1.0)
+            except Full:
+                self.droppedEvents += 1
+                eg.PrintError(self.text.queue_full + t.name)
+
+
     def Startlogger(    #methods to Control loggers
         self,
         loggerName,
@@ -2103,6 +2380,9 @@ class GetAverageWindLevels(eg.ActionClass):
 
 class SendCommand(eg.ActionClass):
     text = Text.SendCommand
+    # Only the item catalogue comes from the pooled REST client, the command
+    # itself is sent over the CLI port with a connection of its own.
+    category = 'Lamps'
     objects = {}
 
     def __call__(
@@ -2137,7 +2417,7 @@ class SendCommand(eg.ActionClass):
         objCtrl = self.objCtrl
         choice = objCtrl.GetSelection()
         obj = objCtrl.GetStringSelection()
-        a_list = self.objects[obj]
+        a_list = self.objects.get(obj, [])
         attribCtrl.Clear()
         attribCtrl.AppendItems(strings=a_list)
         if a_list.count(obj)==0:
@@ -2156,25 +2436,19 @@ class SendCommand(eg.ActionClass):
         return choice
 
 
-    def GetConnection(self, host, port, URL):
+    def GetObjects(self, rest_port):
         try:
-            conn = httplib.HTTPConnection(host+':'+str(port))
-            conn.request('GET', "http://"+host+':'+str(port)+URL)
-            resp = conn.getresponse()
-            if resp.status == 200:
-                return resp
-            else:
-                eg.PrintError(self.text.rest_connection_error)
-                return None
+            objects = self.plugin.rest.GetCatalogue(
+                self.plugin.hostName,
+                rest_port,
+                self.category
+            )
         except:
-            return None
-
-
-    def GetActions(self, host, port, URL):
-        resp = self.GetConnection(host, port, URL)
-        content = resp.read().replace('true', 'True')
-        content.replace('false', 'False')
-        return eval(content)['actions']
+            objects = None
+        if objects == None:
+            eg.PrintError(self.text.rest_connection_error)
+            return {}
+        return objects
 
 
     def Configure(
@@ -2186,20 +2460,7 @@ class SendCommand(eg.ActionClass):
     ):
         panel = eg.ConfigPanel(self)
         lamps = []
-        resp = self.GetConnection(
-            self.plugin.hostName, 
-            rest_port, 
-            '/rest/items'
-        )
-        content = eval(resp.read())
-        for item in content:
-            if item['category']=='Lamps':
-                actions = self.GetActions(
-                    self.plugin.hostName,
-                    rest_port, 
-                    '/rest/items/'+item['id']
-                )
-                self.objects[item['name']] = actions
+        self.objects = self.GetObjects(rest_port)
         for item in self.objects:
             lamps.append(item)
             
@@ -2263,6 +2524,9 @@ class SendCommand(eg.ActionClass):
 
 class RollerTrolCommand(eg.ActionClass):
     text = Text.RollerTrolCommand
+    # Only the item catalogue comes from the pooled REST client, the command
+    # itself is sent over the CLI port with a connection of its own.
+    category = 'Actuators'
     objects = {}
 
     def __call__(
@@ -2297,7 +2561,7 @@ class RollerTrolCommand(eg.ActionClass):
         objCtrl = self.objCtrl
         choice = objCtrl.GetSelection()
         obj = objCtrl.GetStringSelection()
-        a_list = self.objects[obj]
+        a_list = self.objects.get(obj, [])
         attribCtrl.Clear()
         attribCtrl.AppendItems(strings=a_list)
         if a_list.count(obj)==0:
@@ -2316,25 +2580,19 @@ class RollerTrolCommand(eg.ActionClass):
         return choice
 
 
-    def GetConnection(self, host, port, URL):
+    def GetObjects(self, rest_port):
         try:
-            conn = httplib.HTTPConnection(host+':'+str(port))
-            conn.request('GET', "http://"+host+':'+str(port)+URL)
-            resp = conn.getresponse()
-            if resp.status == 200:
-                return resp
-            else:
-                eg.PrintError(self.text.rest_connection_error)
-                return None
+            objects = self.plugin.rest.GetCatalogue(
+                self.plugin.hostName,
+                rest_port,
+                self.category
+            )
         except:
-            return None
-
-
-    def GetActions(self, host, port, URL):
-        resp = self.GetConnection(host, port, URL)
-        content = resp.read().replace('true', 'True')
-        content.replace('false', 'False')
-        return eval(content)['actions']
+            objects = None
+        if objects == None:
+            eg.PrintError(self.text.rest_connection_error)
+            return {}
+        return objects
 
 
     def Configure(
@@ -2346,20 +2604,7 @@ class RollerTrolCommand(eg.ActionClass):
     ):
         panel = eg.ConfigPanel(self)
         devices = []
-        resp = self.GetConnection(
-            self.plugin.hostName, 
-            rest_port, 
-            '/rest/items'
-        )
-        content = eval(resp.read())
-        for item in content:
-            if item['category']=='Actuators':
-                actions = self.GetActions(
-                    self.plugin.hostName,
-                    rest_port, 
-                    '/rest/items/'+item['id']
-                )
-                self.objects[item['name']] = actions
+        self.objects = self.GetObjects(rest_port)
         for item in self.objects:
             devices.append(item)
             
@@ -2421,6 +2666,14 @@ class RollerTrolCommand(eg.ActionClass):
 
 
 
+class ClearRestCache(eg.ActionClass):
+        
+    def __call__(self):
+        #Forget the cached item catalogue, it is read again when needed
+        self.plugin.rest.Invalidate()
+
+
+
 class ClearSensorsStatus(eg.ActionClass):
         
     def __call__(self):
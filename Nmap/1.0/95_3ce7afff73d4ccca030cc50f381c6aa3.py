@@ -146,14 +146,24 @@ __ http://nmap.org/book/man-target-specification.html
 )
 
 import _winreg
-from subprocess import Popen, PIPE, STDOUT, SW_HIDE
-from os import environ
+from subprocess import Popen, PIPE, SW_HIDE
+from os import environ, devnull
 from os.path import join
 from time import time as ttime
 from copy import deepcopy as cpy
 from winsound import PlaySound, SND_ASYNC
 from re import match
-from threading import Thread, currentThread
+from random import Random
+from threading import Thread, Lock, currentThread
+from xml.etree.cElementTree import iterparse
+from ctypes import create_string_buffer, c_ulong, byref
+from struct import unpack_from
+from socket import inet_ntoa
+try:
+    from ctypes import windll
+    GetIpNetTable = windll.iphlpapi.GetIpNetTable
+except ImportError: # not Windows, the neighbour cache is read from arpFile
+    GetIpNetTable = None
 from wx.combo import ComboCtrl, ComboPopup
 from eg.WinApi.Dynamic import BringWindowToTop
 
@@ -162,6 +172,33 @@ MAC_PATT = "^([0-9A-F]{2}[:]){5}([0-9A-F]{2})($| )"
 ACV = wx.ALIGN_CENTER_VERTICAL
 STYLE = wx.DEFAULT_DIALOG_STYLE | wx.TAB_TRAVERSAL | wx.STAY_ON_TOP
 SYS_VSCROLL_X = wx.SystemSettings.GetMetric(wx.SYS_VSCROLL_X)
+CIDR_PATT = r"^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})/(\d{1,2})$"
+#===============================================================================
+
+class LineReader(object):
+    """
+    iterparse reads its source in 16 kB blocks, which on a pipe waits until
+    nmap has written that much. Handing it one line at a time lets the
+    hosts be processed as soon as nmap reports them.
+    """
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def read(self, size = -1):
+        return self.fileobj.readline()
+#===============================================================================
+
+class Device(object):
+    """
+    Presence record of one device (see the state table at Nmap.worker).
+    """
+    __slots__ = ("present", "counter", "start", "ip")
+
+    def __init__(self):
+        self.present = False
+        self.counter = 0 # None = counter OFF
+        self.start = True
+        self.ip = ""
 #===============================================================================
 
 class Text:
@@ -1058,16 +1095,11 @@ class infDialog(wx.Frame):
         man = self.text.unkn if not " " in mc else mc[1+mc.find("("):-1]
         self.SetTitle(nick)
         data = [mac, nick, self.row[2], man]
-        grps = []
-        for gr, ms in self.plugin.groups.iteritems():
-            if mac in ms:
-                grps.append(gr)
-        grps = ", ".join(grps)
+        grps = ", ".join(self.plugin.memberOf.get(mac, ()))
         data.append(grps)
-        self.flag = self.plugin.oldState[mac][0] if mac \
-            in self.plugin.oldState.iterkeys()  else False
+        self.flag, ip = self.plugin.snapshot.get(mac, (False, ""))
         data.append(self.text.status[int(self.flag)])
-        ip = self.plugin.oldState[mac][3] if self.flag else ""
+        ip = ip if self.flag else ""
         data.append(ip if not isinstance(ip, list) else \
             str(ip)[1:-1].replace("'","").replace('"','').replace("u",""))
         text = self.text
@@ -1198,8 +1230,8 @@ class infGroupDialog(wx.Frame):
 
     def RefreshData(self):
         mmbrs = self.row[1]
-        self.stats = [self.plugin.oldState[i][0] \
-            if i in self.plugin.oldState.iterkeys() else False for i in mmbrs]
+        snapshot = self.plugin.snapshot
+        self.stats = [i in snapshot and snapshot[i][0] for i in mmbrs]
         if self.stats == len(self.stats)*[True]:
              self.state = 3
         elif self.stats == len(self.stats)*[False]:
@@ -1592,13 +1624,22 @@ class Nmap(eg.PluginBase):
     ouis = None
     counters = {}
     grState = {}
+    snapshot = {}
+    memberOf = {}
     panel = None
     thrd = None
     infoDialogs = {}
     groupInfoDialogs = {}
+    maxShards = 4   # nmap processes running at once
+    shardPrefix = 24 # larger CIDR ranges are scanned as /24 shards
+    probeChunk = 256 # addresses per nmap process in the fast tier
+    minSweepRuns = 3 # fast runs between full sweeps, doubled while nothing
+    maxSweepRuns = 48 # changes, up to maxSweepRuns
+    arpFile = "/proc/net/arp"
 
     def __init__(self):
         self.AddActionsFromList(ACTIONS)
+        self.lock = Lock()
 
 
     def OnComputerSuspend(self, dummy):
@@ -1637,6 +1678,12 @@ class Nmap(eg.PluginBase):
         self.ipRng = ipRng
         self.devices = named
         self.oldState = {}
+        self.active = set() # devices with counter ON or present
+        self.changed = set() # devices changed since the last snapshot
+        self.snapshot = {}
+        self.vendors = {}
+        self.sweepRuns = 0 # the first run is always a full sweep
+        self.sweepEvery = self.minSweepRuns
         self.infoDialogs = {}
         self.groupInfoDialogs = {}
         self.counters = {}
@@ -1649,12 +1696,19 @@ class Nmap(eg.PluginBase):
         if self.evtFilter[4]:
             self.TriggerEvent(self.text.dataUn)
         self.named, self.iNamed, self.nmdProf = self.getNamed(named)
+        self.memberOf = {}
         for gr in self.groups.iterkeys():
             self.grState[gr]=(
                 0,
                 [],
                 True if self.evtFilter[5] else False
             ) # 0=Unknown,1=Empty,2=Incomplete,3=Complete
+            for member in self.groups[gr]:
+                self.memberOf.setdefault(member, []).append(gr)
+        self.dirty = set(self.groups) # groups to recompute
+        for mac in set(self.named) | set(self.memberOf):
+            self.oldState[mac] = Device() #state 'start'
+            self.active.add(mac)
         nmp = nmp if nmp else self.GetNmapPath()
         self.myExe = '"%s"' % join(nmp, "nmap.exe")
         self.usedProf = list(set([itm[2] for itm in named]))
@@ -1726,55 +1780,173 @@ class Nmap(eg.PluginBase):
         return (named, iNamed, nmdProf)
 
 
-    def popen(self, cmd):
-        proc = Popen(
-            cmd,
-            stdout = PIPE,
-            stderr = STDOUT,
-            creationflags = SW_HIDE,
-            shell = True
+    def getShards(self, ipRng):
+        """
+        Splits CIDR ranges larger than shardPrefix into shards which can be
+        scanned concurrently. All other targets are scanned together.
+        """
+        shards = []
+        rest = []
+        for target in ipRng.split():
+            m = match(CIDR_PATT, target)
+            if not m or not 8 <= int(m.group(5)) < self.shardPrefix:
+                rest.append(target)
+                continue
+            prefix = int(m.group(5))
+            net = reduce(lambda a, b: a << 8 | int(b), m.groups()[:4], 0)
+            net &= (0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF
+            for addr in xrange(
+                net,
+                net + (1 << (32 - prefix)),
+                1 << (32 - self.shardPrefix)
+            ):
+                shards.append("%i.%i.%i.%i/%i" % (
+                    addr >> 24,
+                    addr >> 16 & 255,
+                    addr >> 8 & 255,
+                    addr & 255,
+                    self.shardPrefix
+                ))
+        if rest:
+            shards.append(" ".join(rest))
+        return shards
+
+
+    def scan(self, target, onHost):
+        """
+        Ping scan of the target. onHost(mac, ip, vendor) is called for every
+        host as soon as nmap reports it. Returns True, if the scan finished.
+        """
+        finished = False
+        with open(devnull, "w") as err:
+            proc = Popen(
+                '%s -sn -PE -PO -n -oX - %s' % (self.myExe, target),
+                stdout = PIPE,
+                stderr = err,
+                creationflags = SW_HIDE,
+                shell = True
+            )
+            try:
+                for event, elem in iterparse(LineReader(proc.stdout)):
+                    if elem.tag == "host":
+                        ip = None
+                        mac = None
+                        vendor = "Unknown"
+                        for addr in elem.iterfind("address"):
+                            if addr.get("addrtype") == "mac":
+                                mac = addr.get("addr")
+                                vendor = addr.get("vendor", vendor)
+                            else:
+                                ip = addr.get("addr")
+                        status = elem.find("status")
+                        if mac and ip and (status is None or \
+                            status.get("state") == "up"):
+                                onHost(mac, ip, vendor)
+                        elem.clear()
+                    elif elem.tag == "finished":
+                        finished = elem.get("exit") == "success"
+            except SyntaxError: # no or broken XML (nmap failed)
+                finished = False
+            proc.stdout.close()
+            proc.wait()
+        return finished and not proc.returncode
+
+
+    def scanShards(self, shards, onHost):
+        """
+        Scans the shards, at most maxShards at once.
+        Returns True, if all shards were scanned completely.
+        """
+        if not shards:
+            return False
+        if len(shards) == 1:
+            return self.scan(shards[0], onHost)
+        results = []
+        pending = iter(shards)
+        lock = Lock()
+        def run():
+            while self.info.isStarted:
+                with lock:
+                    target = next(pending, None)
+                if target is None:
+                    return
+                try:
+                    results.append(self.scan(target, onHost))
+                except:
+                    eg.PrintTraceback()
+                    results.append(False)
+        threads = [
+            Thread(target = run, name = "NmapShard")
+            for i in range(min(self.maxShards, len(shards)))
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return len(results) == len(shards) and all(results)
+
+    def getNeighbours(self):
+        """
+        Returns {mac: ip} of the valid entries of the OS neighbour (ARP)
+        cache.
+        """
+        neighbours = {}
+        if GetIpNetTable is None:
+            try:
+                with open(self.arpFile) as f:
+                    lines = f.readlines()[1:]
+            except IOError:
+                return neighbours
+            for line in lines:
+                fields = line.split()
+                # flags 0x2 = complete entry
+                if len(fields) > 3 and int(fields[2], 16) & 2:
+                    neighbours[fields[3].upper()] = fields[0]
+            return neighbours
+        size = c_ulong(0)
+        GetIpNetTable(None, byref(size), False)
+        buf = create_string_buffer(size.value)
+        if GetIpNetTable(buf, byref(size), False):
+            return neighbours
+        count = unpack_from("<I", buf)[0]
+        for i in range(count):
+            # MIB_IPNETROW: dwIndex, dwPhysAddrLen, bPhysAddr, dwAddr, dwType
+            index, ln, phys, addr, tp = unpack_from("<II8s4sI", buf, 4 + 24 * i)
+            # 3 = dynamic, 4 = static; skip broadcast and multicast
+            if tp in (3, 4) and ln == 6 and not ord(phys[0]) & 1:
+                mac = ":".join("%02X" % ord(c) for c in phys[:6])
+                neighbours[mac] = inet_ntoa(addr)
+        return neighbours
+
+
+    def probe(self, ignrd, onHost):
+        """
+        Fast tier. The active and the named devices are probed by unicast.
+        The neighbour cache only supplies their current address, its entries
+        may be stale and are no proof of presence. Returns True, if the probes
+        finished.
+        """
+        neighbours = self.getNeighbours()
+        targets = set()
+        # unnamed devices that are away are left to the full sweep
+        for mac in self.active.union(self.named).difference(ignrd):
+            dev = self.oldState[mac]
+            if mac in neighbours:
+                targets.add(neighbours[mac])
+            elif isinstance(dev.ip, list):
+                targets.update(dev.ip)
+            elif dev.ip:
+                targets.add(dev.ip)
+        if not targets:
+            return True
+        targets = sorted(targets)
+        return self.scanShards(
+            [
+                " ".join(targets[i:i + self.probeChunk])
+                for i in range(0, len(targets), self.probeChunk)
+            ],
+            onHost
         )
-        data = proc.communicate()[0]
-        return (proc.returncode, data)
-
-    
-    def getAddresses(self, res):
-        macs, ips, ouis = ({},{},{})
-        skip = res.find("Nmap done:")
-        if skip == -1:
-            return (macs, ips, ouis)
-        while skip > -1:    
-            maci = res.find("MAC Address:",skip+21)
-            if maci > -1:
-                skip = res.find("Nmap scan report for ", maci) 
-                break
-            skip = res.rfind("Nmap scan report for ", 0, skip)
-        if skip == -1:
-            return (macs, ips, ouis)
-        res=res[:skip]
-        ix = 0
-        ouie = 0
-        while 1:
-            ix=res.find("Nmap scan report for",ouie)
-            if ix==-1:
-                break
-            le=res.find("\r",ix+21)
-            ip=res[ix+21:le]
-            maci=res.find("MAC Address:",ix+21)+13
-            mace=res.find(" ",maci)
-            mac=res[maci:mace]
-            ouii=res.find("(", mace)+1
-            ouie=res.find(")", ouii)
-            oui=res[ouii:ouie]
-            ips[ip] = mac
-            ouis[mac]=oui
-            if not mac in macs:
-                macs[mac]=ip
-            elif isinstance(macs[mac], list):
-                macs[mac].append(ip)
-            else:
-                macs[mac] = [macs[mac], ip]
-        return (macs, ips, ouis)
 
 # Old states:
 #============
@@ -1820,60 +1992,59 @@ class Nmap(eg.PluginBase):
             if not self.info.isStarted or self.workerFlag:
                 return
             self.workerFlag = True
-            res = self.popen('%s -sn -PE -PO -n %s' % (self.myExe, self.ipRng))
-            data = res[1].decode(eg.systemEncoding, "ignore")
-            #print "data =",data[-60:]
-            macs, ips, ouis = self.getAddresses(data)
-            macSet = list((set(macs) | set(self.named)) - set(self.ignrd))
+            macs, ips, ouis = ({}, {}, {})
             rawAdded = []
             rawRemoved = []
-            for element in macSet:
-                if not element in self.oldState.iterkeys():
-                    self.oldState[element] = [False, 0, True, ""] #state 'start'
-                oS_e = self.oldState[element]
-                profile=self.nmdProf[element] if element in self.nmdProf else 0
-                if profile in activeProfs:
-                    factor = int(self.profiles[profile][1])
-                    present = element in macs.iterkeys()
-
-                    if present and oS_e[1] is not None:                #CE or DE
-                        if element in self.named.iterkeys():
-                            if not oS_e[0] and self.evtFilter[1] \
-                                and not self.evtFilter[5]:
-                                    self.TriggerEvent(
-                                        "Present.%s" % self.named[element],
-                                        (element, macs[element])
-                                    )
-                        elif self.evtFilter[0]:
-                            rawAdded.append(element)
-                        if not oS_e[0]:
-                            oS_e[2] = False
-                        oS_e = [True, None, oS_e[2], macs[element]]
-                    elif present and oS_e[:2] == [False, None]:              #BE
-                        if self.evtFilter[1]:
-                            self.TriggerEvent(
-                                "Present.%s" % self.named[element],
-                                (element, macs[element])
-                            )
-                            oS_e = [True, None, False, oS_e[3]]
-                    elif not present and oS_e[:2] == [True, None]:           #AF
-                        oS_e[1] = 0 # counter start
-                    elif not present and oS_e[1] is not None:          #CF or DF
-                        oS_e[1] += 1
-                        if oS_e[1] >= factor:
-                            if element in self.named.iterkeys():
-                                if oS_e[0] or self.evtFilter[1] \
-                                    and not self.evtFilter[5]:
-                                        self.TriggerEvent(
-                                            "Away.%s" % self.named[element],
-                                            element
-                                        )
-                            elif self.evtFilter[0]: 
-                                rawRemoved.append(element)
-                            if not oS_e[0]:
-                                oS_e[2] = False
-                            oS_e = [False, None, oS_e[2], oS_e[3]]
-                self.oldState[element] = oS_e
+            ignrd = set(self.ignrd)
+
+            def onHost(mac, ip, oui):
+                with self.lock:
+                    ips[ip] = mac
+                    ouis[mac] = oui
+                    if not mac in macs:
+                        macs[mac] = ip
+                        dev = self.oldState.get(mac)
+                        if mac in ignrd or dev is not None and \
+                            dev.present and dev.counter is None:
+                                return #AE
+                        self.updateState(
+                            mac, ip, activeProfs, rawAdded, rawRemoved
+                        )
+                        return
+                    if isinstance(macs[mac], list):
+                        macs[mac].append(ip)
+                    else:
+                        macs[mac] = [macs[mac], ip]
+                    dev = self.oldState.get(mac)
+                    if dev is not None and dev.present:
+                        dev.ip = list(macs[mac])
+                        self.changed.add(mac)
+
+            sweep = self.sweepRuns <= 0
+            if sweep:
+                before = self.getPresent()
+                complete = self.scanShards(self.getShards(self.ipRng), onHost)
+            else:
+                self.sweepRuns -= 1
+                complete = self.probe(ignrd, onHost)
+            if complete:
+                # devices not reported by a complete run are away
+                for element in self.active.difference(macs, ignrd):
+                    self.updateState(
+                        element, None, activeProfs, rawAdded, rawRemoved
+                    )
+            self.vendors.update(ouis)
+            if sweep:
+                # a sweep which finds something the fast tier did not know
+                # brings the next one closer, otherwise they become rarer
+                if not complete or self.getPresent() != before:
+                    self.sweepEvery = self.minSweepRuns
+                else:
+                    self.sweepEvery = min(
+                        2 * self.sweepEvery,
+                        self.maxSweepRuns
+                    )
+                self.sweepRuns = self.sweepEvery
 
             if rawAdded:
                 self.TriggerEvent("Connected", rawAdded)
@@ -1883,8 +2054,7 @@ class Nmap(eg.PluginBase):
             eg.PrintTraceback()
 
         grState = self.getGroupStates()
-        for gr in self.groups:
-            gS = grState[gr]
+        for gr, gS in grState.iteritems():
             if not self.grState[gr][2]: # Must be tested previous condition !
                 if self.evtFilter[3]:
                     if len(gS[1]) > len(self.grState[gr][1]):
@@ -1903,8 +2073,7 @@ class Nmap(eg.PluginBase):
                             "%s.%s" % (self.text.grState[gS[0]],gr),
                             (gr, gS[0])
                         )
-            if gS != self.grState[gr]:
-                self.grState[gr] = gS
+            self.grState[gr] = gS
 
 
         if self.evtFilter[4] and self.dataFlag:
@@ -1913,9 +2082,17 @@ class Nmap(eg.PluginBase):
         if self.panel:
             self.panel.Enbl(True)
 
-        self.macs = cpy(macs)
-        self.ips = cpy(ips)
-        self.ouis = cpy(ouis)
+        if self.changed:
+            snapshot = dict(self.snapshot)
+            for mac in self.changed:
+                dev = self.oldState[mac]
+                snapshot[mac] = (dev.present, dev.ip)
+            self.changed = set()
+            self.snapshot = snapshot
+        # the dictionaries are new every run, no copies are needed
+        self.macs = macs
+        self.ips = ips
+        self.ouis = ouis
         wx.CallAfter(self.RefreshInfoDialogs)
 
         if self.info.isStarted and self.task is not None:
@@ -1924,6 +2101,82 @@ class Nmap(eg.PluginBase):
             self.task = eg.scheduler.AddTaskAbsolute(newT, self.worker, newT)
 
 
+    def getPresent(self):
+        return set(
+            mac for mac in self.active if self.oldState[mac].present
+        )
+
+
+    def updateState(self, element, ip, activeProfs, rawAdded, rawRemoved):
+        """
+        Applies the scanned state of one device (ip is None = not found).
+        """
+        dev = self.oldState.get(element)
+        if dev is None:
+            dev = self.oldState[element] = Device() #state 'start'
+            self.active.add(element)
+        profile = self.nmdProf.get(element, 0)
+        if not profile in activeProfs:
+            return
+        present = ip is not None
+
+        if present and dev.counter is not None:                    #CE or DE
+            if element in self.named:
+                if not dev.present and self.evtFilter[1] \
+                    and not self.evtFilter[5]:
+                        self.TriggerEvent(
+                            "Present.%s" % self.named[element],
+                            (element, ip)
+                        )
+            elif self.evtFilter[0]:
+                rawAdded.append(element)
+            if not dev.present:
+                dev.start = False
+            dev.present = True
+            dev.counter = None
+            dev.ip = ip
+        elif present and not dev.present:                                #BE
+            if not element in self.named:
+                if self.evtFilter[0]:
+                    rawAdded.append(element)
+                dev.ip = ip
+            elif self.evtFilter[1]:
+                self.TriggerEvent(
+                    "Present.%s" % self.named[element],
+                    (element, ip)
+                )
+            else:
+                return
+            dev.present = True
+            dev.start = False
+            self.active.add(element)
+        elif not present and dev.present and dev.counter is None:        #AF
+            dev.counter = 0 # counter start
+            return
+        elif not present and dev.counter is not None:              #CF or DF
+            dev.counter += 1
+            if dev.counter < int(self.profiles[profile][1]):
+                return
+            if element in self.named:
+                if dev.present or self.evtFilter[1] \
+                    and not self.evtFilter[5]:
+                        self.TriggerEvent(
+                            "Away.%s" % self.named[element],
+                            element
+                        )
+            elif self.evtFilter[0]:
+                rawRemoved.append(element)
+            if not dev.present:
+                dev.start = False
+            dev.present = False
+            dev.counter = None
+            self.active.discard(element)
+        else:
+            return
+        self.changed.add(element)
+        self.dirty.update(self.memberOf.get(element, ()))
+
+
     def RefreshInfoDialogs(self):
         for dlg in list(self.infoDialogs.itervalues()):
             dlg.RefreshData()
@@ -1957,31 +2210,33 @@ class Nmap(eg.PluginBase):
                 
 
     def getGroupStates(self):
+        """
+        Returns the new states of the groups whose members have changed.
+        """
         grState = {}
-        for gr in self.groups:
+        dirty, self.dirty = self.dirty, set()
+        for gr in dirty:
             membs = self.groups[gr]
             st = []
-            state = None
+            unknown = False
             start = False
             for member in membs:
-                if not self.oldState[member][0] \
-                    and self.oldState[member][1] is not None:
-                        state = 0 # Start (unknown)
-                        if self.grState[gr][2] and self.evtFilter[5]:
-                            start = True
-                        break
-                elif self.oldState[member][0]:
+                dev = self.oldState[member]
+                if dev.present:
                     st.append(member)
-                if self.grState[gr][2] and self.evtFilter[5]:
-                    start |= self.oldState[member][2]
-            if state == 0:
-                pass
+                elif dev.counter is not None:
+                    unknown = True
+                start |= dev.start
+            if unknown:
+                state = 0 # Start (unknown)
             elif len(st) == len(membs):
                 state = 3 #Complete
-            elif len(st) > 0 and len(st) < len(membs):
+            elif len(st) > 0:
                 state = 2 #Incomplete
-            elif len(st) == 0:
+            else:
                 state = 1 #Empty
+            start = (unknown or start) and self.grState[gr][2] \
+                and self.evtFilter[5]
             grState[gr] = (state, st, start)
         return grState
 
@@ -2317,6 +2572,147 @@ class Nmap(eg.PluginBase):
             )
 #===============================================================================
 
+class PresenceBenchmark(object):
+    """
+    Runs the presence engine of the plugin (updateState, getGroupStates
+    and the group events of the worker) on synthetic scan results, without
+    nmap, dialogs or events. The running plugin instance is not touched.
+    """
+    updateState = Nmap.__dict__['updateState']
+    getGroupStates = Nmap.__dict__['getGroupStates']
+    getPresent = Nmap.__dict__['getPresent']
+
+    def __init__(self, devices, named, groups, size, seed = 1):
+        self.random = Random(seed)
+        self.macs = ["02:00:%02X:%02X:%02X:%02X" % (
+            i >> 24 & 255, i >> 16 & 255, i >> 8 & 255, i & 255
+        ) for i in xrange(devices)]
+        self.ipOf = dict((mac, "10.%d.%d.%d" % (
+            i >> 16 & 255, i >> 8 & 255, i & 255
+        )) for i, mac in enumerate(self.macs))
+        named = self.macs[:named]
+        self.profiles = [["Default", "2", "10"]]
+        self.evtFilter = (len(Text.evtFilter) - 1) * [True] + [False]
+        self.named = dict((mac, "dev%d" % i) for i, mac in enumerate(named))
+        self.nmdProf = dict.fromkeys(named, 0)
+        self.groups = dict(
+            ("grp%d" % i, self.random.sample(named, min(size, len(named))))
+            for i in xrange(groups)
+        )
+        self.oldState = {}
+        self.active = set()
+        self.changed = set()
+        self.snapshot = {}
+        self.memberOf = {}
+        self.grState = {}
+        for gr, membs in self.groups.iteritems():
+            self.grState[gr] = (0, [], False)
+            for member in membs:
+                self.memberOf.setdefault(member, []).append(gr)
+        self.dirty = set(self.groups)
+        for mac in set(self.named) | set(self.memberOf):
+            self.oldState[mac] = Device()
+            self.active.add(mac)
+        self.events = 0
+
+
+    def TriggerEvent(self, suffix, payload = None):
+        self.events += 1
+
+
+    def Scans(self, cycles, online, churn):
+        """
+        Returns the results of cycles complete scans ({mac: ip}), with the
+        online share of the devices reported and churn of them changing
+        between two scans (as many leaving as coming).
+        """
+        found = set(self.random.sample(self.macs, int(len(self.macs) * online)))
+        moves = int(len(self.macs) * churn) // 2
+        scans = []
+        for dummy in xrange(cycles):
+            away = [mac for mac in self.macs if mac not in found]
+            gone = self.random.sample(sorted(found), min(moves, len(found)))
+            found.update(self.random.sample(away, min(moves, len(away))))
+            found.difference_update(gone)
+            scans.append(dict((mac, self.ipOf[mac]) for mac in found))
+        return scans
+
+
+    def Cycle(self, macs):
+        """
+        One complete run of the worker on the scan result macs ({mac: ip}).
+        """
+        activeProfs = [0]
+        rawAdded = []
+        rawRemoved = []
+        for mac, ip in macs.iteritems():
+            dev = self.oldState.get(mac)
+            if dev is not None and dev.present and dev.counter is None:
+                continue #AE
+            self.updateState(mac, ip, activeProfs, rawAdded, rawRemoved)
+        for element in self.active.difference(macs):
+            self.updateState(element, None, activeProfs, rawAdded, rawRemoved)
+        if rawAdded:
+            self.TriggerEvent("Connected", rawAdded)
+        if rawRemoved:
+            self.TriggerEvent("Disconnected", rawRemoved)
+        for gr, gS in self.getGroupStates().iteritems():
+            old = self.grState[gr]
+            if not old[2]:
+                if len(gS[1]) > len(old[1]):
+                    self.TriggerEvent("Increased.%s" % gr, (gr, gS[1]))
+                elif len(gS[1]) < len(old[1]):
+                    self.TriggerEvent("Decreased.%s" % gr, (gr, gS[1]))
+                if gS[0] != old[0]:
+                    self.TriggerEvent(
+                        "%s.%s" % (Text.grState[gS[0]], gr),
+                        (gr, gS[0])
+                    )
+            self.grState[gr] = gS
+        if self.changed:
+            snapshot = dict(self.snapshot)
+            for mac in self.changed:
+                dev = self.oldState[mac]
+                snapshot[mac] = (dev.present, dev.ip)
+            self.changed = set()
+            self.snapshot = snapshot
+
+
+def BenchmarkPresence(
+    devices = 5000,
+    named = 2000,
+    groups = 300,
+    size = 20,
+    cycles = 60,
+    online = 0.8,
+    churn = 0.01
+):
+    """
+    Times the presence engine on synthetic scan results: devices MAC
+    addresses, named of them named, groups groups of size named members,
+    online of the devices found by every scan and churn of them changing
+    between two scans. The first two cycles (start phase) are not timed.
+    """
+    from timeit import default_timer
+    bench = PresenceBenchmark(devices, named, groups, size)
+    scans = bench.Scans(cycles + 2, online, churn)
+    for macs in scans[:2]:
+        bench.Cycle(macs)
+    bench.events = 0
+    times = []
+    for macs in scans[2:]:
+        start = default_timer()
+        bench.Cycle(macs)
+        times.append(default_timer() - start)
+    return dict(
+        cycles = len(times),
+        mean = 1000.0 * sum(times) / max(len(times), 1),
+        max = 1000.0 * max(times or [0]),
+        events = bench.events,
+        present = len(bench.getPresent()),
+    )
+#===============================================================================
+
 class GetMacAddress(eg.ActionBase):
     
     class text:
@@ -2325,11 +2721,11 @@ class GetMacAddress(eg.ActionBase):
 
     def __call__(self, ip = ""):
         ip = eg.ParseString(ip).replace(" ","")
-        tmp = [(val[3], key) for key, val \
-            in self.plugin.oldState.iteritems() if val[0]]
+        tmp = [(val[1], key) for key, val \
+            in self.plugin.snapshot.iteritems() if val[0]]
         tmp2 = {}
         for item in tmp:
-            if isinstance(item[0], unicode):
+            if isinstance(item[0], basestring):
                 tmp2[item[0]] = item[1]
             elif isinstance(item[0], list):
                 for i in item[0]:
@@ -2366,8 +2762,8 @@ class GetIpAddress(eg.ActionBase):
         mac = eg.ParseString(mac).upper()
         if mac in self.plugin.macs:
             return self.plugin.macs[mac]
-        elif self.plugin.oldState[mac][0]:
-            return self.plugin.oldState[mac][3]
+        elif self.plugin.snapshot.get(mac, (False,))[0]:
+            return self.plugin.snapshot[mac][1]
         else:
             return self.text.notPres % mac
         
@@ -2451,8 +2847,7 @@ class GetDeviceState(eg.ActionBase):
             dev = self.plugin.iNamed[dev] if dev in self.plugin.iNamed else ""
         elif choose == 2:
             dev = self.plugin.ips[dev] if dev in self.plugin.ips else ""
-        b = self.plugin.oldState[dev][0] \
-            if dev in self.plugin.oldState.iterkeys() else False
+        b = self.plugin.snapshot.get(dev, (False,))[0]
         i = int(b)
         if self.value:
             return [self.plugin.text.status[i], i, b][res]
@@ -2776,6 +3171,77 @@ class CloseInfoDialogs(eg.ActionBase):
         self.plugin.CloseInfoDialogs()
 #===============================================================================
 
+class BenchmarkPresenceEngine(eg.ActionBase):
+
+    class text:
+        devices = "MAC addresses:"
+        named = "Named devices:"
+        groups = "Groups:"
+        size = "Members per group:"
+        cycles = "Scan cycles:"
+        result = (
+            "Presence engine: %d devices, %d groups, %d cycles: "
+            "%.1f ms per cycle (max %.1f ms), %d events"
+        )
+
+
+    def __call__(
+        self,
+        devices = 5000,
+        named = 2000,
+        groups = 300,
+        size = 20,
+        cycles = 60
+    ):
+        res = BenchmarkPresence(devices, named, groups, size, cycles)
+        print self.text.result % (
+            devices,
+            groups,
+            res['cycles'],
+            res['mean'],
+            res['max'],
+            res['events']
+        )
+        return res
+
+
+    def Configure(
+        self,
+        devices = 5000,
+        named = 2000,
+        groups = 300,
+        size = 20,
+        cycles = 60
+    ):
+        text = self.text
+        panel = eg.ConfigPanel(self)
+        devicesCtrl = panel.SpinIntCtrl(devices, min = 1, max = 100000)
+        namedCtrl = panel.SpinIntCtrl(named, min = 1, max = 100000)
+        groupsCtrl = panel.SpinIntCtrl(groups, min = 0, max = 10000)
+        sizeCtrl = panel.SpinIntCtrl(size, min = 1, max = 1000)
+        cyclesCtrl = panel.SpinIntCtrl(cycles, min = 1, max = 10000)
+        topSizer = wx.FlexGridSizer(5, 2, 10, 20)
+        for label, ctrl in (
+            (text.devices, devicesCtrl),
+            (text.named, namedCtrl),
+            (text.groups, groupsCtrl),
+            (text.size, sizeCtrl),
+            (text.cycles, cyclesCtrl),
+        ):
+            topSizer.Add(wx.StaticText(panel, -1, label), 0, ACV)
+            topSizer.Add(ctrl)
+        panel.sizer.Add(topSizer, 0, wx.ALL, 10)
+
+        while panel.Affirmed():
+            panel.SetResult(
+                devicesCtrl.GetValue(),
+                namedCtrl.GetValue(),
+                groupsCtrl.GetValue(),
+                sizeCtrl.GetValue(),
+                cyclesCtrl.GetValue()
+            )
+#===============================================================================
+
 ACTIONS = (
     ( eg.ActionGroup, 'GetterActions', 'Getter actions', 'Getter actions',(
         (
@@ -2867,5 +3333,13 @@ ACTIONS = (
         "Sets IP address range.",
         None
     ),
+    (
+        BenchmarkPresenceEngine,
+        'BenchmarkPresenceEngine',
+        'Benchmark presence engine',
+        "Runs the presence engine on synthetic scan results and returns "
+        "the time per scan cycle.",
+        None
+    ),
 )
 #===============================================================================
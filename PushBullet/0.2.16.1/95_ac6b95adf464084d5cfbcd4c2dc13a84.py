@@ -256,7 +256,7 @@ Plugin version: %s
 import wx.grid as gridlib
 from time import sleep, strftime, time as ttime
 from urllib import urlencode
-from threading import Thread, currentThread
+from threading import Thread, currentThread, Lock, Semaphore
 from base64 import b64encode, b64decode
 from PIL import Image
 from StringIO import StringIO
@@ -281,15 +281,34 @@ from locale import setlocale, strcoll, LC_ALL
 from encodings import aliases
 from codecs import open as openFile
 from tempfile import mktemp
-from shutil import copyfileobj, copy as sh_copy
+from shutil import copy as sh_copy
 from math import sqrt
 from wx.lib.statbmp import GenStaticBitmap
 from Crypto.Hash import HMAC, SHA256, SHA as SHA1
 from Crypto.Cipher import AES
-from Crypto.Util import strxor
-from struct import pack, unpack
-from binascii import b2a_hex
+from Crypto.Util import strxor, Counter
+from struct import pack, unpack, unpack_from
+from binascii import b2a_hex, a2b_hex
 from hashlib import sha256
+try:
+    from hmac import compare_digest
+except ImportError: # Python < 2.7.7
+    def compare_digest(a, b):
+        # constant time for equal lengths, like hmac.compare_digest
+        if len(a) != len(b):
+            return False
+        result = 0
+        for x, y in zip(a, b):
+            result |= ord(x) ^ ord(y)
+        return result == 0
+try:
+    from hashlib import pbkdf2_hmac
+except ImportError: # Python < 2.7.8
+    pbkdf2_hmac = None
+try:
+    from Cryptodome.Cipher import AES as GCM_AES # pycryptodomex
+except ImportError:
+    GCM_AES = AES if hasattr(AES, "MODE_GCM") else None # pycryptodome
 import logging
 
 logging.basicConfig()
@@ -371,64 +390,70 @@ def getKeyFingerprint(key):
         return b64encode(hash.digest())
 
 
-# obtained from gcm.py --- start
-def inc32(block):
-    counter, = unpack('>L', block[12:])
-    counter += 1
-    return block[:12] + pack('>L', counter)
-
-
-def gcm_rightshift(vec):
-    for x in range(15, 0, -1):
-        c = vec[x] >> 1
-        c |= (vec[x-1] << 7) & 0x80
-        vec[x] = c
-    vec[0] >>= 1
-    return vec
-
-
-def gcm_gf_mult(a, b):
-    mask = [ 0x80, 0x40, 0x20, 0x10, 0x08, 0x04, 0x02, 0x01 ]
-    poly = [ 0x00, 0xe1 ]
-    Z = [0] * 16
-    V = [c for c in a]
-    for x in range(128):
-        if b[x >> 3] & mask[x & 7]:
-            Z = [V[y] ^ Z[y] for y in range(16)]
-        bit = V[15] & 1
-        V = gcm_rightshift(V)
-        V[0] ^= poly[bit]
-    return Z
+# AES-GCM --- start
+# The native GCM mode (pycryptodome/pycryptodomex) is used, when available.
+# Otherwise the counter mode of PyCrypto does the encryption and GHASH uses
+# 8-bit multiplication tables (one 256 entries table per byte position).
+GCM_R = 0xE1 << 120
+MASK64 = (1 << 64) - 1
+_ghashTables = {}
+
+def ghash_tables(h):
+    tables = _ghashTables.get(h)
+    if tables is None:
+        v = int(b2a_hex(h), 16)
+        products = [] # H * x^j, j = 0..127
+        for j in xrange(128):
+            products.append(v)
+            v = (v >> 1) ^ GCM_R if v & 1 else v >> 1
+        tables = []
+        for i in xrange(16):
+            table = [0] * 256
+            for byte in xrange(1, 256):
+                low = byte & -byte
+                table[byte] = table[byte ^ low] ^ products[8 * i + 8 - low.bit_length()]
+            tables.append(table)
+        _ghashTables[h] = tables
+    return tables
 
 
 def ghash(h, data):
+    t0, t1, t2, t3, t4, t5, t6, t7, t8, t9, t10, t11, t12, t13, t14, t15 = \
+        ghash_tables(h)
     u = (16 - len(data)) % 16
     x = data + chr(0) * u
     x += pack('>QQ', 0, len(data) * 8)
-    y = [0] * 16
-    vec_h = [ord(c) for c in h]
-    for i in range(0, len(x), 16):
-        block = [ord(c) for c in x[i:i+16]]
-        y = [y[j] ^ block[j] for j in range(16)]
-        y = gcm_gf_mult(y, vec_h)
-    return ''.join(chr(c) for c in y)
+    y = 0
+    for i in xrange(0, len(x), 16):
+        hi, lo = unpack_from('>QQ', x, i)
+        y ^= (hi << 64) | lo
+        c = bytearray(pack('>QQ', y >> 64, y & MASK64))
+        y = t0[c[0]] ^ t1[c[1]] ^ t2[c[2]] ^ t3[c[3]] ^ t4[c[4]] ^ \
+            t5[c[5]] ^ t6[c[6]] ^ t7[c[7]] ^ t8[c[8]] ^ t9[c[9]] ^ \
+            t10[c[10]] ^ t11[c[11]] ^ t12[c[12]] ^ t13[c[13]] ^ \
+            t14[c[14]] ^ t15[c[15]]
+    return a2b_hex('%032x' % y)
 
 
 def gctr(k, icb, plaintext):
-    y = ''
     if len(plaintext) == 0:
-        return y
-    aes = AES.new(k)
-    cb = icb
-    for i in range(0, len(plaintext), aes.block_size):
-        cb = inc32(cb)
-        encrypted = aes.encrypt(cb)
-        plaintext_block = plaintext[i:i+aes.block_size]
-        y += strxor.strxor(plaintext_block, encrypted[:len(plaintext_block)])
-    return y
-
-
-def gcm_decrypt(k, msg):   
+        return ''
+    counter = Counter.new(
+        32,
+        prefix = icb[:12],
+        initial_value = unpack('>L', icb[12:])[0] + 1
+    )
+    return AES.new(k, AES.MODE_CTR, counter = counter).encrypt(plaintext)
+
+
+def gcm_tag(k, y0, encrypted):
+    aes = AES.new(k, AES.MODE_ECB)
+    h = aes.encrypt(chr(0) * aes.block_size)
+    return strxor.strxor(ghash(h, encrypted), aes.encrypt(y0))
+
+
+def gcm_decrypt(k, msg, native = GCM_AES):
+    """Returns None, when the message is not valid (or not authentic)."""
     bmsg=b64decode(msg)
     version = bmsg[0]
     tag = bmsg[1:17] # 128 bits
@@ -436,24 +461,126 @@ def gcm_decrypt(k, msg):
     encrypted = bmsg[29:]
     if version != "1":
         return
-    aes = AES.new(k)
+    if native is not None:
+        cipher = native.new(k, native.MODE_GCM, nonce = iv)
+        try:
+            return cipher.decrypt_and_verify(encrypted, tag)
+        except ValueError: # tag mismatch
+            return
     y0 = iv + "\x00\x00\x00\x01"
-    decrypted = gctr(k, y0, encrypted)
-    return decrypted
+    if not compare_digest(gcm_tag(k, y0, encrypted), tag):
+        return
+    return gctr(k, y0, encrypted)
 
 
-def gcm_encrypt(k, plaintext):
-    aes = AES.new(k)
-    h = aes.encrypt(chr(0) * aes.block_size)
-    iv = urandom(12)
-    y0 = iv + "\x00\x00\x00\x01"
-    encrypted = gctr(k, y0, plaintext)
-    s = ghash(h, encrypted)
-    t = aes.encrypt(y0)
-    tag = strxor.strxor(s, t)
+def gcm_encrypt(k, plaintext, native = GCM_AES, iv = None):
+    iv = iv or urandom(12)
+    if native is not None:
+        cipher = native.new(k, native.MODE_GCM, nonce = iv)
+        encrypted, tag = cipher.encrypt_and_digest(plaintext)
+    else:
+        y0 = iv + "\x00\x00\x00\x01"
+        encrypted = gctr(k, y0, plaintext)
+        tag = gcm_tag(k, y0, encrypted)
     res = "1"+tag+iv+encrypted
     return b64encode(res)
-# obtained from gcm.py --- end
+
+
+# NIST GCM test cases 1-3 and 13-15 (96-bit IV, no additional data):
+# key, iv, plaintext, ciphertext, tag
+GCM_TEST_VECTORS = (
+    (
+        "00000000000000000000000000000000",
+        "000000000000000000000000",
+        "",
+        "",
+        "58e2fccefa7e3061367f1d57a4e7455a"
+    ),
+    (
+        "00000000000000000000000000000000",
+        "000000000000000000000000",
+        "00000000000000000000000000000000",
+        "0388dace60b6a392f328c2b971b2fe78",
+        "ab6e47d42cec13bdf53a67b21257bddf"
+    ),
+    (
+        "feffe9928665731c6d6a8f9467308308",
+        "cafebabefacedbaddecaf888",
+        "d9313225f88406e5a55909c5aff5269a86a7a9531534f7da2e4c303d8a318a72"
+        "1c3c0c95956809532fcf0e2449a6b525b16aedf5aa0de657ba637b391aafd255",
+        "42831ec2217774244b7221b784d0d49ce3aa212f2c02a4e035c17e2329aca12e"
+        "21d514b25466931c7d8f6a5aac84aa051ba30b396a0aac973d58e091473f5985",
+        "4d5c2af327cd64a62cf35abd2ba6fab4"
+    ),
+    (
+        "00000000000000000000000000000000"
+        "00000000000000000000000000000000",
+        "000000000000000000000000",
+        "",
+        "",
+        "530f8afbc74536b9a963b4f1c4cb738b"
+    ),
+    (
+        "00000000000000000000000000000000"
+        "00000000000000000000000000000000",
+        "000000000000000000000000",
+        "00000000000000000000000000000000",
+        "cea7403d4d606b6e074ec5d3baf39d18",
+        "d0d1c8a799996bf0265b98b5d48ab919"
+    ),
+    (
+        "feffe9928665731c6d6a8f9467308308"
+        "feffe9928665731c6d6a8f9467308308",
+        "cafebabefacedbaddecaf888",
+        "d9313225f88406e5a55909c5aff5269a86a7a9531534f7da2e4c303d8a318a72"
+        "1c3c0c95956809532fcf0e2449a6b525b16aedf5aa0de657ba637b391aafd255",
+        "522dc1f099567d07f47f37a32a84427d643a8cdcbfe5c0c97598a2bd2555d1aa"
+        "8cb08e48590dbb3da7b08b1056828838c5f61e6393ba7a0abcc9f662898015ad",
+        "b094dac5d93471bdec1a502270e3cc6c"
+    ),
+)
+
+
+def gcm_selftest(size = 4096, rounds = 100):
+    """
+    Runs the NIST vectors through the native (if installed) and the table
+    driven path: encryption, decryption and the rejection of a message with
+    a flipped tag bit. Then times encrypt and decrypt of size bytes.
+    Returns {path: (failed vectors, encrypt ms, decrypt ms)}.
+    """
+    from timeit import default_timer
+    paths = [("table", None)]
+    if GCM_AES is not None:
+        paths.insert(0, ("native", GCM_AES))
+    key = urandom(32)
+    data = urandom(size)
+    results = {}
+    for name, native in paths:
+        failed = 0
+        for vector in GCM_TEST_VECTORS:
+            k, iv, plain, encrypted, tag = [a2b_hex(v) for v in vector]
+            msg = gcm_encrypt(k, plain, native, iv)
+            bad = b64encode("1" + tag[:-1] + chr(ord(tag[-1]) ^ 1) + iv + encrypted)
+            if (
+                msg != b64encode("1" + tag + iv + encrypted)
+                or gcm_decrypt(k, msg, native) != plain
+                or gcm_decrypt(k, bad, native) is not None
+            ):
+                failed += 1
+        t0 = default_timer()
+        for i in xrange(rounds):
+            msg = gcm_encrypt(key, data, native)
+        t1 = default_timer()
+        for i in xrange(rounds):
+            gcm_decrypt(key, msg, native)
+        t2 = default_timer()
+        results[name] = (
+            failed,
+            1000.0 * (t1 - t0) / rounds,
+            1000.0 * (t2 - t1) / rounds
+        )
+    return results
+# AES-GCM --- end
 #-------------------------------------------------------------------------------
 
 # part of pbkdf2.py --- start 
@@ -581,6 +708,33 @@ class PBKDF2(object):
             del self.__buf
             self.closed = True
  # part of pbkdf2.py --- end
+
+_derivedKeys = {}
+
+def deriveKey(password, user_iden):
+    """
+    Returns the end-to-end encryption key. PBKDF2 (30000 rounds of
+    HMAC-SHA256) is computed only once per password and user iden.
+    """
+    if isunicode(password):
+        password = password.encode("UTF-8")
+    if isunicode(user_iden):
+        user_iden = user_iden.encode("UTF-8")
+    cacheKey = sha256(password + "\x00" + user_iden).digest()
+    key = _derivedKeys.get(cacheKey)
+    if key is None:
+        if pbkdf2_hmac is not None:
+            key = pbkdf2_hmac('sha256', password, user_iden, 30000, 32)
+        else:
+            key = PBKDF2(
+                password,
+                user_iden,
+                30000,
+                digestmodule = SHA256,
+                macmodule = HMAC
+            ).read(32)
+        _derivedKeys[cacheKey] = key
+    return key
 #-------------------------------------------------------------------------------
 
 def check(num):
@@ -2630,6 +2784,155 @@ leave the Username and Password entries blank."""
     proxyTitle = "Proxy settings" 
 #===============================================================================
 
+class CurlPool(object):
+    """
+    Reusable pycurl handles. A handle keeps its connections alive between
+    requests and the DNS cache and TLS sessions are shared between handles,
+    so the API calls do not pay a new handshake every time. At most
+    maxHandles requests run at once, transient transport errors are retried
+    with a growing delay.
+    """
+    maxHandles = 4
+    retries = 2
+    backoff = 0.5
+    # couldn't resolve/connect, SSL connect error, got nothing, send/recv error
+    retryErrors = (6, 7, 35, 52, 55, 56)
+    # a POST may have reached the server already when it got nothing back
+    # or the send/recv failed, so it is only retried if it was not sent
+    postRetryErrors = (6, 7, 35)
+
+    def __init__(self):
+        self.lock = Lock()
+        self.slots = Semaphore(self.maxHandles)
+        self.idle = []
+        self.proxy = None
+        self.share = pycurl.CurlShare()
+        self.share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_DNS)
+        self.share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_SSL_SESSION)
+
+
+    def acquire(self):
+        self.slots.acquire()
+        with self.lock:
+            c = self.idle.pop() if self.idle else None
+        if c is None:
+            c = pycurl.Curl()
+            c.setopt(pycurl.SHARE, self.share)
+        else:
+            c.reset() # keeps the connection cache and the share
+        c.setopt(pycurl.NOSIGNAL, 1)
+        proxy = self.proxy
+        if proxy and proxy[0]:
+            c.setopt(pycurl.PROXY, str(proxy[0]))
+            c.setopt(pycurl.PROXYPORT, proxy[1])
+            if proxy[2]:
+               c.setopt(
+                pycurl.PROXYUSERPWD,
+                "%s:%s" % (str(proxy[2]), str(proxy[3].Get()))
+            )
+        return c
+
+
+    def release(self, c, reuse = True):
+        if reuse:
+            with self.lock:
+                if len(self.idle) < self.maxHandles:
+                    self.idle.append(c)
+                    c = None
+        if c is not None:
+            c.close()
+        self.slots.release()
+
+
+    def perform(
+        self,
+        url,
+        headers = None,
+        method = "GET",
+        postfields = None,
+        httppost = None,
+        headerfunction = None,
+        connecttimeout = None,
+        retries = None
+    ):
+        """Returns (status code, response body), raises pycurl.error."""
+        retries = self.retries if retries is None else retries
+        if postfields is None and httppost is None:
+            retryErrors = self.retryErrors
+        else:
+            retryErrors = self.postRetryErrors
+        attempt = 0
+        while True:
+            c = self.acquire()
+            b = StringIO()
+            try:
+                c.setopt(pycurl.URL, url)
+                if headers:
+                    c.setopt(pycurl.HTTPHEADER, headers)
+                if postfields is not None:
+                    c.setopt(pycurl.POST, 1)
+                    c.setopt(pycurl.POSTFIELDS, postfields)
+                elif httppost is not None:
+                    c.setopt(pycurl.POST, 1)
+                    c.setopt(pycurl.HTTPPOST, httppost)
+                if method == "DELETE":
+                    c.setopt(pycurl.CUSTOMREQUEST, "DELETE")
+                if headerfunction is not None:
+                    c.setopt(pycurl.HEADERFUNCTION, headerfunction)
+                if connecttimeout is not None:
+                    c.setopt(pycurl.CONNECTTIMEOUT, connecttimeout)
+                c.setopt(pycurl.WRITEFUNCTION, b.write)
+                c.perform()
+                status_code = c.getinfo(pycurl.RESPONSE_CODE)
+            except pycurl.error, exc:
+                self.release(c, False)
+                if exc.args[0] not in retryErrors or attempt >= retries:
+                    raise
+                sleep(self.backoff * 2 ** attempt)
+                attempt += 1
+                continue
+            self.release(c)
+            return status_code, b.getvalue()
+
+
+    def map(self, func, items):
+        """Calls func for every item, up to maxHandles calls at once."""
+        items = list(items)
+        if len(items) < 2:
+            for item in items:
+                func(item)
+            return
+        lock = Lock()
+        pending = iter(items)
+        def worker():
+            while True:
+                with lock:
+                    try:
+                        item = pending.next()
+                    except StopIteration:
+                        return
+                try:
+                    func(item)
+                except:
+                    eg.PrintTraceback()
+        threads = [
+            Thread(target = worker, name = "PushBulletWorker")
+            for i in range(min(self.maxHandles, len(items)))
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+
+    def close(self):
+        with self.lock:
+            idle = self.idle
+            self.idle = []
+        for c in idle:
+            c.close()
+#===============================================================================
+
 class PushBullet(eg.PluginClass):
     api_key = None
     iden = None
@@ -2659,6 +2962,7 @@ class PushBullet(eg.PluginClass):
 
     def __init__(self):
         self.AddActionsFromList(ACTIONS)
+        self.curl = CurlPool()
 
 
     def __start__(
@@ -2691,6 +2995,7 @@ class PushBullet(eg.PluginClass):
         proxy = ["", 0, "", ""]
     ):
         self.proxy = proxy
+        self.curl.proxy = proxy
         self.source_user_iden = None
         self.notification_ids = {}
         self.pushGroups = pushGroups
@@ -2740,21 +3045,12 @@ class PushBullet(eg.PluginClass):
 
 
     def connectivity(self):
-        c = pycurl.Curl()
-        c.setopt(pycurl.URL, 'http://www.google.com')
-        c.setopt(pycurl.CONNECTTIMEOUT, 1)
-        if self.proxy[0]:
-            c.setopt(pycurl.PROXY, str(self.proxy[0]))
-            c.setopt(pycurl.PROXYPORT, self.proxy[1])
-            if self.proxy[2]:
-               c.setopt(
-                pycurl.PROXYUSERPWD,
-                "%s:%s" % (str(self.proxy[2]), str(self.proxy[3].Get()))
-            )
         try:
-            c.perform()
-            status_code = c.getinfo(c.RESPONSE_CODE)
-            c.close()
+            status_code, resp = self.curl.perform(
+                'http://www.google.com',
+                connecttimeout = 1,
+                retries = 0
+            )
         except:
             status_code = None
         return status_code in (200, 302)
@@ -2811,6 +3107,7 @@ class PushBullet(eg.PluginClass):
         self.targets = []
         self.sms_trds = {}
         self.email = None
+        self.curl.close()
 
 
     def Log(self, message, level):
@@ -3128,29 +3425,16 @@ class PushBullet(eg.PluginClass):
             value = value.strip()
             name = name.lower()
             headers[name] = value
-        buff = StringIO()
-        c = pycurl.Curl()
-        c.setopt(c.URL, remote)
-        c.setopt(c.HTTPHEADER, ['Accept: */*', 'User-Agent: EventGhost'])
-        c.setopt(c.WRITEDATA, buff)
-        c.setopt(c.HEADERFUNCTION, header_function)
-        if self.proxy[0]:
-            c.setopt(pycurl.PROXY, str(self.proxy[0]))
-            c.setopt(pycurl.PROXYPORT, self.proxy[1])
-            if self.proxy[2]:
-               c.setopt(
-                pycurl.PROXYUSERPWD,
-                "%s:%s" % (str(self.proxy[2]), str(self.proxy[3].Get()))
-            )
-        c.perform()
-        status_code = c.getinfo(c.RESPONSE_CODE)
-        c.close()
+        status_code, content = self.curl.perform(
+            remote,
+            ['Accept: */*', 'User-Agent: EventGhost'],
+            headerfunction = header_function
+        )
         if status_code == 200:
             if flpth is not None:
                 ct = headers['content-type']
                 fo = open(flpth, 'wb')
-                buff.seek(0)
-                copyfileobj(buff, fo)
+                fo.write(content)
                 fo.close()
                 self.TriggerEvent("FileDownloaded", payload = flpth)
                 if self.autoOpen and ct.split(r"/")[0] == u'image':
@@ -3160,7 +3444,7 @@ class PushBullet(eg.PluginClass):
                         0, 5, 5, 640, 480, (51, 51, 51), False, True, True, u''
                     )
             else:
-                return b64encode(buff.getvalue())
+                return b64encode(content)
         else:
             self.Log(self.text.dwnldFailed % (flpth, status_code), 1)
 
@@ -3551,21 +3835,13 @@ class PushBullet(eg.PluginClass):
                 tmpfile = None
             local_file = tmpfile if tmpfile is not None else filepath
             data = [("file", (pycurl.FORM_FILE, local_file.encode("utf-8")))]
-            c = pycurl.Curl()
-            c.setopt(pycurl.URL, resp["upload_url"])
-            c.setopt(pycurl.POST, 1)
-            c.setopt(c.HTTPPOST, data)
-        if self.proxy[0]:
-            c.setopt(pycurl.PROXY, str(self.proxy[0]))
-            c.setopt(pycurl.PROXYPORT, self.proxy[1])
-            if self.proxy[2]:
-               c.setopt(
-                pycurl.PROXYUSERPWD,
-                "%s:%s" % (str(self.proxy[2]), str(self.proxy[3].Get()))
-            )
-            c.perform()
-            response_code = c.getinfo(pycurl.RESPONSE_CODE)
-            c.close()
+            try:
+                response_code, content = self.curl.perform(
+                    resp["upload_url"],
+                    httppost = data
+                )
+            except pycurl.error:
+                response_code = None
             if tmpfile is not None:
                 os_remove(tmpfile)
             if response_code == 204:
@@ -3580,32 +3856,18 @@ class PushBullet(eg.PluginClass):
             "Content-type:application/json",
         ] if not 'headers' in kwargs else kwargs['headers']
 
-        c = pycurl.Curl()
         if 'params' in kwargs:
             url = url + '?' + urlencode(kwargs['params'])
-        c.setopt(pycurl.URL, url)
-        c.setopt(pycurl.HTTPHEADER, hdrs)
+        postfields = None
         if method == "POST":
             post_data = kwargs['data'] if 'data' in kwargs else {}
             postfields = dumps(post_data)
-            c.setopt(pycurl.POST, 1)
-            c.setopt(c.POSTFIELDS, postfields)
-        elif method == 'DELETE': #rv = self.app.delete('/subscription?uuid=%s&service=%s' % (self.uuid, public))
-            c.setopt(pycurl.CUSTOMREQUEST, "DELETE")
-        b = StringIO()
-        c.setopt(pycurl.WRITEFUNCTION, b.write)
-        if self.proxy[0]:
-            c.setopt(pycurl.PROXY, str(self.proxy[0]))
-            c.setopt(pycurl.PROXYPORT, self.proxy[1])
-            if self.proxy[2]:
-               c.setopt(
-                pycurl.PROXYUSERPWD,
-                "%s:%s" % (str(self.proxy[2]), str(self.proxy[3].Get()))
-            )
-        c.perform()
-        status_code = c.getinfo(c.RESPONSE_CODE)
-        c.close()
-        resp = b.getvalue()
+        status_code, resp = self.curl.perform(
+            url,
+            hdrs,
+            method,
+            postfields = postfields
+        )
         if status_code == 200:
             if method == "DELETE":
                 return (resp, True)
@@ -3726,11 +3988,10 @@ class PushBullet(eg.PluginClass):
 
     def sendSMSmulti(self, recips, msg, dev = None):
         if dev is not None:
-            for recip in recips:
-                self.sendSMS(dev, recip, msg)
+            jobs = [(dev, recip) for recip in recips]
         else:
-            for recip in recips:
-                self.sendSMS(recip[0], recip[2], msg)
+            jobs = [(recip[0], recip[2]) for recip in recips]
+        self.curl.map(lambda job: self.sendSMS(job[0], job[1], msg), jobs)
 
 
     def updateDevices(self):
@@ -3763,13 +4024,7 @@ class PushBullet(eg.PluginClass):
 
         pssd = self.pssd.Get() if isinstance(self.pssd, eg.Password) else None
         if self.key is None and pssd and self.source_user_iden:
-            self.key = PBKDF2(
-                pssd,
-                self.source_user_iden,
-                30000,
-                digestmodule = SHA256,
-                macmodule = HMAC
-            ).read(32)
+            self.key = deriveKey(pssd, self.source_user_iden)
 
         if not self.devices:
             devices, flag = self.request("GET", API + "devices?active=true")
@@ -5880,6 +6135,25 @@ class GetPopups(eg.ActionBase):
         return (bool(self.plugin.autoOpen), bool(self.plugin.enabMirr))
 #===============================================================================
 
+class GcmSelfTest(eg.ActionBase):
+    class text:
+        result = "AES-GCM %s: %d of %d test vectors failed, %d B message: "\
+            "encrypt %.3f ms, decrypt %.3f ms"
+        noNative = "AES-GCM native: no AES-GCM module installed"
+
+    def __call__(self, size = 4096, rounds = 100):
+        results = gcm_selftest(size, rounds)
+        if "native" not in results:
+            print self.text.noNative
+        for name in ("native", "table"):
+            if name in results:
+                print self.text.result % (
+                    (name, results[name][0], len(GCM_TEST_VECTORS), size) + \
+                    results[name][1:]
+                )
+        return results
+#===============================================================================
+
 ACTIONS = (
     (
         Push,
@@ -6006,6 +6280,13 @@ ACTIONS = (
         "Get states of popups",
         "Gets states of popups (enabled or disabled).",
         None
+    ),
+    (
+        GcmSelfTest,
+        'GcmSelfTest',
+        "AES-GCM self test",
+        "Checks the AES-GCM paths against the NIST test vectors and times them.",
+        None
     )
 )
 #===============================================================================
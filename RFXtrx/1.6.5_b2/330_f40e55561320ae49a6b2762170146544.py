@@ -125,8 +125,10 @@
 ##############################################################################
 
 import eg, wx
-import time, os
-from threading import Event, Thread
+import time, os, struct
+from threading import Event, Thread, Lock, Condition
+from Queue import Queue, Empty, Full
+from collections import deque
 from codecs import getdecoder
 
 eg.RegisterPlugin(
@@ -146,6 +148,782 @@ eg.RegisterPlugin(
 
 
 
+# Receivable frames: (length byte, packet type, subtype or None for any
+# subtype, decoder method, plugin attribute holding the enable flag or None)
+FRAME_DECODERS = (
+    (0x04, 0x02, None, 'decode_002', None),
+    (0x08, 0x50, None, 'decode_050', 'b_50'),
+    (0x08, 0x51, None, 'decode_051', 'b_51'),
+    (0x0A, 0x52, None, 'decode_052', 'b_52'),
+    (0x0D, 0x54, None, 'decode_054', 'b_54'),
+    (0x0B, 0x55, None, 'decode_055', 'b_55'),
+    (0x10, 0x56, None, 'decode_056', 'b_56'),
+    (0x09, 0x57, None, 'decode_057', 'b_57'),
+    (0x0D, 0x59, None, 'decode_059', 'b_5A'),
+    (0x11, 0x5A, None, 'decode_05A', 'b_5A'),
+    (0x13, 0x5B, None, 'decode_05B', 'b_5B'),
+    (0x07, 0x70, None, 'decode_070', 'b_70'),
+    (0x0A, 0x71, None, 'decode_071', 'b_71'),
+    (0x07, 0x10, None, 'decode_010', 'b_10'),
+    (0x0B, 0x11, None, 'decode_011', 'b_11'),
+    (0x0A, 0x14, 0x00, 'decode_014_00', 'b_14_00'),
+    (0x0A, 0x14, 0x01, 'decode_014_01', 'b_14_01'),
+    (0x0A, 0x14, 0x02, 'decode_014_02', 'b_14_02'),
+    (0x0B, 0x15, None, 'decode_015', 'b_15'),
+    (0x07, 0x18, None, 'decode_018', 'b_18_19'),
+    (0x09, 0x19, None, 'decode_019', 'b_18_19'),
+    (0x08, 0x20, None, 'decode_020', 'b_20'),
+    (0x06, 0x30, None, 'decode_030', 'b_30'),
+)
+
+_HEX = tuple('%02x' % i for i in range(256))
+
+
+def FrameKey(length, pType, subType):
+    return (length << 16) | (pType << 8) | subType
+
+
+def BuildDispatchTable(resolve):
+    """
+    Expands FRAME_DECODERS into a dictionary keyed by FrameKey(). resolve is
+    called with (decoder, flag) and returns the handler to store, or None
+    for frames that are recognised but should be ignored.
+    """
+    table = {}
+    for length, pType, subType, decoder, flag in FRAME_DECODERS:
+        handler = resolve(decoder, flag)
+        if subType is None:
+            for s in range(256):
+                table.setdefault(FrameKey(length, pType, s), handler)
+        else:
+            table[FrameKey(length, pType, subType)] = handler
+    return table
+
+
+
+class FrameAssembler(object):
+    """
+    Buffers bytes read from the serial port and splits out complete,
+    length prefixed frames. Consumed bytes are only dropped on the next
+    Feed(), so the (start, end) offsets yielded by Frames() stay valid
+    while the frames are decoded. Frames with a length byte below
+    minLength can't hold a packet and are skipped.
+    """
+    __slots__ = ('buf', 'pos', 'skipped')
+    minLength = 4
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.pos = 0
+        self.skipped = 0
+
+
+    def Feed(self, data):
+        if self.pos:
+            del self.buf[:self.pos]
+            self.pos = 0
+        self.buf += data
+
+
+    def Frames(self):
+        buf = self.buf
+        while True:
+            start = self.pos
+            if start >= len(buf):
+                return
+            end = start + buf[start] + 1
+            if end > len(buf):
+                return
+            self.pos = end
+            if buf[start] < self.minLength:
+                self.skipped += 1
+                continue
+            yield start, end
+
+
+    def Pending(self):
+        return len(self.buf) - self.pos
+
+
+    def Hex(self, start, end):
+        return str(self.buf[start:end]).encode('hex')
+
+
+    def Discard(self):
+        data = self.Hex(self.pos, len(self.buf))
+        self.pos = len(self.buf)
+        return data
+
+
+
+class RawFrame(object):
+    """
+    Read-only view of one frame inside a bytearray, nothing is copied.
+    Indexing returns a byte as the two character hex string the decoders
+    match against, byte(), hi(), lo() and word() return the numeric fields.
+    """
+    __slots__ = ('data', 'start', 'end')
+
+    def __init__(self, data, start=0, end=None):
+        self.data = data
+        self.start = start
+        self.end = len(data) if end is None else end
+
+
+    def __len__(self):
+        return self.end - self.start
+
+
+    def __getitem__(self, i):
+        j = self.start + i
+        if j >= self.end:
+            raise IndexError(i)
+        return _HEX[self.data[j]]
+
+
+    def byte(self, i):
+        j = self.start + i
+        if j >= self.end:
+            raise IndexError(i)
+        return self.data[j]
+
+
+    def hi(self, i):
+        return self.byte(i) >> 4
+
+
+    def lo(self, i):
+        return self.byte(i) & 0x0F
+
+
+    def word(self, i):
+        j = self.start + i
+        if j + 1 >= self.end:
+            raise IndexError(i)
+        return (self.data[j] << 8) | self.data[j + 1]
+
+
+    def __str__(self):
+        return str([_HEX[b] for b in self.data[self.start:self.end]])
+
+    __repr__ = __str__
+
+
+
+class StatePublisher(Thread):
+    """
+    Sends websocket messages from its own thread so the receive path never
+    waits on the Websocket Suite. A message that is still queued is
+    replaced by a newer one with the same key and keeps its place in line.
+    """
+
+    def __init__(self, send):
+        Thread.__init__(self, name="RFXtrxPublisher")
+        self.daemon = True
+        self.send = send
+        self.pending = {}
+        self.order = deque()
+        self.condition = Condition()
+        self.running = True
+        self.coalesced = 0
+
+
+    def Publish(self, key, msg):
+        with self.condition:
+            if key in self.pending:
+                self.coalesced += 1
+            else:
+                self.order.append(key)
+            self.pending[key] = msg
+            self.condition.notify()
+
+
+    def Stop(self, timeout=2.0):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.join(timeout)
+
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.order:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                msg = self.pending.pop(self.order.popleft())
+            self.send(msg)
+
+
+
+class LogWriter(Thread):
+    """
+    Appends timestamped lines to <directory>/<name>.html from a background
+    thread. Lines are queued without blocking, written in batches to a file
+    that is kept open and flushed at least every interval seconds. When the
+    queue is full lines are dropped and counted. The file is rotated to
+    <name>_<date time>.html when it exceeds maxBytes or the date changes.
+    """
+
+    def __init__(
+        self,
+        directory,
+        name,
+        maxQueue=10000,
+        batchSize=500,
+        interval=1.0,
+        maxBytes=5*1024*1024
+    ):
+        Thread.__init__(self, name="RFXtrxLogWriter")
+        self.daemon = True
+        self.directory = directory
+        self.logName = name
+        self.queue = Queue(maxQueue)
+        self.batchSize = batchSize
+        self.interval = interval
+        self.maxBytes = maxBytes
+        self.dropped = 0
+        self.reported = 0
+        self.fileHandle = None
+        self.fileDate = None
+
+
+    def Write(self, s):
+        try:
+            self.queue.put_nowait((time.time(), s))
+        except Full:
+            self.dropped += 1
+
+
+    def Stop(self, timeout=5.0):
+        try:
+            self.queue.put(None, True, timeout)
+        except Full:
+            pass
+        self.join(timeout)
+
+
+    def FileName(self):
+        return os.path.join(self.directory, self.logName + '.html')
+
+
+    def Open(self):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        fileName = self.FileName()
+        if os.path.exists(fileName):
+            self.fileDate = time.strftime(
+                "%Y-%m-%d", time.localtime(os.path.getmtime(fileName))
+            )
+        else:
+            self.fileDate = time.strftime("%Y-%m-%d", time.localtime())
+        self.fileHandle = open(fileName, 'a')
+
+
+    def Rotate(self):
+        self.fileHandle.close()
+        self.fileHandle = None
+        stamp = time.strftime("_%Y-%m-%d_%H%M%S")
+        target = os.path.join(self.directory, self.logName + stamp + '.html')
+        n = 1
+        while os.path.exists(target):
+            target = os.path.join(
+                self.directory, '%s%s_%d.html' % (self.logName, stamp, n)
+            )
+            n += 1
+        os.rename(self.FileName(), target)
+        self.Open()
+
+
+    def WriteBatch(self, batch):
+        if self.fileHandle is None:
+            self.Open()
+        today = time.strftime("%Y-%m-%d", time.localtime())
+        if (
+            self.fileDate <> today
+            or self.fileHandle.tell() > self.maxBytes
+        ):
+            self.Rotate()
+        lines = []
+        if self.dropped <> self.reported:
+            lines.append(
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())+
+                "\t"+str(self.dropped - self.reported)+
+                " lines dropped<br\n>"
+            )
+            self.reported = self.dropped
+        for timeStamp, s in batch:
+            lines.append(
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timeStamp))+
+                "\t"+s+"<br\n>"
+            )
+        self.fileHandle.write(''.join(lines))
+        self.fileHandle.flush()
+
+
+    def run(self):
+        running = True
+        while running:
+            item = self.queue.get()
+            batch = []
+            deadline = time.time() + self.interval
+            #Collect until the batch is full or interval has passed
+            while item is not None:
+                batch.append(item)
+                remaining = deadline - time.time()
+                if len(batch) >= self.batchSize or remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(True, remaining)
+                except Empty:
+                    break
+            if item is None:
+                running = False
+            if batch:
+                try:
+                    self.WriteBatch(batch)
+                except (IOError, OSError), exc:
+                    eg.PrintError("RFXtrx log file: " + str(exc))
+                    self.dropped += len(batch)
+                    self.reported = self.dropped
+                    if self.fileHandle is not None:
+                        self.fileHandle.close()
+                        self.fileHandle = None
+        if self.fileHandle is not None:
+            self.fileHandle.close()
+            self.fileHandle = None
+
+
+
+class SensorRecord(object):
+    __slots__ = ('key', 'value', 'deadline', 'slot', 'lost')
+
+    def __init__(self, key):
+        self.key = key
+        self.value = None
+        self.deadline = 0.0
+        self.slot = None
+        self.lost = False
+
+
+
+class TimerWheel(object):
+    """
+    Hashed timer wheel with a resolution of one second. Re-arming a record
+    to a later deadline only updates record.deadline; the record is moved
+    when its current slot comes round, so a sensor reporting every minute
+    costs no heap operations.
+    """
+
+    def __init__(self, size=4096, now=None):
+        self.size = size
+        self.slots = [set() for i in range(size)]
+        self.tick = int(time.time() if now is None else now)
+        self.lock = Lock()
+
+
+    def Arm(self, record, timeout, now):
+        with self.lock:
+            self.Place(record, now + timeout)
+
+
+    def Place(self, record, deadline):
+        """Arm with self.lock already held."""
+        if record.slot is not None and deadline >= record.deadline:
+            record.deadline = deadline
+            return
+        if record.slot is not None:
+            self.slots[record.slot].discard(record)
+        record.deadline = deadline
+        record.slot = int(deadline) % self.size
+        self.slots[record.slot].add(record)
+
+
+    def Advance(self, now):
+        expired = []
+        target = int(now)
+        with self.lock:
+            if target - self.tick >= self.size:
+                self.tick = target - self.size + 1
+            while self.tick <= target:
+                index = self.tick % self.size
+                slot = self.slots[index]
+                if slot:
+                    for record in list(slot):
+                        due = int(record.deadline)
+                        if due <= self.tick:
+                            slot.discard(record)
+                            record.slot = None
+                            expired.append(record)
+                        elif due % self.size <> index:
+                            slot.discard(record)
+                            record.slot = due % self.size
+                            self.slots[record.slot].add(record)
+                self.tick += 1
+        return expired
+
+
+
+class SensorRegistry(object):
+    """
+    Last decoded value and contact timeout of every sensor, keyed by
+    (packet type, key).
+    """
+
+    def __init__(self, now=None):
+        self.records = {}
+        self.wheel = TimerWheel(now=now)
+
+
+    def Record(self, group, key):
+        try:
+            return self.records[(group, key)]
+        except KeyError:
+            record = self.records[(group, key)] = SensorRecord(key)
+            return record
+
+
+    def Swap(self, group, key, value):
+        """Stores value and returns the previous one (None if new)."""
+        record = self.Record(group, key)
+        previous = record.value
+        record.value = value
+        return previous
+
+
+    def Watch(self, group, key, timeout, now):
+        """(Re)starts the contact timeout, returns True if it had expired."""
+        record = self.Record(group, key)
+        with self.wheel.lock:
+            lost = record.lost
+            record.lost = False
+            self.wheel.Place(record, now + timeout)
+        return lost
+
+
+    def Expire(self, now):
+        """
+        Marks and returns the records whose timeout has expired. A record
+        re-armed by Watch since Advance released the lock is not lost.
+        """
+        expired = self.wheel.Advance(now)
+        with self.wheel.lock:
+            expired = [record for record in expired if record.slot is None]
+            for record in expired:
+                record.lost = True
+        return expired
+
+
+
+def BenchmarkSensors(
+    sensorCount,
+    frames=100000,
+    timeout=600.0,
+    schedulerFrames=2000
+):
+    """
+    Feeds frames readings from sensorCount sensors, 30 s apart per sensor,
+    through the registry and through a heap with cancel and re-add per
+    reading (what eg.scheduler does). Returns frames/s for both; the heap
+    is O(sensors) per reading, so it is only timed over schedulerFrames.
+    """
+    import heapq
+    from timeit import default_timer
+    keys = [
+        'Type: THGN122/123, THGN132 id: %d' % i for i in xrange(sensorCount)
+    ]
+    step = 30.0 / sensorCount
+    result = {'sensors': sensorCount, 'frames': frames}
+
+    registry = SensorRegistry(now=0)
+    for key in keys:
+        registry.Watch('052', key, timeout, 0.0)
+    t0 = default_timer()
+    for n in xrange(frames):
+        now = n * step
+        key = keys[n % sensorCount]
+        registry.Swap('052', key, ' temperature: +21.5 deg C')
+        registry.Watch('052', key, timeout, now)
+        if n % sensorCount == 0:
+            registry.Expire(now)
+    result['registry'] = frames / max(default_timer() - t0, 1e-9)
+
+    heap = []
+    tasks = {}
+    values = {}
+    for key in keys:
+        task = tasks[key] = (timeout, key)
+        heapq.heappush(heap, task)
+    schedulerFrames = min(frames, schedulerFrames)
+    t0 = default_timer()
+    for n in xrange(schedulerFrames):
+        now = n * step
+        key = keys[n % sensorCount]
+        values[key] = ' temperature: +21.5 deg C'
+        task = tasks.get(key)
+        if task is not None:
+            heap.remove(task)
+            heapq.heapify(heap)
+        task = tasks[key] = (now + timeout, key)
+        heapq.heappush(heap, task)
+    result['scheduler'] = (
+        schedulerFrames / max(default_timer() - t0, 1e-9)
+    )
+    return result
+
+
+
+CAPTURE_MAGIC = 'RFXCAP1\n'
+
+
+
+class FrameRecorder(object):
+    """
+    Writes received frames to a capture file: CAPTURE_MAGIC followed by one
+    record per frame, the milliseconds since the previous frame as unsigned
+    32 bit little endian and the frame itself, length byte included.
+    """
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.fileHandle = open(fileName, 'wb')
+        self.fileHandle.write(CAPTURE_MAGIC)
+        self.last = None
+        self.frames = 0
+        self.lock = Lock()
+
+
+    def Write(self, data, start, end, now):
+        if self.last is None:
+            delay = 0
+        else:
+            delay = min(int(round((now - self.last) * 1000)), 0xFFFFFFFF)
+        self.last = now
+        with self.lock:
+            if self.fileHandle is not None:
+                self.fileHandle.write(
+                    struct.pack('<I', max(delay, 0)) + str(data[start:end])
+                )
+                self.frames += 1
+
+
+    def Close(self):
+        with self.lock:
+            if self.fileHandle is not None:
+                self.fileHandle.close()
+                self.fileHandle = None
+
+
+
+def IsCaptureFile(fileName):
+    f = open(fileName, 'rb')
+    try:
+        return f.read(len(CAPTURE_MAGIC)) == CAPTURE_MAGIC
+    finally:
+        f.close()
+
+
+def ReadCapture(fileName):
+    """Returns the frames of a capture file as (delay in s, bytearray)."""
+    f = open(fileName, 'rb')
+    try:
+        data = f.read()
+    finally:
+        f.close()
+    if not data.startswith(CAPTURE_MAGIC):
+        raise ValueError("Not an RFXtrx capture file: " + fileName)
+    frames = []
+    pos = len(CAPTURE_MAGIC)
+    while pos + 5 <= len(data):
+        delay = struct.unpack_from('<I', data, pos)[0]
+        end = pos + 5 + ord(data[pos + 4])
+        if end > len(data):
+            break
+        frames.append((delay / 1000.0, bytearray(data[pos + 4:end])))
+        pos = end
+    return frames
+
+
+
+def Percentile(samples, fraction):
+    # samples must be sorted
+    if not samples:
+        return 0.0
+    return samples[int(round(fraction * (len(samples) - 1)))]
+
+
+def ReplayFrames(plugin, frames, realTime=False):
+    """
+    Feeds (delay, frame) pairs through a detached copy of the plugin's
+    decoders: events are only counted, and the log file, websockets, macro
+    naming and persistent state are left alone. With realTime the recorded
+    delays are kept, otherwise frames are fed as fast as possible.
+
+    Returns a dictionary with the number of frames and events, frames/s
+    (decoding time only), per decoder latency percentiles in microseconds
+    and the net number of gc tracked objects allocated per frame (Python 2
+    has no allocation counter, so objects freed again are not included).
+    """
+    import gc
+    from timeit import default_timer
+
+    replay = RFXtrx.__new__(RFXtrx)
+    replay.__dict__.update(plugin.__dict__)
+    events = [0]
+    def CountEvent(*args, **kwargs):
+        events[0] += 1
+    replay.TriggerEvent = CountEvent
+    replay.sensors = SensorRegistry()
+    replay.current_state_memory = {}
+    replay.sensors_status = {}
+    replay.rfxSensors = dict(plugin.rfxSensors)
+    replay.bDebug = False
+    replay.bLogToFile = False
+    replay.use_websockets = False
+    replay.mMacroNames = False
+    replay.logWriter = None
+    replay.publisher = None
+    replay.recorder = None
+
+    timings = {}
+    def Resolve(decoder, flag):
+        handler = replay.ResolveDecoder(decoder, flag)
+        if handler is None:
+            return None
+        samples = timings.setdefault(decoder, [])
+        def Timed(msg):
+            t0 = default_timer()
+            handler(msg)
+            samples.append(default_timer() - t0)
+        return Timed
+    replay.dispatchTable = BuildDispatchTable(Resolve)
+
+    gc.collect()
+    gcEnabled = gc.isenabled()
+    gc.disable()
+    allocations = 0
+    busy = 0.0
+    try:
+        for delay, frame in frames:
+            if realTime and delay > 0:
+                time.sleep(delay)
+            count = gc.get_count()[0]
+            t0 = default_timer()
+            replay.HandleFrame(frame)
+            busy += default_timer() - t0
+            allocations += gc.get_count()[0] - count
+    finally:
+        if gcEnabled:
+            gc.enable()
+
+    decoders = {}
+    for decoder, samples in timings.iteritems():
+        if samples:
+            samples.sort()
+            decoders[decoder] = {
+                'frames': len(samples),
+                'p50': Percentile(samples, 0.5) * 1e6,
+                'p90': Percentile(samples, 0.9) * 1e6,
+                'p99': Percentile(samples, 0.99) * 1e6,
+                'max': samples[-1] * 1e6,
+            }
+    return {
+        'frames': len(frames),
+        'events': events[0],
+        'framesPerSecond': len(frames) / busy if busy > 0 else 0.0,
+        'allocationsPerFrame': (
+            float(allocations) / len(frames) if frames else 0.0
+        ),
+        'decoders': decoders,
+    }
+
+
+
+def LoadFrameCorpus(fileName):
+    """
+    Reads a capture file written by FrameRecorder, or a text file holding
+    one frame per line as hex (the format used by the decode test message
+    action) where blank lines and '#' comments are skipped.
+    """
+    if IsCaptureFile(fileName):
+        return [frame for delay, frame in ReadCapture(fileName)]
+    frames = []
+    f = open(fileName, 'r')
+    try:
+        for line in f:
+            line = line.split('#')[0].replace(' ', '').strip()
+            if line:
+                frames.append(bytearray(line.decode('hex')))
+    finally:
+        f.close()
+    return frames
+
+
+def _LegacyDispatch(data):
+    # The per frame work done before the table driven dispatcher: hex encode,
+    # split into 2 char strings, walk the branches and parse every field
+    msg = []
+    tmp = ''
+    for i in str(data).encode('hex'):
+        tmp += i
+        if len(tmp) == 2:
+            msg.append(tmp)
+            tmp = ''
+    if len(msg)-1 != int(msg[0], 16):
+        return None
+    for length, pType, subType, decoder, flag in FRAME_DECODERS:
+        if (
+            msg[0] == _HEX[length]
+            and msg[1] == _HEX[pType]
+            and (subType is None or msg[2] == _HEX[subType])
+        ):
+            for field in msg:
+                int(field, 16)
+            return decoder
+    return None
+
+
+def _TableDispatch(table, data):
+    frame = RawFrame(data)
+    if len(frame)-1 != frame.byte(0):
+        return None
+    decoder = table.get(
+        FrameKey(frame.byte(0), frame.byte(1), frame.byte(2))
+    )
+    if decoder is not None:
+        for i in xrange(len(frame)):
+            frame.byte(i)
+    return decoder
+
+
+def BenchmarkDispatch(frames, rounds=100):
+    """
+    Replays frames through the legacy hex string dispatch and the table
+    driven dispatch. Returns a dictionary with the frames/s of each path and
+    the number of frames the two paths routed differently (should be 0).
+    """
+    from timeit import default_timer
+    table = BuildDispatchTable(lambda decoder, flag: decoder)
+    mismatches = 0
+    for data in frames:
+        if _LegacyDispatch(data) != _TableDispatch(table, data):
+            mismatches += 1
+    result = {'frames': len(frames) * rounds, 'mismatches': mismatches}
+    for name, dispatch in (
+        ('legacy', _LegacyDispatch),
+        ('table', lambda data: _TableDispatch(table, data)),
+    ):
+        t0 = default_timer()
+        for r in xrange(rounds):
+            for data in frames:
+                dispatch(data)
+        elapsed = default_timer() - t0
+        result[name] = result['frames'] / elapsed if elapsed > 0 else 0.0
+    return result
+
+
+
 class Text:
     port = "Port:"
     logToFile = "Log events to file"
@@ -198,12 +976,14 @@ class Text:
     messageWebSocketBroadcastError = "Websocket broadcast error...check the websocket configuration "
 
     disconnecting = "Stopping and disconnecting the RFXtrx device...please wait"
-    cleanUpmonitoring = "Cleaning up monitoring tasks..."
     readyStopped = "Plugin successfully stopped"
     threadStopped = "Receiving thread is stopped..."
     dt_threadStopped = "Date & Time thread ended"    
     ka_threadStopped = "Keep Alive thread ended"    
+    sw_threadStopped = "Sensor watch thread ended"
     keyAdded = "Key added to dictionary"
+    statusSnapshot = "StatusSnapshot"
+    logLinesDropped = "Log file could not keep up, lines dropped: "
 
     textBoxName = "Enter a descriptive name for the action"
     textBoxProtocol = "Select the device protocol to be used"
@@ -278,6 +1058,10 @@ class RFXtrx(eg.RawReceiverPlugin):
         self.AddAction(send_Medion_Remote)
         self.AddAction(send_X10_PC_Remote)
         self.AddAction(decode_Test_Message)
+        self.AddAction(BenchmarkDispatcher)
+        self.AddAction(BenchmarkSensorRegistry)
+        self.AddAction(CaptureFrames)
+        self.AddAction(ReplayCapture)
         self.AddAction(WebRefresh)
         self.AddAction(ClearSensorsStatus)
 
@@ -311,6 +1095,8 @@ class RFXtrx(eg.RawReceiverPlugin):
         prefix="RFXtrx"
         self.fwVer = 0
         self.bLogToFile = bLogToFile
+        self.logWriter = None
+        self.recorder = None
         self.bDebug = bDebug
         self.b_50 = b_50
         self.b_51 = b_51
@@ -332,50 +1118,17 @@ class RFXtrx(eg.RawReceiverPlugin):
         self.b_18_19 = b_18_19
         self.b_20 = b_20
         self.b_30 = True
+        self.dispatchTable = BuildDispatchTable(self.ResolveDecoder)
         
-        self.decode_050_mem = {}
-        self.decode_051_mem = {}
-        self.decode_052_mem = {}
-        self.decode_054_mem = {}
-        self.decode_055_mem = {}
-        self.decode_056_mem = {}
-        self.decode_057_mem = {}
-        self.decode_059_mem = {}
-        self.decode_05A_mem = {}
-        self.decode_05B_mem = {}
-        self.decode_070_mem = {}
-        self.decode_071_mem = {}
-        self.decode_010_mem = {}
-        self.decode_011_mem = {}
-        self.decode_014_00_mem = {}
-        self.decode_014_01_mem = {}
-        self.decode_014_02_mem = {}
-        self.decode_015_mem = {}
-        self.decode_018_019_mem = {}
-        self.decode_020_mem = {}
-        
-        self.monitor_050_mem = {}
-        self.monitor_051_mem = {}
-        self.monitor_052_mem = {}
-        self.monitor_054_mem = {}
-        self.monitor_055_mem = {}
-        self.monitor_056_mem = {}
-        self.monitor_057_mem = {}
-        self.monitor_059_mem = {}
-        self.monitor_05A_mem = {}
-        self.monitor_05B_mem = {}
-        self.monitor_070_mem = {}
-        self.monitor_071_mem = {}
-        self.monitor_020_mem = {}
+        self.sensors = SensorRegistry()
 
         self.mMacroNames = mMacroNames
         self.bDupEvents = bDupEvents
         self.use_websockets = use_websockets
+        self.publisher = None
         self.websocket_port_nbr = str(websocket_port_nbr)
         self.rfxSensors = CurrentStateData.rfxSensors
-        self.tmpMessage = ''
-        self.tmpMilliSec = 0
-        self.pmh = None
+        self.hold = False
                  
         self.keepAliveThreadEvent = Event()
         self.remain = 0.0
@@ -392,6 +1145,13 @@ class RFXtrx(eg.RawReceiverPlugin):
         )
         dateTimeThread.start()
 
+        self.sensorWatchThreadEvent = Event()
+        sensorWatchThread = Thread(
+            target=self.sensor_Watch,
+            args=(self.sensorWatchThreadEvent,)
+        )
+        sensorWatchThread.start()
+
         try:
             self.serial = eg.SerialPort(
                 port=port,
@@ -405,7 +1165,7 @@ class RFXtrx(eg.RawReceiverPlugin):
         except:
             self.serial = None
             raise self.Exceptions.SerialOpenFailed
-        self.serial.timeout = 0.01
+        self.serial.timeout = 0.1
         self.serial.setRTS()
 
         #Reset connection
@@ -420,6 +1180,17 @@ class RFXtrx(eg.RawReceiverPlugin):
         get_status_str = "0D 00 00 01 02 00 00 00 00 00 00 00 00 00"
         self.WriteMsg(get_status_str, '', '')        
 
+        if self.use_websockets:
+            self.publisher = StatePublisher(self.SendWebsocket)
+            self.publisher.start()
+
+        if self.bLogToFile:
+            self.logWriter = LogWriter(
+                eg.configDir + '\plugins\RFXtrx',
+                self.name
+            )
+            self.logWriter.start()
+
         #Start the communication thread
         self.decoder = getdecoder(eg.systemEncoding)
         self.info.eventPrefix = prefix
@@ -435,99 +1206,32 @@ class RFXtrx(eg.RawReceiverPlugin):
         print self.text.disconnecting
         self.dateTimeThreadEvent.set()
         self.keepAliveThreadEvent.set()
+        self.sensorWatchThreadEvent.set()
         if self.serial is not None:
             if self.receiveThread:
-                self.receiveThread.join(1.0)
                 self.finished.set()
-            time.sleep(0.1)
+                self.receiveThread.join(1.0)
             self.serial.close()
             self.serial = None
 
-        try:
-            eg.scheduler.CancelTask(self.pmh)
-        except:
-            pass
+        if self.publisher is not None:
+            self.publisher.Stop()
+            self.publisher = None
+
+        self.StopCapture()
+
+        if self.logWriter is not None:
+            self.logWriter.Stop()
+            if self.logWriter.dropped:
+                eg.PrintError(
+                    self.text.logLinesDropped + str(self.logWriter.dropped)
+                )
+            self.logWriter = None
 
-        print self.text.cleanUpmonitoring
-        for i in self.monitor_050_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_050_mem[i])
-            except:
-                pass
-        for i in self.monitor_051_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_051_mem[i])
-            except:
-                pass
-        for i in self.monitor_052_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_052_mem[i])
-            except:
-                pass
-        for i in self.monitor_054_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_054_mem[i])
-            except:
-                pass
-        for i in self.monitor_055_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_055_mem[i])
-            except:
-                pass
-        for i in self.monitor_056_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_056_mem[i])
-            except:
-                pass
-        for i in self.monitor_057_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_057_mem[i])
-            except:
-                pass
-        for i in self.monitor_059_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_059_mem[i])
-            except:
-                pass
-        for i in self.monitor_05A_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_05A_mem[i])
-            except:
-                pass
-        for i in self.monitor_05B_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_05B_mem[i])
-            except:
-                pass
-        for i in self.monitor_070_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_070_mem[i])
-            except:
-                pass
-        for i in self.monitor_071_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_071_mem[i])
-            except:
-                pass
-        for i in self.monitor_020_mem:
-            try:
-                eg.scheduler.CancelTask(self.monitor_020_mem[i])
-            except:
-                pass
         eg.Wait(self.remain + 0.5)
         print self.text.readyStopped
         
                 
-    def ClearTempMessage(self):
-        eg.PrintError (
-            self.text.messageNP+
-            ' '+
-            self.tmpMessage
-        )
-        self.tmpMessage = ''
-        self.tmpMilliSec = 0
-
-
     def CancelTask(self, handle):
         try:
             eg.scheduler.CancelTask(handle)
@@ -539,65 +1243,55 @@ class RFXtrx(eg.RawReceiverPlugin):
         return int(round(time.time() * 1000))
 
         
-    def PartialMessageHandler(self, data): #Uncompleted message arrives
-        #Start time measuring
-        if not self.tmpMilliSec > 0:
-            self.tmpMilliSec = self.MilliSeconds()
-
-        #Cancel resetting task if already scheduled
-        self.CancelTask(self.pmh)
-
-        #Schedule the new resetting task
-        self.pmh = eg.scheduler.AddTask(0.5, self.ClearTempMessage)
-
-        #Add the received data to the temporary storage
-        self.tmpMessage += data
-        if self.bDebug:
-            print self.tmpMessage
-
-        #Check length and if it has become completed
-        #If not, just wait for the remainer
-        messageL = int(self.tmpMessage[0:2], 16)
-
-        if len(self.tmpMessage) == (messageL+1)*2:
-            #Cancel scheduled task and clear the temporary storage
-            self.CancelTask(self.pmh)
-            #Forward the repaired message for normal processing
-            self.HandleChar(self.tmpMessage)
-
-            if self.bDebug:
-                timeToRepair = self.MilliSeconds() - self.tmpMilliSec
-                eg.PrintError (
-                    self.text.messageUC+
-                    ' '+
-                    str(timeToRepair)+
-                    ' ms'+
-                    ' '+
-                    self.tmpMessage
-                )
-            self.tmpMessage = ''
-            self.tmpMilliSec = 0
-
-
     def ReceiveThread(self):
-        out = ''
+        assembler = FrameAssembler()
+        partialSince = 0
         while not self.finished.isSet():
-            time.sleep(0.002) #Release CPU
-    	    while self.serial.inWaiting() > 0 and not self.hold:
-                self.finished.wait(0.01)
-    	        buf = self.serial.read(1)
-    	        if len(str(out))==0:
-                    pl = int('0x'+str(buf.encode('hex')), 0)
-                    out += buf
-                    out += self.serial.read(pl)
-                    data = str(out.encode('hex'))
-                    if pl>3 and len(str(out))==pl+1:
-                        if self.bDebug:
-                            print "Debug Info: ", data
-                        self.HandleChar(data)
-                    else:
-                        self.PartialMessageHandler(data)
-                    out = ''
+            if self.hold:
+                self.finished.wait(0.005)
+                continue
+            #Blocks until data arrives or the port timeout expires
+            data = self.serial.read(1)
+            if data:
+                waiting = self.serial.inWaiting()
+                if waiting > 0:
+                    data += self.serial.read(waiting)
+                assembler.Feed(data)
+                for start, end in assembler.Frames():
+                    if self.bDebug:
+                        print "Debug Info: ", assembler.Hex(start, end)
+                        if partialSince > 0:
+                            eg.PrintError (
+                                self.text.messageUC+
+                                ' '+
+                                str(self.MilliSeconds() - partialSince)+
+                                ' ms'
+                            )
+                            partialSince = 0
+                    recorder = self.recorder
+                    if recorder is not None:
+                        recorder.Write(assembler.buf, start, end, time.time())
+                    self.HandleFrame(assembler.buf, start, end)
+                if assembler.skipped:
+                    if self.bDebug:
+                        eg.PrintError(
+                            self.text.messageL+
+                            str(assembler.skipped)+
+                            ' short frame(s) skipped'
+                        )
+                    assembler.skipped = 0
+            if assembler.Pending() > 0:
+                if not partialSince > 0:
+                    partialSince = self.MilliSeconds()
+                elif self.MilliSeconds() - partialSince > 500:
+                    eg.PrintError (
+                        self.text.messageNP+
+                        ' '+
+                        assembler.Discard()
+                    )
+                    partialSince = 0
+            else:
+                partialSince = 0
         print self.text.threadStopped
 
 
@@ -625,6 +1319,14 @@ class RFXtrx(eg.RawReceiverPlugin):
         print self.text.ka_threadStopped
 
 
+    def sensor_Watch(self,sensorWatchThreadEvent): # Sensor timeout loop
+        while not sensorWatchThreadEvent.isSet():
+            for record in self.sensors.Expire(time.time()):
+                self.sensorLost(self.text.txt_taskObj+': '+record.key)
+            sensorWatchThreadEvent.wait(1.0)
+        print self.text.sw_threadStopped
+
+
     def DateAndTimeInfo(self):
         if self.use_websockets:
             currDate_Time = str(
@@ -634,7 +1336,7 @@ class RFXtrx(eg.RawReceiverPlugin):
                 )
             )
             msg = "currDate_Time."+currDate_Time
-            self.BroadcastMessage(msg)
+            self.BroadcastMessage(msg, "currDate_Time")
 
         
     def KeepAlive(self):
@@ -644,17 +1346,15 @@ class RFXtrx(eg.RawReceiverPlugin):
 
 
     def StatusRefresh(self):
+        #All states in one message, one line each
         if self.use_websockets:
-            if len(self.current_state_memory) > 0:
-                for i in self.current_state_memory:
-                    msg = self.current_state_memory[i]
-                    self.BroadcastMessage(msg)
-                    time.sleep(0.01)
-            if len(self.sensors_status) > 0:
-                for i in self.sensors_status:
-                    msg = self.sensors_status[i]
-                    self.BroadcastMessage(msg)
-                    time.sleep(0.01)
+            states = (
+                self.current_state_memory.values() +
+                self.sensors_status.values()
+            )
+            if len(states) > 0:
+                msg = '\n'.join([self.text.statusSnapshot] + states)
+                self.BroadcastMessage(msg, self.text.statusSnapshot)
 
 
     def SavePersistent(self, msg, m_key):
@@ -662,17 +1362,23 @@ class RFXtrx(eg.RawReceiverPlugin):
         try:
             if msg != self.current_state_memory[m_key]:
                 self.current_state_memory[m_key] = msg
-                self.BroadcastMessage(msg)
+                self.BroadcastMessage(msg, m_key)
             elif self.bDupEvents:
-                self.BroadcastMessage(msg)
+                self.BroadcastMessage(msg, m_key)
         except KeyError:
             if self.bDebug:
                 print self.text.keyAdded
             self.current_state_memory[m_key] = msg
-            self.BroadcastMessage(msg)
+            self.BroadcastMessage(msg, m_key)
 
        
-    def BroadcastMessage(self, msg):
+    def BroadcastMessage(self, msg, key=None):
+        #Queued, a pending message with the same key is replaced
+        if self.publisher is not None:
+            self.publisher.Publish(msg if key is None else key, msg)
+
+
+    def SendWebsocket(self, msg):
         try:
             p = eg.plugins.WebsocketSuite.BroadcastMessage(
                 'All available interfaces',
@@ -688,122 +1394,62 @@ class RFXtrx(eg.RawReceiverPlugin):
 
 
     def HandleChar(self, ch):
-        msg = []
-        tmp = ''
+        #Hex string input, used for repaired and test messages
+        try:
+            frame = bytearray(ch.replace(' ', '').decode('hex'))
+        except (TypeError, ValueError):
+            eg.PrintError(self.text.messageL + str(ch))
+            return
+        if len(frame) > 0:
+            self.HandleFrame(frame)
+
+
+    def StartCapture(self, fileName):
+        self.StopCapture()
+        self.recorder = FrameRecorder(fileName)
+
 
-        for i in ch:
-            tmp+=i
-            if len(tmp) == 2:
-                msg.append(tmp)
-                tmp=''
+    def StopCapture(self):
+        recorder = self.recorder
+        self.recorder = None
+        if recorder is not None:
+            recorder.Close()
+            return recorder.frames
+        return 0
+
+
+    def ResolveDecoder(self, decoder, flag):
+        if flag is not None and not getattr(self, flag):
+            return None
+        return getattr(self, decoder)
 
+
+    def HandleFrame(self, data, start=0, end=None):
+        msg = RawFrame(data, start, end)
         try:
-            if len(msg)-1 == int(msg[0], 16) and msg[0] <> 'FF':
-    
-                if msg[0]== '04' and msg[1]== '02':
-                    self.decode_002(msg)
-                    return
-                if msg[0]== '08' and msg[1]== '50':
-                    if self.b_50:
-                        self.decode_050(msg)
-                    return
-                if msg[0]== '08' and msg[1]== '51':
-                    if self.b_51:
-                        self.decode_051(msg)
-                    return
-                if msg[0]== '0a' and msg[1]== '52':
-                    if self.b_52:
-                        self.decode_052(msg)
-                    return
-                if msg[0]== '0d' and msg[1]== '54':
-                    if self.b_54:
-                        self.decode_054(msg)
-                    return
-                if msg[0]== '0b' and msg[1]== '55':
-                    if self.b_55:
-                        self.decode_055(msg)
-                    return
-                if msg[0]== '10' and msg[1]== '56':
-                    if self.b_56:
-                        self.decode_056(msg)
-                    return
-                if msg[0]== '09' and msg[1]== '57':
-                    if self.b_57:
-                        self.decode_057(msg)
-                    return
-                if msg[0]== '0d' and msg[1]== '59':
-                    if self.b_5A:
-                        self.decode_059(msg)
-                    return
-                if msg[0]== '11' and msg[1]== '5a':
-                    if self.b_5A:
-                        self.decode_05A(msg)
-                    return
-                if msg[0]== '13' and msg[1]== '5b':
-                    if self.b_5B:
-                        self.decode_05B(msg)
-                    return
-                if msg[0]== '07' and msg[1]== '70':
-                    if self.b_70:
-                        self.decode_070(msg)
-                    return
-                if msg[0]== '0a' and msg[1]== '71':
-                    if self.b_71:
-                        self.decode_071(msg)
-                    return
-                if msg[0]== '07' and msg[1]== '10':
-                    if self.b_10:
-                        self.decode_010(msg)
-                    return
-                if msg[0]== '0b' and msg[1]== '11':
-                    if self.b_11:
-                        self.decode_011(msg)
-                    return
-                if msg[0]== '0a' and msg[1]== '14' and msg[2]== '00':
-                    if self.b_14_00:
-                        self.decode_014_00(msg)
-                    return
-                if msg[0]== '0a' and msg[1]== '14' and msg[2]== '01':
-                    if self.b_14_01:
-                        self.decode_014_01(msg)
-                    return
-                if msg[0]== '0a' and msg[1]== '14' and msg[2]== '02':
-                    if self.b_14_02:
-                        self.decode_014_02(msg)
-                    return
-                if msg[0]== '0b' and msg[1]== '15':
-                    if self.b_15:
-                        self.decode_015(msg)
-                    return
-                if msg[0]== '07' and msg[1]== '18':
-                    if self.b_18_19:
-                        self.decode_018(msg)
-                    return
-                if msg[0]== '09' and msg[1]== '19':
-                    if self.b_18_19:
-                        self.decode_019(msg)
-                    return
-                if msg[0]== '08' and msg[1]== '20':
-                    if self.b_20:
-                        self.decode_020(msg)
-                    return
-                if msg[0]== '06' and msg[1]== '30':
-                    if self.b_30:
-                        self.decode_030(msg)
-                    return
-                if msg[1]== '01' and msg[2]== 'FF':
-                    self.decode_000(msg)
-                    return
-                if msg[1]== '01' and msg[4]== '02':
-                    self.decode_001(msg)
-                    return
-    
-                if self.bDebug:
-                    eg.PrintError(self.text.messageUKnwn + str(msg))
-                    #self.TriggerEvent(self.text.messageUKnwn + str(msg))
-            else:
-                if msg[0] <> 'FF':
+            if (
+                len(msg)-1 <> msg.byte(0)
+                or msg.byte(0) < FrameAssembler.minLength
+                or msg.byte(0) == 0xFF
+            ):
+                if msg.byte(0) <> 0xFF:
                     eg.PrintError(self.text.messageL + str(msg))
+                return
+            key = FrameKey(msg.byte(0), msg.byte(1), msg.byte(2))
+            if key in self.dispatchTable:
+                decoder = self.dispatchTable[key]
+                if decoder is not None:
+                    decoder(msg)
+                return
+            if msg.byte(1) == 0x01 and msg.byte(2) == 0xFF:
+                self.decode_000(msg)
+                return
+            if msg.byte(1) == 0x01 and msg.byte(4) == 0x02:
+                self.decode_001(msg)
+                return
+
+            if self.bDebug:
+                eg.PrintError(self.text.messageUKnwn + str(msg))
         except:
             pass    
 
@@ -845,25 +1491,8 @@ class RFXtrx(eg.RawReceiverPlugin):
 
 
     def LogToFile(self, s):
-        timeStamp = str(
-            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        )
-        logStr = timeStamp+"\t"+s+"<br\n>"
-        fileHandle = None
-        progData = eg.configDir + '\plugins\RFXtrx'
-
-        if (
-            not os.path.exists(progData)
-            and not os.path.isdir(progData)
-        ):
-            os.makedirs(progData)
-
-        fileHandle = open (
-            progData+'/'+
-            self.name+'.html', 'a'
-        )
-        fileHandle.write ( logStr )
-        fileHandle.close ()
+        if self.logWriter is not None:
+            self.logWriter.Write(s)
 
 
     def sensorLost(self, myArgument):
@@ -879,7 +1508,7 @@ class RFXtrx(eg.RawReceiverPlugin):
             pass
 
         if self.use_websockets:
-            self.BroadcastMessage(myArgument)
+            self.BroadcastMessage(myArgument, lc)
  
  
     def sensorBack(self, myArgument):
@@ -894,23 +1523,14 @@ class RFXtrx(eg.RawReceiverPlugin):
         except:
             pass
         if self.use_websockets:
-            self.BroadcastMessage(myArgument)
+            self.BroadcastMessage(myArgument, bc)
  
  
-    def eventMonitor(self, monitored, decoded, base, timeout):
-        try:
-            eg.scheduler.CancelTask(monitored)
-        except:
-            if decoded <> None:
-                self.sensorBack(
-                    self.text.txt_signal_back+': '+base 
-                )
-        monitored = eg.scheduler.AddTask(
-                timeout,
-                self.sensorLost,
-                self.text.txt_taskObj+': '+base
-        )
-        return monitored
+    def eventMonitor(self, group, base, timeout):
+        if self.sensors.Watch(group, base, timeout, time.time()):
+            self.sensorBack(
+                self.text.txt_signal_back+': '+base 
+            )
        
 
     def eventTrigger(self, decoded, base, pload):
@@ -995,7 +1615,7 @@ class RFXtrx(eg.RawReceiverPlugin):
 
 
     def decode_000(self, msg):
-        if msg[2]=='FF':
+        if msg.byte(2) == 0xFF:
             eg.PrintError(self.text.messageT + str(msg[4]))
 
 
@@ -1014,8 +1634,8 @@ class RFXtrx(eg.RawReceiverPlugin):
             '5B':'868.95MHz'
         }
         try:
-            print(self.text.fwVersion+str(int(msg[6], 16)))
-            self.fwVer = int(msg[6], 16)
+            print(self.text.fwVersion+str(msg.byte(6)))
+            self.fwVer = msg.byte(6)
             print(self.text.rfxtrx+str(receiver_transceiver_types[msg[5]]))
             if self.fwVer < 163:
                 print self.text.rfxtrx_type + "1"
@@ -1052,7 +1672,7 @@ class RFXtrx(eg.RawReceiverPlugin):
         }
         try:
             #Get the correct sign
-            sign_bt = bin(int(msg[6], 16))[2:].zfill(8)            
+            sign_bt = bin(msg.byte(6))[2:].zfill(8)            
             sign = signs[sign_bt[0]]
             
             #Calculate the actual temperature
@@ -1060,8 +1680,8 @@ class RFXtrx(eg.RawReceiverPlugin):
                 tempC = str(
                 float(
                     (
-                        int(msg[6], 16)*256 +
-                        int(msg[7], 16))/10.0
+                        msg.byte(6)*256 +
+                        msg.byte(7))/10.0
                     )
                 )
             
@@ -1070,13 +1690,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                 float(
                 (
                     (
-                        int(msg[6], 16) & int('7F', 16))*256 +
-                        int(msg[7], 16))/10.0
+                        msg.byte(6) & int('7F', 16))*256 +
+                        msg.byte(7))/10.0
                     )
                 )
 
             #Get the unit ID
-            dev_id = str(int(msg[4]+msg[5], 16))
+            dev_id = str(msg.word(4))
             
             #Get the channel value
             #print msg[4]
@@ -1088,31 +1708,15 @@ class RFXtrx(eg.RawReceiverPlugin):
                 )
                 pload_msg = (
                     ' temperature: '+sign+tempC+' deg C'+
-                    ' signal: '+str(int(msg[8][0], 16))+
-                    ' battery: '+str(int(msg[8][1], 16))
+                    ' signal: '+str(msg.hi(8))+
+                    ' battery: '+str(msg.lo(8))
                 )
-                decode_param = None
-                mon_param = None
-                try:
-                    decode_param = self.decode_050_mem[base_msg]
-                except:
-                    pass
                 self.eventTrigger(
-                    decode_param,
+                    self.sensors.Swap('050', base_msg, pload_msg),
                     base_msg,
                     pload_msg
                 )
-                try:
-                    mon_param = self.monitor_050_mem[base_msg]
-                except:
-                    pass
-                self.monitor_050_mem[base_msg] = self.eventMonitor(
-                    mon_param,
-                    decode_param,
-                    base_msg,
-                    600.0
-                )
-                self.decode_050_mem[base_msg] = pload_msg
+                self.eventMonitor('050', base_msg, 600.0)
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -1138,7 +1742,7 @@ class RFXtrx(eg.RawReceiverPlugin):
             }
         try:
             #Get the unit ID
-            dev_id = str(int(msg[4]+msg[5], 16))
+            dev_id = str(msg.word(4))
             
             #Get the channel value
             #print msg[4]
@@ -1149,33 +1753,17 @@ class RFXtrx(eg.RawReceiverPlugin):
                     ' id: '+dev_id
                 )
                 pload_msg = (
-                    ' humidity: '+str(int(msg[6], 16))+' %RH'+
+                    ' humidity: '+str(msg.byte(6))+' %RH'+
                     ' status: '+statuses[msg[7]]+
-                    ' signal: '+str(int(msg[8][0], 16))+
-                    ' battery: '+str(int(msg[8][1], 16))
+                    ' signal: '+str(msg.hi(8))+
+                    ' battery: '+str(msg.lo(8))
                 )
-                decode_param = None
-                mon_param = None
-                try:
-                    decode_param = self.decode_051_mem[base_msg]
-                except:
-                    pass
                 self.eventTrigger(
-                    decode_param,
+                    self.sensors.Swap('051', base_msg, pload_msg),
                     base_msg,
                     pload_msg
                 )
-                try:
-                    mon_param = self.monitor_051_mem[base_msg]
-                except:
-                    pass
-                self.monitor_051_mem[base_msg] = self.eventMonitor(
-                    mon_param,
-                    decode_param,
-                    base_msg,
-                    600.0
-                )
-                self.decode_051_mem[base_msg] = pload_msg
+                self.eventMonitor('051', base_msg, 600.0)
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -1213,7 +1801,7 @@ class RFXtrx(eg.RawReceiverPlugin):
             }
         try:
             #Get the correct sign
-            sign_bt = bin(int(msg[6], 16))[2:].zfill(8)            
+            sign_bt = bin(msg.byte(6))[2:].zfill(8)            
             sign = signs[sign_bt[0]]
             
             #Calculate the actual temperature
@@ -1221,8 +1809,8 @@ class RFXtrx(eg.RawReceiverPlugin):
                 tempC = str(
                 float(
                     (
-                        int(msg[6], 16)*256 +
-                        int(msg[7], 16))/10.0
+                        msg.byte(6)*256 +
+                        msg.byte(7))/10.0
                     )
                 )
             
@@ -1231,13 +1819,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                 float(
                 (
                     (
-                        int(msg[6], 16) & int('7F', 16))*256 +
-                        int(msg[7], 16))/10.0
+                        msg.byte(6) & int('7F', 16))*256 +
+                        msg.byte(7))/10.0
                     )
                 )
     
             #Get the unit ID
-            dev_id = str(int(msg[4]+msg[5], 16))
+            dev_id = str(msg.word(4))
             
             #Get the channel value
             #print msg[4]
@@ -1249,33 +1837,17 @@ class RFXtrx(eg.RawReceiverPlugin):
                 )
                 pload_msg = (
                     ' temperature: '+sign+tempC+' deg C'+
-                    ' humidity: '+str(int(msg[8], 16))+' %RH'+
+                    ' humidity: '+str(msg.byte(8))+' %RH'+
                     ' status: '+statuses[msg[9]]+
-                    ' signal: '+str(int(msg[10][0], 16))+
-                    ' battery: '+str(int(msg[10][1], 16))
+                    ' signal: '+str(msg.hi(10))+
+                    ' battery: '+str(msg.lo(10))
                 )
-                decode_param = None
-                mon_param = None
-                try:
-                    decode_param = self.decode_052_mem[base_msg]
-                except:
-                    pass
                 self.eventTrigger(
-                    decode_param,
+                    self.sensors.Swap('052', base_msg, pload_msg),
                     base_msg,
                     pload_msg
                 )
-                try:
-                    mon_param = self.monitor_052_mem[base_msg]
-                except:
-                    pass
-                self.monitor_052_mem[base_msg] = self.eventMonitor(
-                    mon_param,
-                    decode_param,
-                    base_msg,
-                    600.0
-                )
-                self.decode_052_mem[base_msg] = pload_msg
+                self.eventMonitor('052', base_msg, 600.0)
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -1312,7 +1884,7 @@ class RFXtrx(eg.RawReceiverPlugin):
         }
         try:
             #Get the correct sign
-            sign_bt = bin(int(msg[6], 16))[2:].zfill(8)            
+            sign_bt = bin(msg.byte(6))[2:].zfill(8)            
             sign = signs[sign_bt[0]]
             
             #Calculate the actual temperature
@@ -1320,8 +1892,8 @@ class RFXtrx(eg.RawReceiverPlugin):
                 tempC = str(
                 float(
                 (
-                        int(msg[6], 16)*256 +
-                        int(msg[7], 16))/10.0
+                        msg.byte(6)*256 +
+                        msg.byte(7))/10.0
                     )
                 )
             
@@ -1330,8 +1902,8 @@ class RFXtrx(eg.RawReceiverPlugin):
                 float(
                 (
                     (
-                        int(msg[6], 16) & int('7F', 16))*256 +
-                        int(msg[7], 16))/10.0
+                        msg.byte(6) & int('7F', 16))*256 +
+                        msg.byte(7))/10.0
                     )
                 )
             
@@ -1339,14 +1911,14 @@ class RFXtrx(eg.RawReceiverPlugin):
             barometer = str(
             float(
                     (
-                        int(msg[10], 16)*256+
-                        int(msg[11], 16)
+                        msg.byte(10)*256+
+                        msg.byte(11)
                     )
                 )
             )
             
             #Get the unit ID
-            dev_id = str(int(msg[4]+msg[5], 16))
+            dev_id = str(msg.word(4))
             
             if int(dev_id) <> 0:
                 base_msg = (
@@ -1355,35 +1927,19 @@ class RFXtrx(eg.RawReceiverPlugin):
                 )
                 pload_msg = (
                     ' temperature: '+sign+tempC+' deg C'+
-                    ' humidity: '+str(int(msg[8], 16))+' %RH'+
+                    ' humidity: '+str(msg.byte(8))+' %RH'+
                     ' status: '+statuses[msg[9]]+
                     ' baro: '+barometer+' hPa'+
                     ' forecast: '+forecasts[msg[12]]+
-                    ' signal: '+str(int(msg[13][0], 16))+
-                    ' battery: '+str(int(msg[13][1], 16))
+                    ' signal: '+str(msg.hi(13))+
+                    ' battery: '+str(msg.lo(13))
                 )
-                decode_param = None
-                mon_param = None
-                try:
-                    decode_param = self.decode_054_mem[base_msg]
-                except:
-                    pass
                 self.eventTrigger(
-                    decode_param,
+                    self.sensors.Swap('054', base_msg, pload_msg),
                     base_msg,
                     pload_msg
                 )
-                try:
-                    mon_param = self.monitor_054_mem[base_msg]
-                except:
-                    pass
-                self.monitor_054_mem[base_msg] = self.eventMonitor(
-                    mon_param,
-                    decode_param,
-                    base_msg,
-                    600.0
-                )
-                self.decode_054_mem[base_msg] = pload_msg
+                self.eventMonitor('054', base_msg, 600.0)
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -1410,7 +1966,7 @@ class RFXtrx(eg.RawReceiverPlugin):
         }
         try:
             #Get the unit ID
-            dev_id = str(int(msg[4]+msg[5], 16))
+            dev_id = str(msg.word(4))
           
             #Get the battery status
             batt_level = battery_statuses[msg[11][1]]
@@ -1423,12 +1979,12 @@ class RFXtrx(eg.RawReceiverPlugin):
                         ' id: '+dev_id
                     )
                     pload_msg = (
-                        ' rainrate: '+str(int(msg[6], 16)*256+
-                            int(msg[7], 16))+' mm/hr'+
-                        ' rainTotal: '+str((int(msg[8], 16)*65535+
-                            int(msg[9], 16)*256+
-                            int(msg[10], 16))/10)+' mm'+
-                        ' signal: '+str(int(msg[11][0], 16))+
+                        ' rainrate: '+str(msg.byte(6)*256+
+                            msg.byte(7))+' mm/hr'+
+                        ' rainTotal: '+str((msg.byte(8)*65535+
+                            msg.byte(9)*256+
+                            msg.byte(10))/10)+' mm'+
+                        ' signal: '+str(msg.hi(11))+
                         ' battery: '+batt_level
                     )
     
@@ -1438,12 +1994,12 @@ class RFXtrx(eg.RawReceiverPlugin):
                         ' id: '+dev_id
                     )
                     pload_msg = (
-                        ' rainrate: '+str((int(msg[6], 16)*256+
-                            int(msg[7], 16))/100)+' mm/hr'+
-                        ' rainTotal: '+str((int(msg[8], 16)*65535+
-                            int(msg[9], 16)*256+
-                            int(msg[10], 16))/10)+' mm'+
-                        ' signal: '+str(int(msg[11][0], 16))+
+                        ' rainrate: '+str((msg.byte(6)*256+
+                            msg.byte(7))/100)+' mm/hr'+
+                        ' rainTotal: '+str((msg.byte(8)*65535+
+                            msg.byte(9)*256+
+                            msg.byte(10))/10)+' mm'+
+                        ' signal: '+str(msg.hi(11))+
                         ' battery: '+batt_level
                     )
     
@@ -1453,34 +2009,18 @@ class RFXtrx(eg.RawReceiverPlugin):
                         ' id: '+dev_id
                     )
                     pload_msg = (
-                        ' rainTotal: '+str((int(msg[8], 16)*65535+
-                            int(msg[9], 16)*256+
-                            int(msg[10], 16))/10)+' mm'+
-                        ' signal: '+str(int(msg[11][0], 16))+
+                        ' rainTotal: '+str((msg.byte(8)*65535+
+                            msg.byte(9)*256+
+                            msg.byte(10))/10)+' mm'+
+                        ' signal: '+str(msg.hi(11))+
                         ' battery: '+batt_level
                     )
-                decode_param = None
-                mon_param = None
-                try:
-                    decode_param = self.decode_055_mem[base_msg]
-                except:
-                    pass
                 self.eventTrigger(
-                    decode_param,
+                    self.sensors.Swap('055', base_msg, pload_msg),
                     base_msg,
                     pload_msg
                 )
-                try:
-                    mon_param = self.monitor_055_mem[base_msg]
-                except:
-                    pass
-                self.monitor_055_mem[base_msg] = self.eventMonitor(
-                    mon_param,
-                    decode_param,
-                    base_msg,
-                    600.0
-                )
-                self.decode_055_mem[base_msg] = pload_msg
+                self.eventMonitor('055', base_msg, 600.0)
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -1512,14 +2052,14 @@ class RFXtrx(eg.RawReceiverPlugin):
         }
         try:
             #Get the unit ID
-            dev_id = str(int(msg[4]+msg[5], 16))
+            dev_id = str(msg.word(4))
             
             #Get the channel value
             #print msg[4]
     
             if int(dev_id) <> 0:
     
-                wind_dir = float(int(msg[6], 16)*256 + int(msg[7], 16))
+                wind_dir = float(msg.byte(6)*256 + msg.byte(7))
                 strDirection = "---"
 
                 if wind_dir > 348.75 or wind_dir < 11.26:
@@ -1557,7 +2097,7 @@ class RFXtrx(eg.RawReceiverPlugin):
 
                 if msg[2]== '04':
                     #Get the correct sign
-                    sign_bt = bin(int(msg[12], 16))[2:].zfill(8)            
+                    sign_bt = bin(msg.byte(12))[2:].zfill(8)            
                     sign = signs[sign_bt[0]]
                     
                     #Calculate the actual temperature
@@ -1565,8 +2105,8 @@ class RFXtrx(eg.RawReceiverPlugin):
                         tempC = str(
                         float(
                             (
-                                int(msg[12], 16)*256 +
-                                int(msg[13], 16))/10.0
+                                msg.byte(12)*256 +
+                                msg.byte(13))/10.0
                             )
                         )
                     
@@ -1575,13 +2115,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                         float(
                             (
                                 (
-                                    int(msg[12], 16) & int('7F', 16))*256 +
-                                    int(msg[13], 16))/10.0
+                                    msg.byte(12) & int('7F', 16))*256 +
+                                    msg.byte(13))/10.0
                                 )
                         )
                  
                     #Get the correct chill sign
-                    chill_sign_bt = bin(int(msg[14], 16))[2:].zfill(8)            
+                    chill_sign_bt = bin(msg.byte(14))[2:].zfill(8)            
                     chill_sign = signs[chill_sign_bt[0]]
                     
                     #Calculate the actual chill
@@ -1589,8 +2129,8 @@ class RFXtrx(eg.RawReceiverPlugin):
                         chillC = str(
                         float(
                             (
-                                int(msg[14], 16)*256 +
-                                int(msg[15], 16))/10.0
+                                msg.byte(14)*256 +
+                                msg.byte(15))/10.0
                             )
                         )
                     
@@ -1599,8 +2139,8 @@ class RFXtrx(eg.RawReceiverPlugin):
                         float(
                         (
                             (
-                                int(msg[14], 16) & int('7F', 16))*256 +
-                                int(msg[15], 16))/10.0
+                                msg.byte(14) & int('7F', 16))*256 +
+                                msg.byte(15))/10.0
                             )
                         )
     
@@ -1610,13 +2150,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                     )
                     pload_msg = (
                         ' direction: '+strDirection+
-                        ' average speed: '+str(int(msg[8], 16)*256+
-                            int(msg[9], 16)/10)+' m/s'+
-                        ' gust: '+str((int(msg[10], 16)*256+
-                            int(msg[11], 16))/10)+' m/s'+
+                        ' average speed: '+str(msg.byte(8)*256+
+                            msg.byte(9)/10)+' m/s'+
+                        ' gust: '+str((msg.byte(10)*256+
+                            msg.byte(11))/10)+' m/s'+
                         ' temperature: '+temp_sign+tempC+' deg C'+
                         ' chill: '+chill_sign+chillC+' deg C'+
-                        ' signal: '+str(int(msg[16][0], 16))+
+                        ' signal: '+str(msg.hi(16))+
                         ' battery: '+battery_statuses[msg[16][1]]
                     )
     
@@ -1627,9 +2167,9 @@ class RFXtrx(eg.RawReceiverPlugin):
                     )
                     pload_msg = (
                         ' direction: '+strDirection+
-                        ' gust: '+str((int(msg[10], 16)*256+
-                            int(msg[11], 16))/10)+' m/s'+
-                        ' signal: '+str(int(msg[16][0], 16))+
+                        ' gust: '+str((msg.byte(10)*256+
+                            msg.byte(11))/10)+' m/s'+
+                        ' signal: '+str(msg.hi(16))+
                         ' battery: '+battery_statuses[msg[16][1]]
                     )
 
@@ -1640,36 +2180,20 @@ class RFXtrx(eg.RawReceiverPlugin):
                     )
                     pload_msg = (
                         ' direction: '+strDirection+
-                        ' average speed: '+str(int(msg[8], 16)*256+
-                            int(msg[9], 16)/10)+' m/s'+
-                        ' gust: '+str((int(msg[10], 16)*256+
-                            int(msg[11], 16))/10)+' m/s'+
-                        ' signal: '+str(int(msg[16][0], 16))+
+                        ' average speed: '+str(msg.byte(8)*256+
+                            msg.byte(9)/10)+' m/s'+
+                        ' gust: '+str((msg.byte(10)*256+
+                            msg.byte(11))/10)+' m/s'+
+                        ' signal: '+str(msg.hi(16))+
                         ' battery: '+battery_statuses[msg[16][1]]
                     )
 
-                decode_param = None
-                mon_param = None
-                try:
-                    decode_param = self.decode_056_mem[base_msg]
-                except:
-                    pass
                 self.eventTrigger(
-                    decode_param,
+                    self.sensors.Swap('056', base_msg, pload_msg),
                     base_msg,
                     pload_msg
                 )
-                try:
-                    mon_param = self.monitor_056_mem[base_msg]
-                except:
-                    pass
-                self.monitor_056_mem[base_msg] = self.eventMonitor(
-                    mon_param,
-                    decode_param,
-                    base_msg,
-                    600.0
-                )
-                self.decode_056_mem[base_msg] = pload_msg
+                self.eventMonitor('056', base_msg, 600.0)
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -1685,7 +2209,7 @@ class RFXtrx(eg.RawReceiverPlugin):
             '1': '-'
         }
         try:
-            uv_level = int(msg[6], 16)/10
+            uv_level = msg.byte(6)/10
             uv_risk = "----"
 
             if uv_level < 3:
@@ -1702,7 +2226,7 @@ class RFXtrx(eg.RawReceiverPlugin):
             if msg[2]== '01' or msg[2]== '02':
                
                 #Get the unit ID
-                dev_id = str(int(msg[4], 16)*256 + int(msg[5], 16))
+                dev_id = str(msg.byte(4)*256 + msg.byte(5))
                 
                 if int(dev_id) <> 0:
                     base_msg = (
@@ -1712,14 +2236,14 @@ class RFXtrx(eg.RawReceiverPlugin):
                     pload_msg = (
                         ' UV level: '+str(uv_level)+
                         ' status: '+uv_risk+
-                        ' signal: '+str(int(msg[9][0], 16))+
-                        ' battery: '+str(int(msg[9][1], 16))
+                        ' signal: '+str(msg.hi(9))+
+                        ' battery: '+str(msg.lo(9))
                     )
 
             if msg[2]== '03':
 
                 #Get the correct sign
-                sign_bt = bin(int(msg[7], 16))[2:].zfill(8)            
+                sign_bt = bin(msg.byte(7))[2:].zfill(8)            
                 sign = signs[sign_bt[0]]
                 
                 #Calculate the actual temperature
@@ -1727,8 +2251,8 @@ class RFXtrx(eg.RawReceiverPlugin):
                     tempC = str(
                     float(
                     (
-                            int(msg[7], 16)*256 +
-                            int(msg[8], 16))/10.0
+                            msg.byte(7)*256 +
+                            msg.byte(8))/10.0
                         )
                     )
 
@@ -1737,13 +2261,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                     float(
                     (
                         (
-                            int(msg[7], 16) & int('7F', 16))*256 +
-                            int(msg[8], 16))/10.0
+                            msg.byte(7) & int('7F', 16))*256 +
+                            msg.byte(8))/10.0
                         )
                     )
                 
                 #Get the unit ID
-                dev_id = str(int(msg[4], 16)*256 + int(msg[5], 16))
+                dev_id = str(msg.byte(4)*256 + msg.byte(5))
                 
                 if int(dev_id) <> 0:
                     base_msg = (
@@ -1754,32 +2278,16 @@ class RFXtrx(eg.RawReceiverPlugin):
                         ' temperature: '+sign+tempC+' deg C'+
                         ' UV level: '+str(uv_level)+
                         ' status: '+uv_risk+
-                        ' signal: '+str(int(msg[9][0], 16))+
-                        ' battery: '+str(int(msg[9][1], 16))
+                        ' signal: '+str(msg.hi(9))+
+                        ' battery: '+str(msg.lo(9))
                     )
 
-            decode_param = None
-            mon_param = None
-            try:
-                decode_param = self.decode_057_mem[base_msg]
-            except:
-                pass
             self.eventTrigger(
-                decode_param,
+                self.sensors.Swap('057', base_msg, pload_msg),
                 base_msg,
                 pload_msg
             )
-            try:
-                mon_param = self.monitor_057_mem[base_msg]
-            except:
-                pass
-            self.monitor_057_mem[base_msg] = self.eventMonitor(
-                mon_param,
-                decode_param,
-                base_msg,
-                600.0
-            )
-            self.decode_057_mem[base_msg] = pload_msg
+            self.eventMonitor('057', base_msg, 600.0)
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -1790,17 +2298,17 @@ class RFXtrx(eg.RawReceiverPlugin):
         }
         try:
             #Get the unit ID
-            dev_id = str( int(msg[4], 16)*256 + int(msg[5], 16) )
+            dev_id = str( msg.byte(4)*256 + msg.byte(5) )
             
             #Counter
-            counter = str(int(msg[6], 16))
+            counter = str(msg.byte(6))
             
             #Channel 1
             channel_1 = str("%.2f" %
             float(
                 (
-                    int(msg[7], 16)*256 +
-                    int(msg[8], 16))
+                    msg.byte(7)*256 +
+                    msg.byte(8))
                 )/10.0
             )
 
@@ -1808,8 +2316,8 @@ class RFXtrx(eg.RawReceiverPlugin):
             channel_2 = str("%.2f" %
             float(
                 (
-                    int(msg[9], 16)*256 +
-                    int(msg[10], 16))
+                    msg.byte(9)*256 +
+                    msg.byte(10))
                 )/10.0
             )
 
@@ -1817,8 +2325,8 @@ class RFXtrx(eg.RawReceiverPlugin):
             channel_3 = str("%.2f" %
             float(
                 (
-                    int(msg[11], 16)*256 +
-                    int(msg[12], 16))
+                    msg.byte(11)*256 +
+                    msg.byte(12))
                 )/10.0
             )
 
@@ -1833,31 +2341,15 @@ class RFXtrx(eg.RawReceiverPlugin):
                     ' Channel 1: '+channel_1+' A'+
                     ' Channel 2: '+channel_2+' A'+
                     ' Channel 3: '+channel_3+' A'+
-                    ' signal: '+str(int(msg[13][0], 16))+
-                    ' battery: '+str(int(msg[13][1], 16))
+                    ' signal: '+str(msg.hi(13))+
+                    ' battery: '+str(msg.lo(13))
                 )
-                decode_param = None
-                mon_param = None
-                try:
-                    decode_param = self.decode_059_mem[base_msg]
-                except:
-                    pass
                 self.eventTrigger(
-                    decode_param,
+                    self.sensors.Swap('059', base_msg, pload_msg),
                     base_msg,
                     pload_msg
                 )
-                try:
-                    mon_param = self.monitor_059_mem[base_msg]
-                except:
-                    pass
-                self.monitor_059_mem[base_msg] = self.eventMonitor(
-                    mon_param,
-                    decode_param,
-                    base_msg,
-                    600.0
-                )
-                self.decode_059_mem[base_msg] = pload_msg
+                self.eventMonitor('059', base_msg, 600.0)
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -1869,10 +2361,10 @@ class RFXtrx(eg.RawReceiverPlugin):
         }
         try:
             #Get the unit ID
-            dev_id = str( int(msg[4], 16)*256 + int(msg[5], 16) )
+            dev_id = str( msg.byte(4)*256 + msg.byte(5) )
             
             #Counter
-            counter = str(int(msg[6], 16))
+            counter = str(msg.byte(6))
             
             #Instant power consumption in Watts
             instant = str("%.2f" %
@@ -1906,31 +2398,15 @@ class RFXtrx(eg.RawReceiverPlugin):
                     ' Counter: '+counter+
                     ' Instant power usage: '+instant+' W'+
                     ' Total energy usage: '+usage+' Wh'+
-                    ' signal: '+str(int(msg[17][0], 16))+
-                    ' battery: '+str(int(msg[17][1], 16))
+                    ' signal: '+str(msg.hi(17))+
+                    ' battery: '+str(msg.lo(17))
                 )
-                decode_param = None
-                mon_param = None
-                try:
-                    decode_param = self.decode_05A_mem[base_msg]
-                except:
-                    pass
                 self.eventTrigger(
-                    decode_param,
+                    self.sensors.Swap('05A', base_msg, pload_msg),
                     base_msg,
                     pload_msg
                 )
-                try:
-                    mon_param = self.monitor_05A_mem[base_msg]
-                except:
-                    pass
-                self.monitor_05A_mem[base_msg] = self.eventMonitor(
-                    mon_param,
-                    decode_param,
-                    base_msg,
-                    600.0
-                )
-                self.decode_05A_mem[base_msg] = pload_msg
+                self.eventMonitor('05A', base_msg, 600.0)
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -1941,22 +2417,22 @@ class RFXtrx(eg.RawReceiverPlugin):
         }
         try:
             #Get the unit ID
-            dev_id = str( int(msg[4], 16)*256 + int(msg[5], 16) )
+            dev_id = str( msg.byte(4)*256 + msg.byte(5) )
             
             #Counter
-            counter = str(int(msg[6], 16))
+            counter = str(msg.byte(6))
             
             #Instant current consumption in ampere
             ampere_1 = str("%.2f" %
-                float(int(msg[7], 16)*256 + int(msg[8], 16)) / 10.0
+                float(msg.byte(7)*256 + msg.byte(8)) / 10.0
             )
 
             ampere_2 = str("%.2f" %
-                float(int(msg[9], 16)*256 + int(msg[10], 16)) / 10.0
+                float(msg.byte(9)*256 + msg.byte(10)) / 10.0
             )
 
             ampere_3 = str("%.2f" %
-                float(int(msg[11], 16)*256 + int(msg[12], 16)) / 10.0
+                float(msg.byte(11)*256 + msg.byte(12)) / 10.0
             )
 
 
@@ -1971,7 +2447,7 @@ class RFXtrx(eg.RawReceiverPlugin):
                     eval('0x'+msg[18])
                 ) / 223.666
                 
-            if int(msg[6], 16) == 0:
+            if msg.byte(6) == 0:
                 usage = str("%.2f" % f_usage)
 
             if int(dev_id) <> 0:
@@ -1986,31 +2462,15 @@ class RFXtrx(eg.RawReceiverPlugin):
                     ' Current ch2: '+ampere_2+' A'+
                     ' Current ch3: '+ampere_3+' A'+
                     ' Total energy usage: '+usage+' Wh'+
-                    ' signal: '+str(int(msg[19][0], 16))+
-                    ' battery: '+str(int(msg[19][1], 16))
+                    ' signal: '+str(msg.hi(19))+
+                    ' battery: '+str(msg.lo(19))
                 )
-                decode_param = None
-                mon_param = None
-                try:
-                    decode_param = self.decode_05B_mem[base_msg]
-                except:
-                    pass
                 self.eventTrigger(
-                    decode_param,
+                    self.sensors.Swap('05B', base_msg, pload_msg),
                     base_msg,
                     pload_msg
                 )
-                try:
-                    mon_param = self.monitor_05B_mem[base_msg]
-                except:
-                    pass
-                self.monitor_05B_mem[base_msg] = self.eventMonitor(
-                    mon_param,
-                    decode_param,
-                    base_msg,
-                    600.0
-                )
-                self.decode_05B_mem[base_msg] = pload_msg
+                self.eventMonitor('05B', base_msg, 600.0)
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -2038,7 +2498,7 @@ class RFXtrx(eg.RawReceiverPlugin):
        
         try:
             #Get the unit ID
-            dev_id = str(int(msg[4]+msg[5], 16))
+            dev_id = str(msg.word(4))
             
             #Get the channel value
             #print msg[4]
@@ -2047,7 +2507,7 @@ class RFXtrx(eg.RawReceiverPlugin):
 
                 if msg[2]== '00':
                     #Get the correct sign
-                    sign_bt = bin(int(msg[5], 16))[2:].zfill(8)            
+                    sign_bt = bin(msg.byte(5))[2:].zfill(8)            
                     sign = signs[sign_bt[0]]
                     
                     #Calculate the actual temperature
@@ -2055,16 +2515,16 @@ class RFXtrx(eg.RawReceiverPlugin):
                         tempC = str(
                         float(
                             (
-                                int(msg[5], 16)*256 +
-                                int(msg[6], 16))
+                                msg.byte(5)*256 +
+                                msg.byte(6))
                             )/100.0
                         )
     
                     if sign == '-':
                         tempC = str(
                         float(
-                                (int(msg[5], 16) & int('7F', 16))*256 +
-                                 int(msg[6], 16)
+                                (msg.byte(5) & int('7F', 16))*256 +
+                                 msg.byte(6)
                             )/100.0
                         )
                     base_msg = (
@@ -2073,7 +2533,7 @@ class RFXtrx(eg.RawReceiverPlugin):
                     )
                     pload_msg = (
                         ' temperature: '+sign+tempC+' deg C'+
-                        ' signal: '+str(int(msg[7][0], 16))
+                        ' signal: '+str(msg.hi(7))
                     )
 
                 if msg[2]== '01' or msg[2]== '02':
@@ -2081,13 +2541,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                     voltage = str(
                     float(
                         (
-                            int(msg[5], 16)*256 +
-                            int(msg[6], 16))
+                            msg.byte(5)*256 +
+                            msg.byte(6))
                         )
                     )
                     pload_msg = (
                         ' voltage: '+voltage+' mV'+
-                        ' signal: '+str(int(msg[7][0], 16))
+                        ' signal: '+str(msg.hi(7))
                     )
 
                 if msg[2]== '03':
@@ -2095,7 +2555,7 @@ class RFXtrx(eg.RawReceiverPlugin):
                     message = messages[msg[6]]
                     pload_msg = (
                         ' message: '+message+
-                        ' signal: '+str(int(msg[7][0], 16))
+                        ' signal: '+str(msg.hi(7))
                     )
 
                 base_msg = (
@@ -2103,28 +2563,12 @@ class RFXtrx(eg.RawReceiverPlugin):
                     ' id: '+dev_id
                 )
 
-                decode_param = None
-                mon_param = None
-                try:
-                    decode_param = self.decode_070_mem[base_msg]
-                except:
-                    pass
                 self.eventTrigger(
-                    decode_param,
+                    self.sensors.Swap('070', base_msg, pload_msg),
                     base_msg,
                     pload_msg
                 )
-                try:
-                    mon_param = self.monitor_070_mem[base_msg]
-                except:
-                    pass
-                self.monitor_070_mem[base_msg] = self.eventMonitor(
-                    mon_param,
-                    decode_param,
-                    base_msg,
-                    6000.0
-                )
-                self.decode_070_mem[base_msg] = pload_msg
+                self.eventMonitor('070', base_msg, 6000.0)
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -2142,17 +2586,17 @@ class RFXtrx(eg.RawReceiverPlugin):
         )
         try:
             #Get the unit ID
-            dev_id = str( int(msg[4], 16)*256 + int(msg[5], 16) )
+            dev_id = str( msg.byte(4)*256 + msg.byte(5) )
             dev_type = '----'
 
             if int(dev_id) <> 0:
 
                 if msg[2] == '0f': #Identification packet
-                    if int(msg[8], 16) <= int('3f', 16):
+                    if msg.byte(8) <= int('3f', 16):
                         dev_type = firmware_version[0]
-                    elif int(msg[8], 16) <= int('7f', 16):
+                    elif msg.byte(8) <= int('7f', 16):
                         dev_type = firmware_version[1]
-                    elif int(msg[8], 16) <= int('bf', 16):
+                    elif msg.byte(8) <= int('bf', 16):
                         dev_type =firmware_version[2]
                     else:
                         dev_type = firmware_version[3]
@@ -2161,10 +2605,10 @@ class RFXtrx(eg.RawReceiverPlugin):
     
                 if msg[2] == '00': #Normal counter data packet
                     counter = (
-                        (int(msg[6], 16) << 24) +
-                        (int(msg[7], 16) << 16) +
-                        (int(msg[8], 16) << 8) +
-                        (int(msg[9], 16))
+                        (msg.byte(6) << 24) +
+                        (msg.byte(7) << 16) +
+                        (msg.byte(8) << 8) +
+                        (msg.byte(9))
                     )
                     try:
                         dev_type = self.rfxSensors[dev_id]
@@ -2182,31 +2626,14 @@ class RFXtrx(eg.RawReceiverPlugin):
                     )
                     pload_msg = (
                         ' Counter: '+counter+
-                        ' signal: '+str(int(msg[10][0], 16))
+                        ' signal: '+str(msg.hi(10))
                     )
-                    decode_param = None
-                    mon_param = None
-
-                    try:
-                        decode_param = self.decode_071_mem[base_msg]
-                    except:
-                        pass
                     self.eventTrigger(
-                        decode_param,
+                        self.sensors.Swap('071', base_msg, pload_msg),
                         base_msg,
                         pload_msg
                     )
-                    try:
-                        mon_param = self.monitor_071_mem[base_msg]
-                    except:
-                        pass
-                    self.monitor_071_mem[base_msg] = self.eventMonitor(
-                        mon_param,
-                        decode_param,
-                        base_msg,
-                        3900.0
-                    )
-                    self.decode_071_mem[base_msg] = pload_msg
+                    self.eventMonitor('071', base_msg, 3900.0)
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -2276,7 +2703,7 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' command: '+commands[msg[6]]
             )
             pload_msg = (
-                ' signal: '+str(int(msg[7][0], 16))
+                ' signal: '+str(msg.hi(7))
             )
             msg_key = (
                 'Type: '+types[msg[2]]+
@@ -2285,7 +2712,7 @@ class RFXtrx(eg.RawReceiverPlugin):
             )
             msg_value = (
                 ' command: '+commands[msg[6]]+
-                ' signal: '+str(int(msg[7][0], 16))
+                ' signal: '+str(msg.hi(7))
             )
             m_key = (
                 types[msg[2]]+
@@ -2294,19 +2721,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' '+
                 unitcodes[msg[5]]
             )
-            decode_param = None
-            try:
-                decode_param = self.decode_010_mem[msg_key]
-            except:
-                pass
             self.eventTrigger2(
-                decode_param,
+                self.sensors.Swap('010', msg_key, msg_value),
                 base_msg,            
                 pload_msg,
                 msg_value,
                 m_key
             )
-            self.decode_010_mem[msg_key] = msg_value
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -2351,8 +2772,8 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' command: '+commands[msg[9]]
             )
             pload_msg = (
-                ' level: '+str(int(msg[10][0], 16))+
-                ' signal: '+str(int(msg[11][0], 16))
+                ' level: '+str(msg.hi(10))+
+                ' signal: '+str(msg.hi(11))
             )
             msg_key = (
                 'Type: '+types[msg[2]]+
@@ -2361,8 +2782,8 @@ class RFXtrx(eg.RawReceiverPlugin):
             )
             msg_value = (
                 ' command: '+commands[msg[9]]+
-                ' level: '+str(int(msg[10][0], 16))+
-                ' signal: '+str(int(msg[11][0], 16))
+                ' level: '+str(msg.hi(10))+
+                ' signal: '+str(msg.hi(11))
             )
             m_key = (
                 types[msg[2]]+
@@ -2371,19 +2792,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' '+
                 unitcodes[msg[8]]
             )
-            decode_param = None
-            try:
-                decode_param = self.decode_011_mem[msg_key]
-            except:
-                pass
             self.eventTrigger2(
-                decode_param,
+                self.sensors.Swap('011', msg_key, msg_value),
                 base_msg,            
                 pload_msg,
                 msg_value,
                 m_key
             )
-            self.decode_011_mem[msg_key] = msg_value
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -2438,7 +2853,7 @@ class RFXtrx(eg.RawReceiverPlugin):
             )
             pload_msg = (
                 ' level: '+msg[9]+
-                ' signal: '+str(int(msg[9][0], 16))
+                ' signal: '+str(msg.hi(9))
             )
             msg_key = (
                 'Type: '+types[msg[2]]+
@@ -2448,7 +2863,7 @@ class RFXtrx(eg.RawReceiverPlugin):
             msg_value = (
                 ' command: '+commands[msg[8]]+
                 ' level: '+msg[9]+
-                ' signal: '+str(int(msg[9][0], 16))
+                ' signal: '+str(msg.hi(9))
             )
             m_key = (
                 types[msg[2]]+
@@ -2457,19 +2872,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' '+
                 unitcodes[msg[7]]
             )
-            decode_param = None
-            try:
-                decode_param = self.decode_014_00_mem[msg_key]
-            except:
-                pass
             self.eventTrigger2(
-                decode_param,
+                self.sensors.Swap('014_00', msg_key, msg_value),
                 base_msg,            
                 pload_msg,
                 msg_value,
                 m_key
             )
-            self.decode_014_00_mem[msg_key] = msg_value
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -2497,7 +2906,7 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' command: '+commands[msg[8]]
             )
             pload_msg = (
-                ' signal: '+str(int(msg[9][0], 16))
+                ' signal: '+str(msg.hi(9))
             )
             msg_key = (
                 'Type: '+types[msg[2]]+
@@ -2506,7 +2915,7 @@ class RFXtrx(eg.RawReceiverPlugin):
             )
             msg_value = (
                 ' command: '+commands[msg[8]]+
-                ' signal: '+str(int(msg[9][0], 16))
+                ' signal: '+str(msg.hi(9))
             )
             m_key = (
                 types[msg[2]]+
@@ -2515,19 +2924,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' '+
                 unitcodes[msg[7]]
             )
-            decode_param = None
-            try:
-                decode_param = self.decode_014_01_mem[msg_key]
-            except:
-                pass
             self.eventTrigger2(
-                decode_param,
+                self.sensors.Swap('014_01', msg_key, msg_value),
                 base_msg,            
                 pload_msg,
                 msg_value,
                 m_key
             )
-            self.decode_014_01_mem[msg_key] = msg_value
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -2558,7 +2961,7 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' command: '+commands[msg[8]]
             )
             pload_msg = (
-                ' signal: '+str(int(msg[9][0], 16))
+                ' signal: '+str(msg.hi(9))
             )
             msg_key = (
                 'Type: '+types[msg[2]]+
@@ -2567,7 +2970,7 @@ class RFXtrx(eg.RawReceiverPlugin):
             )
             msg_value = (
                 ' command: '+commands[msg[8]]+
-                ' signal: '+str(int(msg[9][0], 16))
+                ' signal: '+str(msg.hi(9))
             )
             m_key = (
                 types[msg[2]]+
@@ -2576,19 +2979,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' '+
                 unitcodes[msg[7]]
             )
-            decode_param = None
-            try:
-                decode_param = self.decode_014_02_mem[msg_key]
-            except:
-                pass
             self.eventTrigger2(
-                decode_param,
+                self.sensors.Swap('014_02', msg_key, msg_value),
                 base_msg,            
                 pload_msg,
                 msg_value,
                 m_key
             )
-            self.decode_014_02_mem[msg_key] = msg_value
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -2631,7 +3028,7 @@ class RFXtrx(eg.RawReceiverPlugin):
         }
         try:
             #Get the unit ID
-            dev_id = str( int(msg[4], 16)*256 + int(msg[5], 16) )
+            dev_id = str( msg.byte(4)*256 + msg.byte(5) )
 
             if int(dev_id) <> 0:
                 base_msg = (
@@ -2642,7 +3039,7 @@ class RFXtrx(eg.RawReceiverPlugin):
                     ' command: '+commands[msg[8]]
                 )
                 pload_msg = (
-                    ' signal: '+str(int(msg[11][0], 16))
+                    ' signal: '+str(msg.hi(11))
                 )
             msg_key = (
                 'Type: '+types[msg[2]]+
@@ -2652,7 +3049,7 @@ class RFXtrx(eg.RawReceiverPlugin):
             )
             msg_value = (
                 ' command: '+commands[msg[8]]+
-                ' signal: '+str(int(msg[11][0], 16))
+                ' signal: '+str(msg.hi(11))
             )
             m_key = (
                 types[msg[2]]+
@@ -2665,19 +3062,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' '+
                 unitcodes[msg[7]]
             )
-            decode_param = None
-            try:
-                decode_param = self.decode_015_mem[msg_key]
-            except:
-                pass
             self.eventTrigger2(
-                decode_param,
+                self.sensors.Swap('015', msg_key, msg_value),
                 base_msg,            
                 pload_msg,
                 msg_value,
                 m_key
             )
-            self.decode_015_mem[msg_key] = msg_value
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -2736,8 +3127,8 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' command: '+commands[msg[6]]
             )
             pload_msg = (
-                ' battery: '+str(int(msg[7][1], 16))+
-                ' signal: '+str(int(msg[7][0], 16))
+                ' battery: '+str(msg.lo(7))+
+                ' signal: '+str(msg.hi(7))
             )
             msg_key = (
                 'Type: '+types[msg[2]]+
@@ -2746,8 +3137,8 @@ class RFXtrx(eg.RawReceiverPlugin):
             )
             msg_value = (
                 ' command: '+commands[msg[6]]+
-                ' battery: '+str(int(msg[7][1], 16))+
-                ' signal: '+str(int(msg[7][0], 16))
+                ' battery: '+str(msg.lo(7))+
+                ' signal: '+str(msg.hi(7))
             )
             m_key = (
                 types[msg[2]]+
@@ -2756,19 +3147,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' '+
                 unitcodes[msg[5]]
             )
-            decode_param = None
-            try:
-                decode_param = self.decode_018_019_mem[msg_key]
-            except:
-                pass
             self.eventTrigger2(
-                decode_param,
+                self.sensors.Swap('018_019', msg_key, msg_value),
                 base_msg,            
                 pload_msg,
                 msg_value,
                 m_key
             )
-            self.decode_018_019_mem[msg_key] = msg_value
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -2815,8 +3200,8 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' command: '+commands[msg[8]]
             )
             pload_msg = (
-                ' battery: '+str(int(msg[9][1], 16))+
-                ' signal: '+str(int(msg[9][0], 16))
+                ' battery: '+str(msg.lo(9))+
+                ' signal: '+str(msg.hi(9))
             )
             msg_key = (
                 'Type: '+types[msg[2]]+
@@ -2825,8 +3210,8 @@ class RFXtrx(eg.RawReceiverPlugin):
             )
             msg_value = (
                 ' command: '+commands[msg[6]]+
-                ' battery: '+str(int(msg[7][1], 16))+
-                ' signal: '+str(int(msg[7][0], 16))
+                ' battery: '+str(msg.lo(7))+
+                ' signal: '+str(msg.hi(7))
             )
             m_key = (
                 types[msg[2]]+
@@ -2835,19 +3220,13 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' '+
                 unitcodes[msg[7]]
             )
-            decode_param = None
-            try:
-                decode_param = self.decode_018_019_mem[msg_key]
-            except:
-                pass
             self.eventTrigger2(
-                decode_param,
+                self.sensors.Swap('018_019', msg_key, msg_value),
                 base_msg,            
                 pload_msg,
                 msg_value,
                 m_key
             )
-            self.decode_018_019_mem[msg_key] = msg_value
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -2901,8 +3280,8 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' status: '+statuses[msg[7]]
             )
             pload_msg = (
-                ' battery: '+str(int(msg[8][1], 16))+
-                ' signal: '+str(int(msg[8][0], 16))
+                ' battery: '+str(msg.lo(8))+
+                ' signal: '+str(msg.hi(8))
             )
             msg_key = (
                 'Type: '+types[msg[2]]+
@@ -2910,22 +3289,16 @@ class RFXtrx(eg.RawReceiverPlugin):
             )
             msg_value = (
                 ' status: '+statuses[msg[7]]+
-                ' battery: '+str(int(msg[8][1], 16))+
-                ' signal: '+str(int(msg[8][0], 16))
+                ' battery: '+str(msg.lo(8))+
+                ' signal: '+str(msg.hi(8))
             )
             m_key = (
                 types[msg[2]]+
                 ' '+
                 msg[4]+' '+msg[5]+' '+msg[6]
             )
-            decode_param = None
-            mon_param = None
-            try:
-                decode_param = self.decode_020_mem[msg_key]
-            except:
-                pass
             self.eventTrigger2(
-                decode_param,
+                self.sensors.Swap('020', msg_key, msg_value),
                 base_msg,            
                 pload_msg,
                 msg_value,
@@ -2937,17 +3310,11 @@ class RFXtrx(eg.RawReceiverPlugin):
                 types[msg[2]]=='04' or
                 types[msg[2]]=='05'
             ):
-                try:
-                    mon_param = self.monitor_020_mem[base_msg]
-                except:
-                    pass
-                self.monitor_020_mem[base_msg] = self.eventMonitor(
-                    mon_param,
-                    decode_param,
+                self.eventMonitor(
+                    '020',
                     base_msg,
                     15000.0 #250 minutes timeout
                 )
-            self.decode_020_mem[msg_key] = msg_value
         except:
             eg.PrintError(self.text.decodeError + str(msg))
 
@@ -3310,7 +3677,7 @@ class RFXtrx(eg.RawReceiverPlugin):
                 ' remotekey: '+self.remotekey
             )
             pload_msg = (
-                ' signal: '+str(int(msg[6][0], 16))
+                ' signal: '+str(msg.hi(6))
             )
             self.eventRemote(
                 base_msg,            
@@ -10667,3 +11034,238 @@ class decode_Test_Message(eg.ActionClass):
                 msg
             )
              
+
+
+
+class BenchmarkDispatcher(eg.ActionClass):
+        
+    def __call__(self, fileName, rounds):
+        frames = LoadFrameCorpus(fileName)
+        if not frames:
+            eg.PrintError(self.text.noFrames + fileName)
+            return None
+        result = BenchmarkDispatch(frames, rounds)
+        print self.text.result % (
+            len(frames),
+            rounds,
+            result['legacy'],
+            result['table'],
+            result['mismatches']
+        )
+        return result
+
+
+    def Configure(
+        self,
+        fileName = '',
+        rounds = 100
+    ):
+        text = self.text
+        panel = eg.ConfigPanel(self)
+        mySizer_1 = wx.GridBagSizer(10, 10)
+
+        fileCtrl = eg.FileBrowseButton(
+            panel,
+            -1,
+            initialValue=fileName,
+            fileMask="*.*"
+        )
+        fileCtrl.SetInitialSize((250,-1))
+        mySizer_1.Add(wx.StaticText(panel, -1, text.corpusFile), (0,0))
+        mySizer_1.Add(fileCtrl, (0,1))
+
+        roundsCtrl = panel.SpinIntCtrl(rounds, 1, 100000)
+        mySizer_1.Add(wx.StaticText(panel, -1, text.rounds), (1,0))
+        mySizer_1.Add(roundsCtrl, (1,1))
+
+        panel.sizer.Add(mySizer_1, 0, flag = wx.EXPAND)
+
+        while panel.Affirmed():
+            panel.SetResult(
+                fileCtrl.GetValue(),
+                roundsCtrl.GetValue()
+            )
+
+
+    class text:
+        corpusFile = "Frame corpus (capture file or one hex frame per line)"
+        rounds = "Number of replay rounds"
+        noFrames = "No frames found in "
+        result = (
+            "%d frames x %d rounds: legacy %.0f frames/s, "
+            "table %.0f frames/s, %d routed differently"
+        )
+
+
+
+class BenchmarkSensorRegistry(eg.ActionClass):
+        
+    def __call__(self, frames):
+        results = []
+        for sensorCount in (1000, 10000):
+            result = BenchmarkSensors(sensorCount, frames)
+            print self.text.result % (
+                sensorCount,
+                frames,
+                result['registry'],
+                result['scheduler']
+            )
+            results.append(result)
+        return results
+
+
+    def Configure(
+        self,
+        frames = 100000
+    ):
+        panel = eg.ConfigPanel(self)
+        mySizer_1 = wx.GridBagSizer(10, 10)
+
+        framesCtrl = panel.SpinIntCtrl(frames, 1000, 10000000)
+        mySizer_1.Add(wx.StaticText(panel, -1, self.text.frames), (0,0))
+        mySizer_1.Add(framesCtrl, (0,1))
+
+        panel.sizer.Add(mySizer_1, 0, flag = wx.EXPAND)
+
+        while panel.Affirmed():
+            panel.SetResult(
+                framesCtrl.GetValue()
+            )
+
+
+    class text:
+        frames = "Number of simulated frames"
+        result = (
+            "%d sensors, %d frames: registry %.0f frames/s, "
+            "scheduler heap %.0f frames/s"
+        )
+
+
+
+class CaptureFrames(eg.ActionClass):
+        
+    def __call__(self, start, fileName):
+        if start:
+            self.plugin.StartCapture(fileName)
+            print self.text.started + fileName
+        else:
+            print self.text.stopped % self.plugin.StopCapture()
+
+
+    def Configure(
+        self,
+        start = True,
+        fileName = ''
+    ):
+        text = self.text
+        panel = eg.ConfigPanel(self)
+        mySizer_1 = wx.GridBagSizer(10, 10)
+
+        startCtrl = wx.Choice(panel, -1, choices=[text.stop, text.start])
+        startCtrl.SetSelection(int(start))
+        mySizer_1.Add(wx.StaticText(panel, -1, text.action), (0,0))
+        mySizer_1.Add(startCtrl, (0,1))
+
+        fileCtrl = eg.FileBrowseButton(
+            panel,
+            -1,
+            initialValue=fileName,
+            fileMask="*.*"
+        )
+        fileCtrl.SetInitialSize((250,-1))
+        mySizer_1.Add(wx.StaticText(panel, -1, text.captureFile), (1,0))
+        mySizer_1.Add(fileCtrl, (1,1))
+
+        panel.sizer.Add(mySizer_1, 0, flag = wx.EXPAND)
+
+        while panel.Affirmed():
+            panel.SetResult(
+                startCtrl.GetSelection() == 1,
+                fileCtrl.GetValue()
+            )
+
+
+    class text:
+        action = "Capture of received frames"
+        start = "Start"
+        stop = "Stop"
+        captureFile = "Capture file"
+        started = "Capturing received frames to "
+        stopped = "Capture stopped, %d frames written"
+
+
+
+class ReplayCapture(eg.ActionClass):
+        
+    def __call__(self, fileName, realTime):
+        if IsCaptureFile(fileName):
+            frames = ReadCapture(fileName)
+        else:
+            frames = [(0.0, frame) for frame in LoadFrameCorpus(fileName)]
+        if not frames:
+            eg.PrintError(self.text.noFrames + fileName)
+            return None
+        result = ReplayFrames(self.plugin, frames, realTime)
+        print self.text.result % (
+            result['frames'],
+            result['events'],
+            result['framesPerSecond'],
+            result['allocationsPerFrame']
+        )
+        for decoder in sorted(result['decoders']):
+            stats = result['decoders'][decoder]
+            print self.text.decoder % (
+                decoder,
+                stats['frames'],
+                stats['p50'],
+                stats['p90'],
+                stats['p99'],
+                stats['max']
+            )
+        return result
+
+
+    def Configure(
+        self,
+        fileName = '',
+        realTime = False
+    ):
+        text = self.text
+        panel = eg.ConfigPanel(self)
+        mySizer_1 = wx.GridBagSizer(10, 10)
+
+        fileCtrl = eg.FileBrowseButton(
+            panel,
+            -1,
+            initialValue=fileName,
+            fileMask="*.*"
+        )
+        fileCtrl.SetInitialSize((250,-1))
+        mySizer_1.Add(wx.StaticText(panel, -1, text.captureFile), (0,0))
+        mySizer_1.Add(fileCtrl, (0,1))
+
+        realTimeCtrl = wx.CheckBox(panel, -1, "")
+        realTimeCtrl.SetValue(realTime)
+        mySizer_1.Add(wx.StaticText(panel, -1, text.realTime), (1,0))
+        mySizer_1.Add(realTimeCtrl, (1,1))
+
+        panel.sizer.Add(mySizer_1, 0, flag = wx.EXPAND)
+
+        while panel.Affirmed():
+            panel.SetResult(
+                fileCtrl.GetValue(),
+                realTimeCtrl.GetValue()
+            )
+
+
+    class text:
+        captureFile = "Capture file (or one hex frame per line)"
+        realTime = "Replay with the recorded timing"
+        noFrames = "No frames found in "
+        result = (
+            "%d frames, %d events, %.0f frames/s, "
+            "%.1f objects allocated per frame"
+        )
+        decoder = (
+            "%s: %d frames, latency us p50 %.1f p90 %.1f p99 %.1f max %.1f"
+        )
@@ -123,24 +123,25 @@ import os
 import posixpath
 import base64
 import time
-import urllib2
 import socket
 import json
 import mimetypes
 import logging
 from re import compile, IGNORECASE
-from httplib import HTTPResponse
-from threading import Thread, Event
+from httplib import HTTPConnection, HTTPSConnection, HTTPException
+from threading import Thread, Event, Lock, Condition
+from collections import Mapping, OrderedDict, deque
 from urllib import unquote, unquote_plus
+from urlparse import urlsplit
 from os.path import getmtime, split, splitdrive, join, isfile
 from wx.lib.mixins.listctrl import TextEditMixin
 from jinja2 import BaseLoader, Environment, TemplateNotFound
-from copy import deepcopy as cpy
+from jinja2 import meta
 import tornado.ioloop
 import tornado.web
 import tornado.websocket
 import tornado.httpserver
-from tornado import httputil
+from tornado import httputil, stack_context
 from tornado.escape import _unicode
 from tornado.util import basestring_type
 SYS_VSCROLL_X = wx.SystemSettings.GetMetric(wx.SYS_VSCROLL_X)
@@ -228,6 +229,148 @@ class KeysAsAttrs:
             raise AttributeError(key)
 #===============================================================================
 
+class ChangeFeed(object):
+    # Every update of a variable gets the next sequence number and moves the
+    # variable to the end of the (ordered) version table. A client only keeps
+    # the sequence number it has seen last (cursor), plus the keys it already
+    # got through GetValue after that, so a poll costs O(changed keys).
+
+    def __init__(self, clientTimeout = 3600):
+        self.lock = Lock()
+        self.seq = 0
+        self.versions = OrderedDict() # key -> seq, oldest change first
+        self.clients = {}             # client -> [cursor, seen, lastPoll]
+        self.clientTimeout = clientTimeout
+        self.lastSweep = time.time()
+
+
+    def Touch(self, key):
+        with self.lock:
+            self.seq += 1
+            self.versions.pop(key, None)
+            self.versions[key] = self.seq
+
+
+    def Remove(self, key):
+        with self.lock:
+            self.seq += 1
+            self.versions.pop(key, None)
+
+
+    def GetVersions(self, keys):
+        # None if any of the keys is not a published variable
+        with self.lock:
+            try:
+                return tuple([self.versions[key] for key in keys])
+            except KeyError:
+                return None
+
+
+    def Changed(self, since):
+        if since > self.seq: # cursor from before a restart
+            since = 0
+        keys = []
+        for key in reversed(self.versions):
+            if self.versions[key] <= since:
+                break
+            keys.append(key)
+        return keys
+
+
+    def GetClient(self, client, now):
+        rec = self.clients.get(client)
+        if rec is None:
+            rec = self.clients[client] = [0, {}, now]
+        else:
+            rec[2] = now
+        return rec
+
+
+    def MarkSeen(self, key, client):
+        with self.lock:
+            rec = self.GetClient(client, time.time())
+            version = self.versions.get(key, 0)
+            if version > rec[0]:
+                rec[1][key] = version
+
+
+    def MarkAllSeen(self, client):
+        with self.lock:
+            rec = self.GetClient(client, time.time())
+            rec[0] = self.seq
+            rec[1] = {}
+
+
+    def Poll(self, client):
+        with self.lock:
+            now = time.time()
+            rec = self.GetClient(client, now)
+            cursor, seen = rec[0], rec[1]
+            keys = [
+                k for k in self.Changed(cursor) if seen.get(k) != self.versions[k]
+            ]
+            rec[0] = self.seq
+            rec[1] = {}
+            if now - self.lastSweep > 60:
+                self.lastSweep = now
+                self.Evict(self.clientTimeout, now)
+            return keys
+
+
+    def Since(self, since):
+        with self.lock:
+            return self.seq, self.Changed(since)
+
+
+    def Evict(self, maxAge = 0, now = None):
+        # Forgets clients that did not poll for maxAge seconds. An evicted
+        # client simply gets all values again with its next poll.
+        now = now or time.time()
+        for client in [
+            c for c, rec in self.clients.iteritems() if now - rec[2] >= maxAge
+        ]:
+            del self.clients[client]
+#===============================================================================
+
+class TemplateVars(Mapping):
+    # Read only view of the published variables and the template globals,
+    # used as the template context instead of a (deep) copy of them.
+    # Jinja copies the context (get_all().copy()) when rendering fails.
+
+    def __init__(self, *mappings):
+        self.mappings = mappings
+
+    def __contains__(self, key):
+        for mapping in self.mappings:
+            if key in mapping:
+                return True
+        return False
+
+    def __getitem__(self, key):
+        for mapping in self.mappings:
+            if key in mapping:
+                return mapping[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        keys = set()
+        for mapping in self.mappings:
+            keys.update(mapping)
+        return list(keys)
+
+    def copy(self):
+        merged = {}
+        for mapping in reversed(self.mappings):
+            merged.update(mapping)
+        return merged
+#===============================================================================
+
 class VarTable(wx.ListCtrl, TextEditMixin):
 
     def __init__(self, parent, txt, edit):
@@ -399,6 +542,7 @@ class VariableDialog(wx.Frame):
                 for key, value in data.iteritems():
                     if key not in pubPerVars or value != pubPerVars[key]:
                         pubPerVars[key] = value
+                        self.plugin.feed.Touch(key)
                         flag = True
                 if flag or len(deleted):
                     wx.CallAfter(self.plugin.SetDocIsDirty)
@@ -492,13 +636,10 @@ def translate_path(handler, path):
 def SendContent(handler, path):
     fsPath = translate_path(handler, path)
     try:
-        template = handler.environment.get_template(fsPath)
+        content = handler.application.RenderTemplate(fsPath)
     except TemplateNotFound:
         handler.send_error(404, "File not found")
         return
-    kwargs = cpy(handler.plugin.pubVars)
-    kwargs.update(handler.plugin.pubPerVars)
-    content = template.render(**kwargs)
     handler.write(content)
 
 
@@ -532,6 +673,7 @@ def ClientChoice(evt, text, panel, id3, id4, cl_ip, cl_port, size2, rBMC):
 
 class FileLoader(BaseLoader):
     """Loads templates from the file system."""
+    checkInterval = 1.0 # seconds between two mtime checks of a template
 
     def get_source(self, environment, filename):
         try:
@@ -544,7 +686,12 @@ class FileLoader(BaseLoader):
             sourceFile.close()
 
         mtime = getmtime(filename)
+        checked = [time.time()]
         def uptodate():
+            now = time.time()
+            if now - checked[0] < self.checkInterval:
+                return True
+            checked[0] = now
             try:
                 return getmtime(filename) == mtime
             except OSError:
@@ -624,11 +771,13 @@ Server time: %s</span>
 #===============================================================================
 
 class CommonHandler(tornado.web.StaticFileHandler):
+    eventTimeout = 10.0 # default for "timeout=<seconds>" in the query
+
     def initialize(self, path, plugin):
         self.plugin = plugin
         self.logger = plugin.logger
-        self.environment = Environment(loader=FileLoader())
-        self.environment.globals = eg.globals.__dict__
+        self.pending = None
+        self.environment = self.application.environment
         self.client_address = self.request.connection.address
         tornado.web.StaticFileHandler.initialize(self, path)
 
@@ -672,6 +821,7 @@ class CommonHandler(tornado.web.StaticFileHandler):
         self.set_header("Content-Type", case)
 
 
+    @tornado.web.asynchronous
     def get(self, path, include_body = True):
         # First do Basic HTTP-Authentication, if set
         if not Authenticate(self):
@@ -683,18 +833,70 @@ class CommonHandler(tornado.web.StaticFileHandler):
             queries = [unquote_plus(part).decode("latin1") for part in queries]
             if len(queries) > 0:
                 event = queries.pop(0).strip()
+                wait = True
+                timeout = self.eventTimeout
+                if "noWait" in queries: # fire and forget
+                    queries.remove("noWait")
+                    wait = False
+                for query in queries:
+                    if query.startswith("timeout="):
+                        queries.remove(query)
+                        try:
+                            timeout = float(query[8:])
+                        except ValueError:
+                            pass
+                        break
                 if "withoutRelease" in queries:
                     queries.remove("withoutRelease")
                     event = self.plugin.TriggerEnduringEvent(event, queries)
-                    while not event.isEnded:
-                        time.sleep(0.1)
                 elif event == "ButtonReleased":
                     self.plugin.EndLastEvent()
+                    event = None
                 else:
                     event = self.plugin.TriggerEvent(event, queries)
-                    while not event.isEnded:
-                        time.sleep(0.1)
+                if event is not None and wait:
+                    self.WaitForEvent(event, timeout, path, include_body)
+                    return
+        self.SendPath(path, include_body)
+
+
+    def WaitForEvent(self, event, timeout, path, include_body):
+        # The event is executed in the EventGhost thread. Instead of sleeping
+        # here (and so blocking every other client of the IOLoop) the reply
+        # is sent from an IOLoop callback as soon as the event has ended or
+        # the timeout has expired.
+        ioloop = tornado.ioloop.IOLoop.instance()
+
+        def Resume(timedOut):
+            if self.pending is None:
+                return
+            ioloop.remove_timeout(self.pending)
+            self.pending = None
+            if timedOut:
+                self.logger.warning(
+                    "Event %s has not ended within %.1f s",
+                    event.string,
+                    timeout
+                )
+            self.SendPath(path, include_body)
+
+        Resume = stack_context.wrap(Resume)
+        self.pending = ioloop.add_timeout(
+            time.time() + timeout,
+            lambda: Resume(True)
+        )
+        event.AddUpFunc(ioloop.add_callback, Resume, False)
+        if event.isEnded:
+            ioloop.add_callback(Resume, False)
+
+
+    def on_connection_close(self):
+        if self.pending is not None:
+            tornado.ioloop.IOLoop.instance().remove_timeout(self.pending)
+            self.pending = None
 
+
+    def SendPath(self, path, include_body):
         if path.endswith('/'):
             path = path[:-1]
 
@@ -713,7 +915,19 @@ class CommonHandler(tornado.web.StaticFileHandler):
                     exc_info=True
                 )
         else:
-            tornado.web.StaticFileHandler.get(self, path, include_body)
+            result = tornado.web.StaticFileHandler.get(self, path, include_body)
+            if result is not None: # a Future (coroutine in Tornado 4)
+                tornado.ioloop.IOLoop.instance().add_future(
+                    result,
+                    lambda future: self.Finish()
+                )
+                return
+        self.Finish()
+
+
+    def Finish(self):
+        if not self._finished:
+            self.finish()
 
 #    def post(self, *args, **kwargs):
     def post(self, path):
@@ -746,7 +960,6 @@ class CommonHandler(tornado.web.StaticFileHandler):
                         i+=1
                         if i<len(data):
                             content+=self.plugin.valueSplitter
-                        time.sleep(0.05)
                 elif data[0]=="ExecuteScript":
                     while i<len(data):
                         try:
@@ -768,7 +981,6 @@ class CommonHandler(tornado.web.StaticFileHandler):
                         i+=1
                         if i<len(data):
                             content+=self.plugin.valueSplitter
-                        time.sleep(0.05)
                 elif data[0]=="GetValue":
                     while i<len(data):
                         try:
@@ -781,7 +993,6 @@ class CommonHandler(tornado.web.StaticFileHandler):
                         i+=1
                         if i<len(data):
                             content+=self.plugin.valueSplitter
-                        time.sleep(0.05)
                 elif data[0]=="GetPersistentValue":
                     while i<len(data):
                         try:
@@ -794,7 +1005,6 @@ class CommonHandler(tornado.web.StaticFileHandler):
                         i+=1
                         if i<len(data):
                             content+=self.plugin.valueSplitter
-                        time.sleep(0.05)
                 elif data[0]=="SetValue":
                     try:
                         plugin.SetValue(data[1], data[2])
@@ -821,6 +1031,13 @@ class CommonHandler(tornado.web.StaticFileHandler):
                         )
                     except:
                         content = "False"
+                elif data[0]=="GetChangesSince":
+                    try:
+                        content = json.dumps(
+                            plugin.GetChangesSince(int(data[1]))
+                        )
+                    except:
+                        content = "False"
                 elif data[0] == "TriggerEnduringEvent":
                     try:
                         plugin.TriggerEnduringEvent(data[1], data[2:])
@@ -868,15 +1085,23 @@ class CommonHandler(tornado.web.StaticFileHandler):
 #===============================================================================     
 
 class wsHandler(tornado.websocket.WebSocketHandler):
+    maxQueue = 100      # messages waiting for a slow client
+    slowTimeout = 30.0  # seconds a client may keep its queue full
+
     def initialize(self, plugin):
         self.plugin = plugin
         self.client_address = self.request.connection.address
+        self.outbox = deque()
+        self.outboxBytes = 0
+        self.fullSince = None
+        self.closing = False
 
 
     def write_message(self, message, binary=False):
+        # IOLoop thread only, other threads use plugin.ServerSendMessage
         if isinstance(message, dict):
             message = tornado.escape.json_encode(message)
-        self.ws_connection.write_message(message, binary=binary)        
+        self.Send(tornado.escape.utf8(message), binary)
         self.application.logger.info(
             "WS_MESSAGE --> %s: %s",
             repr(self.client_address),
@@ -884,6 +1109,55 @@ class wsHandler(tornado.websocket.WebSocketHandler):
         )
 
 
+    def Send(self, data, binary = False):
+        # Queues an encoded message. When the queue of a slow client is full
+        # the oldest message is dropped; a client that stays full for longer
+        # than slowTimeout is disconnected.
+        if self.ws_connection is None or self.closing:
+            return
+        outbox = self.outbox
+        if len(outbox) >= self.maxQueue:
+            now = time.time()
+            if self.fullSince is None:
+                self.fullSince = now
+            elif now - self.fullSince > self.slowTimeout:
+                self.application.wsDisconnected += 1
+                self.application.logger.warning(
+                    "WebSocket  *** %s: slow client disconnected",
+                    repr(self.client_address)
+                )
+                self.ClearOutbox()
+                self.closing = True
+                self.close()
+                return
+            self.outboxBytes -= len(outbox.popleft()[0])
+            self.application.wsDropped += 1
+        outbox.append((data, binary))
+        self.outboxBytes += len(data)
+        self.Flush()
+
+
+    def Flush(self):
+        conn = self.ws_connection
+        if conn is None:
+            self.ClearOutbox()
+            return
+        if conn.stream.writing():
+            return # retried by TornadoApplication.FlushClients
+        outbox = self.outbox
+        while outbox:
+            data, binary = outbox.popleft()
+            conn.write_message(data, binary = binary)
+        self.outboxBytes = 0
+        self.fullSince = None
+
+
+    def ClearOutbox(self):
+        self.outbox.clear()
+        self.outboxBytes = 0
+        self.fullSince = None
+
+
     def open(self):
         self.plugin.TriggerEvent(
             self.plugin.text.wsClientConn,
@@ -956,6 +1230,7 @@ class wsHandler(tornado.websocket.WebSocketHandler):
         )
         if self.client_address in self.plugin.wsClients:
             del self.plugin.wsClients[self.client_address]
+        self.ClearOutbox()
         self.application.logger.info(
             "WebSocket  *** %s: %s",
             repr(self.client_address),
@@ -984,12 +1259,25 @@ class ServerThread(Thread):
 #===============================================================================
 
 class TornadoApplication(tornado.web.Application):
+    templateCacheSize = 100 # compiled templates
+    renderCacheSize = 64    # rendered pages, 0 = do not cache
 
     def __init__(self, plugin, port, wsFolder, ssl_options):
         self.ssl_options = ssl_options
         self.logger = plugin.logger
         self.port = port 
         self.plugin = plugin
+        self.environment = Environment(
+            loader = FileLoader(),
+            cache_size = self.templateCacheSize
+        )
+        self.environment.globals = eg.globals.__dict__
+        # Without the globals, so that find_undeclared_variables reports them
+        self.analyzer = Environment()
+        self.rendered = OrderedDict() # path: [template, names, versions, text]
+        self.instance = None
+        self.wsDropped = 0
+        self.wsDisconnected = 0
         self.repeatTimer = eg.ResettableTimer(self.plugin.EndLastEvent)
         root = plugin.basepath
         handlers=[
@@ -1013,6 +1301,12 @@ class TornadoApplication(tornado.web.Application):
         #self.http_server.bind(self.port)
         #self.http_server.start(0)
         self.instance = tornado.ioloop.IOLoop.instance()
+        self.flusher = tornado.ioloop.PeriodicCallback(
+            self.FlushClients,
+            100,
+            self.instance
+        )
+        self.flusher.start()
         sr = int(self.ssl_options is None)
         print self.plugin.text.started % (self.plugin.text.secur[sr], self.port)
         self.instance.start() # loop started ...
@@ -1020,6 +1314,7 @@ class TornadoApplication(tornado.web.Application):
 
     def Stop(self):
         self.repeatTimer.Stop()
+        self.flusher.stop()
         if self.instance:
             self.instance.stop()
         if self.http_server:
@@ -1027,6 +1322,65 @@ class TornadoApplication(tornado.web.Application):
         print self.plugin.text.stopped % self.port
 
 
+    def Broadcast(self, data):
+        for client in self.plugin.wsClients.values():
+            client.Send(data)
+
+
+    def FlushClients(self):
+        for client in self.plugin.wsClients.values():
+            if client.outbox:
+                client.Flush()
+
+
+    def RenderTemplate(self, fsPath):
+        # A rendered page is reused as long as the template is the same and
+        # none of the variables it refers to has been changed since. Pages
+        # with includes or names that are not published variables (e.g.
+        # eg.globals) are always rendered.
+        template = self.environment.get_template(fsPath)
+        entry = self.rendered.pop(fsPath, None)
+        if entry is None or entry[0] is not template:
+            entry = [template, self.GetTemplateNames(template), None, None]
+        names = entry[1]
+        versions = None
+        if names is not None and self.renderCacheSize:
+            versions = self.plugin.feed.GetVersions(names)
+            if versions is not None and versions == entry[2]:
+                self.rendered[fsPath] = entry
+                return entry[3]
+        plugin = self.plugin
+        context = template.new_context(
+            TemplateVars(plugin.pubPerVars, plugin.pubVars, template.globals),
+            shared = True
+        )
+        try:
+            content = u"".join(template.root_render_func(context))
+        except Exception:
+            self.environment.handle_exception()
+        if versions is not None:
+            entry[2] = versions
+            entry[3] = content
+            self.rendered[fsPath] = entry
+            while len(self.rendered) > self.renderCacheSize:
+                self.rendered.popitem(last = False)
+        return content
+
+
+    def GetTemplateNames(self, template):
+        try:
+            source = self.environment.loader.get_source(
+                self.environment,
+                template.filename
+            )[0]
+            ast = self.analyzer.parse(source)
+        except Exception:
+            return None
+        if list(meta.find_referenced_templates(ast)):
+            return None
+        return tuple(meta.find_undeclared_variables(ast))
+
+
     def log_request(self, handler):
         request_time = 1000.0 * handler.request.request_time()
         if handler.get_status() < 400:
@@ -2532,6 +2886,265 @@ class WsStopClientPeriodicTasks(eg.ActionBase):
             )
 #===============================================================================
 
+class EventClient(object):
+    # Keep-alive (HTTP/1.1) connections to other EventGhost webservers,
+    # pooled per target and shared by all SendEvent/SendEventExt actions.
+    maxIdle = 4
+
+    def __init__(self, timeout = 2.0):
+        self.timeout = timeout
+        self.lock = Lock()
+        self.idle = {} # (scheme, host, port) -> idle connections
+        self.basicAuth = set() # targets that answered 401 without it
+
+
+    def Acquire(self, target):
+        with self.lock:
+            idle = self.idle.get(target)
+            if idle:
+                return idle.pop(), True
+        scheme, host, port = target
+        if scheme == "https":
+            conn = HTTPSConnection(host, port, timeout = self.timeout)
+        else:
+            conn = HTTPConnection(host, port, timeout = self.timeout)
+        return conn, False
+
+
+    def Release(self, target, conn):
+        with self.lock:
+            idle = self.idle.setdefault(target, [])
+            if len(idle) < self.maxIdle:
+                idle.append(conn)
+                return
+        conn.close()
+
+
+    def Close(self):
+        # Closes the idle connections. The ones in use are released to the
+        # new (empty) pool.
+        with self.lock:
+            idle = self.idle
+            self.idle = {}
+        for conns in idle.itervalues():
+            for conn in conns:
+                conn.close()
+
+
+    def Post(self, target, path, body, headers):
+        # A pooled connection, that the server has closed in the meantime,
+        # is retried once on a new one. A timeout is never retried, the
+        # request might have been executed already.
+        while True:
+            conn, reused = self.Acquire(target)
+            try:
+                conn.request("POST", path, body, headers)
+                response = conn.getresponse()
+                content = response.read()
+            except socket.timeout:
+                conn.close()
+                raise
+            except (HTTPException, socket.error):
+                conn.close()
+                if reused:
+                    continue
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self.Release(target, conn)
+            return response, content
+
+
+    def Request(self, host, port, authString, methodName, *args, **kwargs):
+        data = {"method": methodName}
+        if len(args):
+            data["args"] = args
+        if len(kwargs):
+            data["kwargs"] = kwargs
+        headers = {
+            "User-Agent": "EventGhost/%s" % eg.Version.string,
+            "Authorization": "Basic %s" % authString,
+            "Content-Type": "application/json; charset=UTF-8",
+        }
+        response, content = self.Post(
+            ("http", host, port),
+            "/",
+            json.dumps(data),
+            headers
+        )
+        return response.status, content
+#===============================================================================
+
+class RepeatSender(Thread):
+    # One thread schedules the "RepeatEnduringEvent" requests for all buttons
+    # that are held down and the "EndLastEvent" when they are released. They
+    # are sent by one worker thread per target, so a target that doesn't
+    # answer only delays its own requests and gets no new repeats meanwhile.
+    # A worker ends on Stop() or after idleTimeout seconds without requests.
+    interval = 1.0
+    idleTimeout = 60.0
+
+    def __init__(self, client):
+        Thread.__init__(self, name = "TornadoRepeatSender")
+        self.daemon = True
+        self.client = client
+        self.lock = Lock()
+        self.queued = Condition(self.lock)
+        self.wakeup = Event()
+        self.held = {} # holdId -> [due, host, port, authString, event]
+        self.ended = deque()
+        self.lastId = 0
+        self.pending = {} # (host, port) -> deque of (item, methodName, args)
+        self.senders = {} # (host, port) -> worker sending the pending requests
+        self.busy = set() # targets with a request in progress
+        self.skipped = {} # (host, port) -> repeats skipped while busy
+        self.stopped = False
+
+
+    def Hold(self, host, port, authString, event):
+        with self.lock:
+            self.lastId += 1
+            self.held[self.lastId] = [
+                time.time() + self.interval,
+                host,
+                port,
+                authString,
+                event
+            ]
+        self.wakeup.set()
+        return self.lastId
+
+
+    def Release(self, holdId):
+        with self.lock:
+            item = self.held.pop(holdId, None)
+            if item is not None:
+                self.ended.append(item)
+        self.wakeup.set()
+
+
+    def Stop(self):
+        # The buttons still held down are released, then waits (at most the
+        # client timeout) until their "EndLastEvent" has been sent.
+        with self.lock:
+            self.stopped = True
+            self.ended.extend(self.held.itervalues())
+            self.held.clear()
+            self.queued.notifyAll()
+        self.wakeup.set()
+        deadline = time.time() + self.client.timeout
+        self.join(self.client.timeout)
+        with self.lock:
+            senders = self.senders.values()
+        for sender in senders:
+            sender.join(max(0.0, deadline - time.time()))
+
+
+    def run(self):
+        while True:
+            self.wakeup.clear()
+            with self.lock:
+                now = time.time()
+                ended = list(self.ended)
+                self.ended.clear()
+                due = []
+                for item in self.held.itervalues():
+                    if item[0] <= now:
+                        item[0] = now + self.interval
+                        target = (item[1], item[2])
+                        if target in self.busy or self.pending.get(target):
+                            self.skipped[target] = (
+                                self.skipped.get(target, 0) + 1
+                            )
+                        else:
+                            due.append(item)
+                nextDue = min(
+                    [item[0] for item in self.held.itervalues()] or [now + 60]
+                )
+                stopped = self.stopped
+            for item in due:
+                self.Queue(item, "RepeatEnduringEvent", item[4])
+            for item in ended:
+                self.Queue(item, "EndLastEvent")
+            if stopped:
+                return
+            self.wakeup.wait(max(0.0, nextDue - time.time()))
+
+
+    def Queue(self, item, methodName, *args):
+        target = (item[1], item[2])
+        with self.lock:
+            self.pending.setdefault(target, deque()).append(
+                (item, methodName, args)
+            )
+            if target in self.senders:
+                self.queued.notifyAll()
+            else:
+                sender = Thread(
+                    target = self.SendPending,
+                    args = (target,),
+                    name = "TornadoRepeatSender %s:%d" % target
+                )
+                sender.daemon = True
+                self.senders[target] = sender
+                sender.start()
+
+
+    def WaitPending(self, target):
+        # Called with the lock held, returns the next request for the target
+        # or None, if the worker has to end.
+        pending = self.pending[target]
+        deadline = time.time() + self.idleTimeout
+        while not pending and not self.stopped:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            self.queued.wait(remaining)
+        if not pending:
+            del self.pending[target]
+            del self.senders[target]
+            return None
+        self.busy.add(target)
+        return pending.popleft()
+
+
+    def SendPending(self, target):
+        while True:
+            with self.lock:
+                request = self.WaitPending(target)
+            if request is None:
+                return
+            item, methodName, args = request
+            try:
+                self.Send(item, methodName, *args)
+            finally:
+                with self.lock:
+                    self.busy.discard(target)
+                    skipped = self.skipped.pop(target, 0)
+            if skipped:
+                eg.PrintNotice(
+                    "RepeatEnduringEvent (%s:%d): %d repeats skipped, "
+                    "the target was busy" % (target + (skipped,))
+                )
+
+
+    def Send(self, item, methodName, *args):
+        try:
+            status, content = self.client.Request(
+                item[1],
+                item[2],
+                item[3],
+                methodName,
+                *args
+            )
+        except Exception, exc:
+            eg.PrintError("%s (%s:%d): %s" % (methodName, item[1], item[2], exc))
+            return
+        if status != 200:
+            eg.PrintError(SendEvent.text.errmsg % status)
+#===============================================================================
+
 class SendEvent(eg.ActionBase):
 
     class text:
@@ -2552,66 +3165,20 @@ class SendEvent(eg.ActionBase):
         pars = False
     ):
         text = self.text
-        def Request(methodName, *args, **kwargs):
-            data = {"method": methodName}
-            if len(args):
-                data["args"] = args
-            if len(kwargs):
-                data["kwargs"] = kwargs
-            content = json.dumps(data)
-            authString = base64.encodestring(user + ':' + password).strip()
-            sock = None
-            for af, socktype, proto, canonname, sa in socket.getaddrinfo(
-                host, port, socket.AF_UNSPEC, socket.SOCK_STREAM
-            ):
-                try:
-                    sock = socket.socket(af, socktype, proto)
-                except socket.error:
-                    sock = None
-                    continue
-                sock.settimeout(2)
-                try:
-                    sock.connect(sa)
-                except socket.error:
-                    sock.close()
-                    sock = None
-                    continue
-                break
-            data = [
-                "POST %s HTTP/1.0" % "/",
-                "Host: %sock:%d" % (host, port),
-                "User-Agent: EventGhost/%s" % eg.Version.string,
-                "Authorization: Basic %s" % authString,
-                "Content-Length: %d" % len(content),
-                "Content-Type: application/json; charset=UTF-8",
-                "",
-                content
-            ]
-            sock.send("\r\n".join(data))
-
-            response = HTTPResponse(sock)
-            response.begin()
-            content = response.read()
-            response.close()
-            sock.close()
-            if response.status != 200:
-                raise Exception(
-                    text.errmsg % response.status
-                )
-            return json.loads(content)
-
+        authString = base64.encodestring(user + ':' + password).strip()
         event = eg.ParseString(event) if not pars else event
-        Request("TriggerEnduringEvent", event)
-        stopEvent = Event()
-        eg.event.AddUpFunc(stopEvent.set)
-        def RepeatLoop():
-            while True:
-                stopEvent.wait(1.0)
-                if stopEvent.isSet():
-                    break
-                Request("RepeatEnduringEvent", event)
-            Request("EndLastEvent")
-        Thread(target=RepeatLoop).start()
+        status, content = self.plugin.eventClient.Request(
+            host,
+            port,
+            authString,
+            "TriggerEnduringEvent",
+            event
+        )
+        if status != 200:
+            raise Exception(text.errmsg % status)
+        sender = self.plugin.GetRepeatSender()
+        holdId = sender.Hold(host, port, authString, event)
+        eg.event.AddUpFunc(sender.Release, holdId)
 
 
     def Configure(
@@ -2677,17 +3244,26 @@ class SendEventExt(eg.ActionBase):
 
     def __call__(self, event="", host="", user="", password=""):
         text = self.text
-        req = urllib2.Request(host,event)
+        client = self.plugin.eventClient
+        url = urlsplit(host)
+        scheme = url.scheme or "http"
+        port = url.port or (443 if scheme == "https" else 80)
+        target = (scheme, url.hostname, port)
+        path = url.path or "/"
+        if url.query:
+            path += "?" + url.query
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        if target in client.basicAuth:
+            base64string = base64.encodestring('%s:%s' % (user, password))[:-1]
+            headers["Authorization"] = "Basic %s" % base64string
         try:
-            handle = urllib2.urlopen(req)
-        except IOError, e:
-            # If we fail then the page could be protected
-            if not hasattr(e, 'code') or e.code != 401:                 
-                # we got an error - but not a 401 error
-                print text.msg1
-                print text.msg2
-           
-            authline = e.headers.get('www-authenticate', '')               
+            response, content = client.Post(target, path, event, headers)
+        except (HTTPException, socket.error):
+            print text.msg2
+            return
+        if response.status == 401 and "Authorization" not in headers:
+            # The page is protected, try again with BASIC authentication
+            authline = response.getheader('www-authenticate', '')               
             # this gets the www-authenticat line from the headers - which has the authentication scheme and realm in it
             if not authline:
                 print text.msg3
@@ -2698,6 +3274,7 @@ class SendEventExt(eg.ActionBase):
             if not matchobj:                                       
                 # if the authline isn't matched by the regular expression then something is wrong
                 print text.msg4
+                return
             scheme = matchobj.group(1)
             realm = matchobj.group(2)
             if scheme.lower() != 'basic':
@@ -2705,15 +3282,21 @@ class SendEventExt(eg.ActionBase):
            
             base64string = base64.encodestring('%s:%s' % (user, password))[:-1]
             authheader =  "Basic %s" % base64string
-            req.add_header("Authorization", authheader)
+            headers["Authorization"] = authheader
+            client.basicAuth.add(target)
             try:
-                handle = urllib2.urlopen(req)
-            except IOError, e:
+                response, content = client.Post(target, path, event, headers)
+            except (HTTPException, socket.error):
+                response = None
+            if response is None or response.status >= 400:
                 print text.msg6
-        #else:
-            # If we don't fail then the page isn't protected
-            #print "This page isn't protected by authentication."
-        thepage = urllib2.unquote(handle.read()).decode(eg.systemEncoding,'replace') # handle.read()
+                return
+        elif response.status >= 400:
+            # we got an error - but not a 401 error
+            print text.msg1
+            print text.msg2
+            return
+        thepage = unquote(content).decode(eg.systemEncoding,'replace')
         return thepage
 
 
@@ -2752,8 +3335,7 @@ class SendEventExt(eg.ActionBase):
 
 class Tornado(eg.PluginBase):
 
-    knowlClients = {}
-    pubPerClients = {}
+    feed = None
     pubVars = {}
     pubPerVars = {}
     extensions_map = None
@@ -2828,6 +3410,9 @@ class Tornado(eg.PluginBase):
         self.AddEvents()
         self.AddActionsFromList(ACTIONS)
         self.running = False
+        self.feed = ChangeFeed()
+        self.eventClient = EventClient()
+        self.repeatSender = None
         if not mimetypes.inited:
             mimetypes.init()
         self.extensions_map = mimetypes.types_map.copy()
@@ -2864,8 +3449,7 @@ class Tornado(eg.PluginBase):
         else:
             authString = None
         self.wsClients = {}
-        self.knowlClients = {}
-        self.pubPerClients = {}
+        self.feed = ChangeFeed()
         self.pubVars = {}
         self.tv = KeysAsAttrs(self.pubVars)
         self.pubPerVars = pubPerVars
@@ -2875,7 +3459,7 @@ class Tornado(eg.PluginBase):
         self.valueSplitter = unicode(valueSplitter)
         self.defDoc = defDoc
         for key in self.pubPerVars.iterkeys():
-            self.pubPerClients[key] = []
+            self.feed.Touch(key)
         eg.PrintNotice("Persistent values: " + repr(self.pubPerVars))
         self.basepath = basepath
         self.authRealm = authRealm
@@ -2916,114 +3500,107 @@ class Tornado(eg.PluginBase):
         self.server.Stop()
         self.StopPeriodicTasks(True)
         self.httpd_thread = None
+        if self.repeatSender is not None:
+            self.repeatSender.Stop()
+            self.repeatSender = None
+        self.eventClient.Close()
+
+
+    def GetRepeatSender(self):
+        if self.repeatSender is None:
+            self.repeatSender = RepeatSender(self.eventClient)
+            self.repeatSender.start()
+        return self.repeatSender
 
 
     def GetValue(self, key, client = None):
         if key in self.pubVars:
             if client:
-                tmp = self.knowlClients[key]
-                if not client in tmp:
-                    tmp.append(client)
-                return self.pubVars[key]
-            else:
-                return self.pubVars[key]
+                self.feed.MarkSeen(key, client)
+            return self.pubVars[key]
 
 
     def DelPersistentValue(self, key):
         if key in self.pubPerVars:
             del self.pubPerVars[key]
             wx.CallAfter(self.SetDocIsDirty)
-        if key in self.pubPerClients:
-            del self.pubPerClients[key]
+        self.feed.Remove(key)
 
 
     def ClearPersistentValues(self):
         tmpLst = list(self.pubPerVars.iterkeys())
         for key in tmpLst:
             del self.pubPerVars[key]
-        self.pubPerClients = {}
+            self.feed.Remove(key)
         wx.CallAfter(self.SetDocIsDirty)
 
 
     def GetPersistentValue(self, key, client = None):
         if key in self.pubPerVars:
             if client:
-                tmp = self.pubPerClients[key]
-                if not client in tmp:
-                    tmp.append(client)
-                return self.pubPerVars[key]
-            else:
-                return self.pubPerVars[key]
+                self.feed.MarkSeen(key, client)
+            return self.pubPerVars[key]
 
 
     def SetValue(self, key, value):
         if key not in self.pubPerVars:
             if key not in self.pubVars or value != self.pubVars[key]:
                 self.pubVars[key] = unicode(value)
-                self.knowlClients[key] = []
+                self.feed.Touch(key)
            
 
     def SetPersistentValue(self, key, value):
         if key not in self.pubVars:
             if key not in self.pubPerVars or value != self.pubPerVars[key]:
                 self.pubPerVars[key] = unicode(value)
-                self.pubPerClients[key] = []
+                self.feed.Touch(key)
                 wx.CallAfter(self.SetDocIsDirty)
            
 
     def SetClientsFlags(self, key):
         if key not in self.pubVars:
             self.pubVars[key] = "dummy"
-        self.knowlClients[key] = []
-           
+        self.feed.Touch(key)
 
-    def GetChangedValues(self, client):
+
+    def GetValues(self, keys):
         tmpDict = {}
-        for key, value in self.pubVars.iteritems():
-            if not client in self.knowlClients[key]:
-                tmpDict[key] = value
-                self.knowlClients[key].append(client)
-        for key, value in self.pubPerVars.iteritems():
-            if not client in self.pubPerClients[key]:
-                tmpDict[key] = value
-                self.pubPerClients[key].append(client)
+        # persistent values win, like in GetAllValues and the templates
+        for key in keys:
+            if key in self.pubPerVars:
+                tmpDict[key] = self.pubPerVars[key]
+            elif key in self.pubVars:
+                tmpDict[key] = self.pubVars[key]
         return tmpDict
+           
+
+    def GetChangedValues(self, client):
+        return self.GetValues(self.feed.Poll(client))
+
+
+    def GetChangesSince(self, since):
+        seq, keys = self.feed.Since(since)
+        return {"seq": seq, "values": self.GetValues(keys)}
 
 
     def GetAllValues(self, client = None):
-        tmpDict = {}
-        for key, value in self.pubVars.iteritems():
-            if client:
-                if not client in self.knowlClients[key]:
-                    self.knowlClients[key].append(client)
-            tmpDict[key] = value
-        for key, value in self.pubPerVars.iteritems():
-            if client:
-                if not client in self.pubPerClients[key]:
-                    self.pubPerClients[key].append(client)
-            tmpDict[key] = value
+        if client:
+            self.feed.MarkAllSeen(client)
+        tmpDict = dict(self.pubVars)
+        tmpDict.update(self.pubPerVars)
         return tmpDict
 
 
     def BroadcastMessage(self, message):
-#### krambriw
-        try:
-            for key, client in self.wsClients.iteritems():
-                success = False
-                for i in range(5):
-                    if not success:
-                        try:
-                            client.write_message(message)
-                            success = True
-                        except:
-                            time.sleep(0.05)
-                            #print 'New attempt:', i, repr(key)
-                if not success:
-                    del self.wsClients[key]
-                    eg.PrintError("WebSocket client %s force deleted" % repr(key))
-        except:
-            pass
-####
+        # May be called from any thread. The message is encoded once and
+        # handed to the IOLoop, which queues it for every client.
+        server = self.server
+        if server is None or server.instance is None:
+            return
+        data = tornado.escape.utf8(message)
+        server.instance.add_callback(server.Broadcast, data)
+        self.logger.info("WS_BROADCAST --> %s", message)
+
 
     def ServerSendMessage(self, message, cl_ip, cl_port, modeClient):
         client = eg.event.payload[0] if modeClient else (
@@ -3031,7 +3608,10 @@ class Tornado(eg.PluginBase):
             int(eg.ParseString(cl_port))
         )
         if client in self.wsClients:
-            self.wsClients[client].write_message(message)
+            self.server.instance.add_callback(
+                self.wsClients[client].write_message,
+                message
+            )
         else:
             self.logger.warning(
                 "KeyError (non existent client): %s" % repr(client)
@@ -3039,6 +3619,17 @@ class Tornado(eg.PluginBase):
             eg.PrintNotice("KeyError (non existent client): %s" % repr(client))
 
 
+    def GetWsStats(self):
+        clients = self.wsClients.values()
+        return {
+            "clients": len(clients),
+            "queuedMessages": sum([len(c.outbox) for c in clients]),
+            "queuedBytes": sum([c.outboxBytes for c in clients]),
+            "dropped": self.server.wsDropped if self.server else 0,
+            "disconnected": self.server.wsDisconnected if self.server else 0,
+        }
+
+
     def SetDocIsDirty(self):     
         eg.document.SetIsDirty()
         if self.autosave:
@@ -3124,6 +3715,13 @@ class Tornado(eg.PluginBase):
             result = self.GetAllValues(handler.client_address[0])
         elif methodName == "GetChangedValues":
             result = self.GetChangedValues(handler.client_address[0])
+        elif methodName == "GetChangesSince":
+            try:
+                result = self.GetChangesSince(int(args[0]) if args else 0)
+            except:
+                result = None
+        elif methodName == "GetWsStats":
+            result = self.GetWsStats()
         elif methodName == "ExecuteScript":
             try:
                 result = eval(args[0])
@@ -130,22 +130,24 @@ eg.RegisterPlugin(
 #===============================================================================
 
 import socket
+import errno
 import random
-from os import urandom
+from os import urandom, rename, remove
+from os.path import exists
 from struct import pack, unpack
-from threading import Thread
+from threading import Thread, Lock
 from hashlib import md5, sha1
 import re
-from select import select
+import select
 import _winreg
 from urlparse import urlparse
-from time import sleep
+from time import sleep, time
+from collections import OrderedDict, deque
 from copy import deepcopy as cpy
 from datetime import datetime as dt
-from codecs import open as openFile
+from Queue import Queue, Empty
 from cStringIO import StringIO
 from base64 import b64decode, b64encode
-from array import array
 from wx.lib.mixins.listctrl import TextEditMixin, CheckListCtrlMixin
 #===============================================================================
 
@@ -1887,14 +1889,12 @@ class ConnectedClients(wx.Frame):
 
         def FillListCtrl(event=None):
             clnts = [item[2] for item in self.plugin.servers if item[1]==title][0]
-            cnt = len(clnts)
-            for i in range(cnt):
-                ip, port = clnts[i].getpeername()
+            for i, (clnt, (ip, port)) in enumerate(clnts.items()):
                 ccListCtrl.InsertStringItem(i, "")  #Dummy column 0
                 ccListCtrl.SetStringItem(i, 1, str(i+1))
                 ccListCtrl.SetStringItem(i, 2, ip)
                 ccListCtrl.SetStringItem(i, 3, str(port))
-                prot = str(self.plugin.clnProtocols[clnts[i]][0]) if self.plugin.clnProtocols[clnts[i]][0] else text.oldProt
+                prot = str(self.plugin.clnProtocols[clnt][0]) if self.plugin.clnProtocols[clnt][0] else text.oldProt
                 ccListCtrl.SetStringItem(i, 4, prot)
             if event:
                 event.Skip()
@@ -2011,23 +2011,38 @@ def GetHash(key):
     return b64encode(buffer.digest())
 
 
+# XOR translation table for every possible mask byte
+_XOR_TABLES = ["".join([chr(i ^ k) for i in xrange(256)]) for k in xrange(256)]
+
 def XorMask(mask, bytes):
-    if not mask:
+    """
+    Masks/unmasks the payload. Every fourth byte is XORed with the same
+    mask byte, so the payload is processed as four extended slices, each
+    one translated in a single (C level) str.translate() call.
+    """
+    if not mask or not bytes:
         return bytes
-    mask_size = len(mask)
-    mask = map(ord, mask)
-    count = 0
-    result = array('B')
-    result.fromstring(bytes)
-    for i in xrange(len(result)):
-        result[i] ^= mask[count]
-        count = (count + 1) % mask_size
-    return result.tostring()
+    result = bytearray(bytes)
+    for i in xrange(4):
+        result[i::4] = bytes[i::4].translate(_XOR_TABLES[ord(mask[i])])
+    return str(result)
+
+
+def _recv_exactly(peer, size):
+    chunks = []
+    while size:
+        chunk = peer.recv(size)
+        if not chunk:
+            raise socket.error("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return "".join(chunks)
 
 
 def GetFragment(peer, maskOption):
+    # Reads one frame from a blocking socket (websocket client side)
     try:
-        first, second = [ord(byte) for byte in peer.recv(2)]
+        first, second = [ord(byte) for byte in _recv_exactly(peer, 2)]
 
         fin = (first >> 7) & 1
         rsv1 = (first >> 6) & 1
@@ -2041,35 +2056,135 @@ def GetFragment(peer, maskOption):
         if mask != maskOption:
             return None # invalid frame
         if payload_len == 127:
-            extended_payload_len = peer.recv(8)
+            extended_payload_len = _recv_exactly(peer, 8)
             payload_len = unpack('!Q', extended_payload_len)[0]
             if payload_len > 0x7FFFFFFFFFFFFFFF:
                 return None # invalid frame
         elif payload_len == 126:
-            extended_payload_len = peer.recv(2)
+            extended_payload_len = _recv_exactly(peer, 2)
             payload_len = unpack('!H', extended_payload_len)[0]
         if mask == 1:
-            mask = peer.recv(4)
-        payload = None if not payload_len else XorMask(mask, peer.recv(payload_len))
+            mask = _recv_exactly(peer, 4)
+        payload = None if not payload_len else XorMask(mask, _recv_exactly(peer, payload_len))
         return fin, opcode, payload
         #return fin, (rsv1, rsv2, rsv3, opcode), payload
     except:
         return None
 
 
-def createTextFrame(bytes, maskOption):
+class FrameParser(object):
+    """
+    Incremental RFC 6455 parser for one (non-blocking) connection.
+    Whatever recv() returned is passed to Feed(). Partial frames are
+    buffered until complete, fragmented messages are reassembled and
+    the list of complete (opcode, payload) messages is returned.
+    Control frames (close, ping, pong) are returned as soon as they
+    arrive, also in the middle of a fragmented message.
+    Invalid frames raise ValueError.
+    """
+    maxSize = 16 * 1024 * 1024 # the largest acceptable message
+
+    def __init__(self, maskOption):
+        self.maskOption = maskOption
+        self.chunks = []
+        self.size = 0
+        self.need = 2 # bytes needed to make any progress
+        self.opcode = None # of the fragmented message in progress
+        self.fragments = []
+        self.fragmentsSize = 0
+
+
+    def Feed(self, data):
+        if data:
+            self.chunks.append(data)
+            self.size += len(data)
+        messages = []
+        if self.size < self.need:
+            return messages
+        # the frames are read at an offset, the rest is sliced off only once
+        buf = "".join(self.chunks)
+        start = 0
+        while len(buf) - start >= self.need:
+            first, second = ord(buf[start]), ord(buf[start + 1])
+            masked = second >> 7
+            payload_len = second & 0x7f
+            pos = start + 2
+            if payload_len == 126:
+                pos += 2
+            elif payload_len == 127:
+                pos += 8
+            if masked:
+                pos += 4
+            if len(buf) < pos:
+                self.need = pos - start
+                break
+            if masked != self.maskOption or first & 0x70:
+                raise ValueError("invalid frame header")
+            if payload_len == 126:
+                payload_len = unpack('!H', buf[start + 2:start + 4])[0]
+            elif payload_len == 127:
+                payload_len = unpack('!Q', buf[start + 2:start + 10])[0]
+            if payload_len > self.maxSize:
+                raise ValueError("frame too large")
+            end = pos + payload_len
+            if len(buf) < end:
+                self.need = end - start
+                break
+            payload = XorMask(buf[pos - 4:pos] if masked else None, buf[pos:end])
+            start = end
+            self.need = 2
+            message = self.Frame(first >> 7, first & 0x0f, payload)
+            if message is not None:
+                messages.append(message)
+        if start:
+            buf = buf[start:]
+        self.chunks = [buf] if buf else []
+        self.size = len(buf)
+        return messages
+
+
+    def Frame(self, fin, opcode, payload):
+        if opcode >= 8: # control frame
+            if not fin or len(payload) > 125:
+                raise ValueError("invalid control frame")
+            return opcode, payload
+        if opcode == 0: # continuation frame
+            if self.opcode is None:
+                raise ValueError("unexpected continuation frame")
+            self.fragments.append(payload)
+            self.fragmentsSize += len(payload)
+            if self.fragmentsSize > self.maxSize:
+                raise ValueError("message too large")
+            if not fin:
+                return
+            message = self.opcode, "".join(self.fragments)
+            self.opcode = None
+            self.fragments = []
+            self.fragmentsSize = 0
+            return message
+        if opcode in (1, 2): # text or binary frame
+            if self.opcode is not None:
+                raise ValueError("new message inside of a fragmented one")
+            if fin:
+                return opcode, payload
+            self.opcode = opcode
+            self.fragments = [payload]
+            self.fragmentsSize = len(payload)
+            return
+        raise ValueError("unknown opcode %d" % opcode)
+
+
+def createFrame(bytes, maskOption, opcode = 1):
     if maskOption:
         mask_bit = 1 << 7
         masking_key = urandom(4)
-        bts = masking_key + XorMask(masking_key, bytes.encode('utf-8'))
+        bts = masking_key + XorMask(masking_key, bytes)
     else:
         mask_bit = 0
-        bts = bytes.encode('utf-8')
-    header = chr(0b10000001) #((fin<<7)|(rsv1<<6)|(rsv2<<5)|(rsv3<<4)|opcode)
-    payload_len = len(bts)
-    if payload_len < 0:
-        return None
-    elif payload_len <= 125:
+        bts = bytes
+    header = chr(0x80 | opcode) #((fin<<7)|(rsv1<<6)|(rsv2<<5)|(rsv3<<4)|opcode)
+    payload_len = len(bytes)
+    if payload_len <= 125:
         header += chr(mask_bit | payload_len)
     elif payload_len < (1 << 16):
         header += chr(mask_bit | 126) + pack('!H', payload_len)
@@ -2077,10 +2192,315 @@ def createTextFrame(bytes, maskOption):
         header += chr(mask_bit | 127) + pack('!Q', payload_len)
     else:
         return None
-    return header+pack(str(len(bts))+'s', bts)
+    return header + bts
+
 
+def createTextFrame(bytes, maskOption):
+    if isinstance(bytes, unicode):
+        bytes = bytes.encode('utf-8')
+    return createFrame(bytes, maskOption)
+
+
+def BenchmarkFraming(sizes = (100, 1000, 10000, 100000, 1000000), volume = 10000000):
+    """
+    Times XorMask and FrameParser.Feed with masked messages of the given
+    sizes, each size until about volume bytes were processed, and Feed with
+    one read holding many 100 B frames. Returns a list of
+    (size, mask MB/s, parse MB/s) and the frames/s of the batched read.
+    """
+    from timeit import default_timer
+    results = []
+    for size in sizes:
+        payload = urandom(size)
+        mask = urandom(4)
+        frame = createFrame(payload, 1, 2)
+        rounds = max(1, volume // size)
+        t0 = default_timer()
+        for i in xrange(rounds):
+            XorMask(mask, payload)
+        maskTime = default_timer() - t0
+        t0 = default_timer()
+        for i in xrange(rounds):
+            FrameParser(1).Feed(frame)
+        parseTime = default_timer() - t0
+        megabytes = size * rounds / 1e6
+        results.append((
+            size,
+            megabytes / max(maskTime, 1e-9),
+            megabytes / max(parseTime, 1e-9)
+        ))
+    frames = max(1, volume // 1000)
+    data = createFrame(urandom(100), 1, 2) * frames
+    t0 = default_timer()
+    FrameParser(1).Feed(data)
+    batched = frames / max(default_timer() - t0, 1e-9)
+    return results, batched
+
+
+
+class SocketPoller(object):
+    """
+    Registry of the sockets serviced by the server thread, polled with the
+    best readiness API of the platform: epoll (Linux), poll (other Unix)
+    or select (Windows). The Windows select() can not handle more than
+    FD_SETSIZE (512) sockets at once, so bigger sets are polled in chunks.
+    All sockets are watched for reading, the write interest is switched
+    on by modify() only while a socket has pending output.
+    """
+    chunk = 500
+
+    def __init__(self):
+        self.sockets = {} # fileno -> socket
+        self.filenos = {} # socket -> fileno
+        self.writers = set()
+        if hasattr(select, "epoll"):
+            self.impl = select.epoll()
+            self.flags = select.EPOLLIN | select.EPOLLPRI
+            self.errors = select.EPOLLERR
+            self.output = select.EPOLLOUT
+            self.scale = 1 # epoll timeout is in seconds
+        elif hasattr(select, "poll"):
+            self.impl = select.poll()
+            self.flags = select.POLLIN | select.POLLPRI
+            self.errors = select.POLLERR | select.POLLNVAL
+            self.output = select.POLLOUT
+            self.scale = 1000 # poll timeout is in milliseconds
+        else:
+            self.impl = None
+
+
+    def __len__(self):
+        return len(self.filenos)
+
+
+    def register(self, sock):
+        fd = sock.fileno()
+        self.sockets[fd] = sock
+        self.filenos[sock] = fd
+        if self.impl is not None:
+            self.impl.register(fd, self.flags)
+
+
+    def modify(self, sock, write):
+        fd = self.filenos.get(sock)
+        if fd is None or write == (sock in self.writers):
+            return
+        if write:
+            self.writers.add(sock)
+        else:
+            self.writers.discard(sock)
+        if self.impl is not None:
+            try:
+                self.impl.modify(fd, self.flags | self.output if write else self.flags)
+            except (IOError, KeyError, ValueError):
+                pass
+
+
+    def unregister(self, sock):
+        fd = self.filenos.pop(sock, None)
+        if fd is None:
+            return
+        del self.sockets[fd]
+        self.writers.discard(sock)
+        if self.impl is not None:
+            try:
+                self.impl.unregister(fd)
+            except (IOError, KeyError, ValueError):
+                pass
 
 
+    def poll(self, timeout):
+        """
+        Returns the lists of readable, writable and exceptional sockets.
+        A hung up peer is reported as readable (recv then returns "").
+        """
+        if self.impl is not None:
+            try:
+                events = self.impl.poll(timeout * self.scale)
+            except (IOError, select.error):
+                return [], [], []
+            readable = []
+            writable = []
+            exceptional = []
+            for fd, flag in events:
+                sock = self.sockets.get(fd)
+                if sock is None:
+                    continue
+                if flag & self.output:
+                    writable.append(sock)
+                    flag &= ~self.output
+                    if not flag:
+                        continue
+                if flag & self.errors and not flag & self.flags:
+                    exceptional.append(sock)
+                else:
+                    readable.append(sock)
+            return readable, writable, exceptional
+        socks = self.sockets.values()
+        if not socks:
+            sleep(timeout)
+            return [], [], []
+        writers = self.writers
+        if len(socks) <= self.chunk:
+            return select.select(socks, list(writers), socks, timeout)
+        deadline = time() + timeout
+        while True:
+            readable = []
+            writable = []
+            exceptional = []
+            for i in xrange(0, len(socks), self.chunk):
+                part = socks[i:i + self.chunk]
+                r, w, e = select.select(
+                    part,
+                    [sock for sock in part if sock in writers],
+                    part,
+                    0
+                )
+                readable.extend(r)
+                writable.extend(w)
+                exceptional.extend(e)
+            if readable or writable or exceptional or time() >= deadline:
+                return readable, writable, exceptional
+            sleep(0.005)
+
+
+    def close(self):
+        if self.impl is not None and hasattr(self.impl, "close"):
+            self.impl.close()
+        self.sockets = {}
+        self.filenos = {}
+        self.writers = set()
+
+
+def LoadTest(host, port, clients, rounds = 10, timeout = 30.0):
+    """
+    Load test of a running server. Opens clients local websocket
+    connections, all of them serviced from one thread by a SocketPoller,
+    and lets every client ping the server rounds times, one ping at a time
+    (pings are answered by the server thread and trigger no events).
+    Returns a dictionary with the handshakes/s, the ping round trips/s and
+    the number of clients that failed.
+    """
+    request = "\r\n".join((
+        "GET / HTTP/1.1",
+        "Host: %s:%d" % (host, port),
+        "Upgrade: websocket",
+        "Connection: Upgrade",
+        "Sec-WebSocket-Key: %s" % _create_new_sec_websocket_key(),
+        "Sec-WebSocket-Version: 13\r\n\r\n"
+    ))
+    ping = createFrame("load test", 1, 9)
+    poller = SocketPoller()
+    states = {} # socket -> [FrameParser (None while handshaking), data, pings]
+    result = {"clients": clients, "rounds": rounds, "failed": 0}
+
+    def Receive(sock):
+        try:
+            data = sock.recv(65536)
+        except socket.error, e:
+            if e.errno in (errno.EWOULDBLOCK, errno.EAGAIN, errno.EINTR):
+                return ""
+            data = None
+        if not data:
+            poller.unregister(sock)
+            del states[sock]
+            sock.close()
+            result["failed"] += 1
+        return data
+
+    start = time()
+    for i in xrange(clients):
+        try:
+            sock = socket.create_connection((host, port), timeout)
+            sock.sendall(request)
+        except socket.error:
+            result["failed"] += 1
+            continue
+        sock.setblocking(0)
+        poller.register(sock)
+        states[sock] = [None, "", rounds]
+    deadline = start + timeout
+    waiting = len(states)
+    while waiting and time() < deadline:
+        for sock in poller.poll(0.1)[0]:
+            state = states.get(sock)
+            if state is None or state[0] is not None:
+                continue
+            data = Receive(sock)
+            if data is None:
+                waiting -= 1
+                continue
+            state[1] += data
+            if "\r\n\r\n" not in state[1]:
+                continue
+            head, rest = state[1].split("\r\n\r\n", 1)
+            waiting -= 1
+            if " 101 " not in head.split("\r\n", 1)[0]:
+                poller.unregister(sock)
+                del states[sock]
+                sock.close()
+                result["failed"] += 1
+                continue
+            state[0] = FrameParser(0)
+            state[0].Feed(rest) # the initial values sent by the server
+            state[1] = ""
+    elapsed = time() - start
+    result["handshakes"] = (clients - result["failed"]) / max(elapsed, 1e-9)
+
+    for sock, state in states.items():
+        if state[0] is None: # handshake timed out
+            poller.unregister(sock)
+            del states[sock]
+            sock.close()
+            result["failed"] += 1
+    start = time()
+    deadline = start + timeout
+    pongs = 0
+    waiting = len(states)
+    for sock in states.keys():
+        sock.sendall(ping)
+    while waiting and time() < deadline:
+        for sock in poller.poll(0.1)[0]:
+            state = states.get(sock)
+            if state is None:
+                continue
+            data = Receive(sock)
+            if data is None:
+                waiting -= 1
+                continue
+            try:
+                messages = state[0].Feed(data)
+            except ValueError:
+                messages = []
+            for opcode, payload in messages:
+                if opcode != 10 or not state[2]:
+                    continue
+                pongs += 1
+                state[2] -= 1
+                if state[2]:
+                    sock.sendall(ping)
+                else:
+                    waiting -= 1
+    elapsed = time() - start
+    result["roundTrips"] = pongs / max(elapsed, 1e-9)
+    result["failed"] += len([s for s in states.itervalues() if s[2]])
+    for sock in states.keys():
+        poller.unregister(sock)
+        sock.close()
+    poller.close()
+    return result
+#===============================================================================
+
+class Outbox(deque):
+    """
+    Pending output of one client. The queued frames are shared (immutable)
+    strings, a partially sent one is replaced by a buffer of its rest.
+    """
+    def __init__(self):
+        deque.__init__(self)
+        self.size = 0
+#===============================================================================
+
 HEADERS_TO_CHECK = {
     "upgrade": "websocket",
     "connection": "upgrade",
@@ -2397,12 +2817,97 @@ class Websocket(object):
         return "".join(line)
 #===============================================================================
 
+class LogWriter(Thread):
+    """
+    Writes the server log files in the background, so that the socket
+    handling never waits for the disk. Queued lines are written in batches,
+    the files stay open while there is traffic (they are closed after
+    idleTime seconds without any line) and a file bigger than maxSize is
+    rotated to <logfile>.1 ... <logfile>.<backups>.
+    """
+    maxSize = 1024 * 1024
+    backups = 3
+    idleTime = 5.0
+
+    def __init__(self):
+        Thread.__init__(self, name = "WebsocketLogWriter")
+        self.daemon = True
+        self.queue = Queue()
+        self.files = {}
+
+
+    def Write(self, logfile, text):
+        self.queue.put((logfile, text))
+
+
+    def Close(self):
+        self.queue.put(None)
+        self.join(5.0)
+
+
+    def run(self):
+        running = True
+        while running:
+            try:
+                item = self.queue.get(True, self.idleTime)
+            except Empty:
+                self.CloseFiles()
+                continue
+            batch = OrderedDict()
+            while True:
+                if item is None:
+                    running = False
+                    break
+                batch.setdefault(item[0], []).append(item[1])
+                try:
+                    item = self.queue.get_nowait()
+                except Empty:
+                    break
+            for logfile, lines in batch.iteritems():
+                try:
+                    f = self.files.get(logfile)
+                    if f is None:
+                        f = self.files[logfile] = open(logfile, "ab")
+                    f.write(u"".join(lines).encode('utf-8'))
+                    f.flush()
+                    if f.tell() >= self.maxSize:
+                        self.Rotate(logfile)
+                except (IOError, OSError), exc:
+                    eg.PrintError("Websocket suite: %s" % unicode(exc))
+                    f = self.files.pop(logfile, None)
+                    if f is not None:
+                        f.close()
+        self.CloseFiles()
+
+
+    def Rotate(self, logfile):
+        self.files.pop(logfile).close()
+        for i in range(self.backups, 0, -1):
+            src = "%s.%d" % (logfile, i - 1) if i > 1 else logfile
+            dst = "%s.%d" % (logfile, i)
+            if exists(src):
+                if exists(dst):
+                    remove(dst)
+                rename(src, dst)
+
+
+    def CloseFiles(self):
+        for f in self.files.itervalues():
+            f.close()
+        self.files = {}
+#===============================================================================
+
 class WebsocketSuite(eg.PluginBase):
 
     text = Text
     serverHandler = None
     clientHandler = None
     servers = []
+    listeners = {}
+    outboxes = {}
+    outLock = Lock()
+    maxOutbox = 16 * 1024 * 1024 # a client with more pending output is dropped
+    serving = False
     clients = []
     clientsWs = {}
     serverToStop = []
@@ -2411,6 +2916,10 @@ class WebsocketSuite(eg.PluginBase):
     clnProtocols = {}
     protocolServDialog = None
     dataSet = None
+    logWriter = None
+    logLock = Lock()
+    recentLog = {}
+    recentLines = 200 # in-memory lines per server
 
 
     def __init__(self):
@@ -2426,6 +2935,10 @@ class WebsocketSuite(eg.PluginBase):
         self.StopAllServers()
         if self.connectedClients:
             self.connectedClients.onClose(wx.CommandEvent())
+        with self.logLock:
+            if self.logWriter:
+                self.logWriter.Close()
+                self.logWriter = None
 
 
     def Configure(self, dataSet = []):
@@ -2801,40 +3314,106 @@ class WebsocketSuite(eg.PluginBase):
                 return None
 
 
-    def send_data(self, client, bytes, newStr = None):
-        prot = self.clnProtocols[client][0]
-        if not prot:
-            bytes = b"\x00" + bytes.encode('utf-8') + b"\xff"
-        else:
-            bytes = newStr or createTextFrame(bytes, 0)
-        try:
-            return client.send(bytes)
-        except IOError, e:
-            if e.errno == 32:
-                log("pipe error")
+    def EncodeFrames(self, bytes):
+        """
+        Returns the frames of a message for both protocol families
+        (old "hixie" and HyBi), so that every recipient can share them.
+        """
+        if isinstance(bytes, unicode):
+            bytes = bytes.encode('utf-8')
+        return (b"\x00" + bytes + b"\xff", createFrame(bytes, 0))
+
+
+    def send_data(self, client, bytes, frames = None):
+        protocol = self.clnProtocols.get(client)
+        if protocol is None: # already disconnected
+            return
+        frames = frames or self.EncodeFrames(bytes)
+        self.QueueData(client, frames[1] if protocol[0] else frames[0])
+
+
+    def send_data_all(self, bytes, client = None, server = None):
+        server = server or self.listeners[self.clientsServers[client]]
+        frames = self.EncodeFrames(bytes)
+        for client in server[2].keys():
+            self.send_data(client, bytes, frames)
 
 
-    def send_data_all(self, bytes, client = None, indx = None):
-        ix = indx if indx is not None else [item[0] for item in self.servers].index(self.clientsServers[client])
-        for client in self.servers[ix][2]:
-            self.send_data(client, bytes, createTextFrame(bytes, 0))
+    def QueueData(self, client, data):
+        with self.outLock:
+            outbox = self.outboxes.get(client)
+            if outbox is None: # already disconnected
+                return
+            outbox.append(data)
+            outbox.size += len(data)
+            if len(outbox) == 1:
+                self.FlushClient(client, outbox)
+            elif outbox.size > self.maxOutbox:
+                log("client %s does not read, disconnecting" % str(client))
+                outbox.clear()
+                outbox.size = 0
+                try:
+                    client.shutdown(socket.SHUT_RDWR)
+                except socket.error:
+                    pass
+
+
+    def FlushClient(self, client, outbox):
+        # Sends as much of the pending output, as the socket takes without
+        # blocking (the caller holds self.outLock)
+        while outbox:
+            data = outbox[0]
+            try:
+                sent = client.send(data)
+            except socket.error, e:
+                if e.errno in (errno.EWOULDBLOCK, errno.EAGAIN, errno.EINTR):
+                    break
+                log("send error %s" % str(e))
+                outbox.clear()
+                outbox.size = 0
+                break
+            outbox.size -= sent
+            if sent < len(data):
+                outbox[0] = buffer(data, sent)
+                break
+            outbox.popleft()
+        self.poller.modify(client, bool(outbox))
 
 
     def updateLogFile(self, folder, title, line, blank = False):
-        if not folder:
-            return
-        logfile = folder + "\\Websocket_%s_log.txt" % title
-        f = openFile(logfile, encoding='utf-8', mode='a')
-        if blank:
-            f.write("\r\n")
+        # Never touches the disk, the line is written by the LogWriter thread
+        stamp = str(dt.now())[:19]
         try:
-            f.write("%s  %s\r\n" % (str(dt.now())[:19], line.decode('utf-8')))
+            line = u"%s  %s" % (stamp, line.decode('utf-8'))
         except:
             try:
-                f.write("%s  %s\r\n" % (str(dt.now())[:19], line))
+                line = u"%s  %s" % (stamp, line)
             except:
-                f.write("%s  %s\r\n" % (str(dt.now())[:19], repr(line)))
-        f.close()
+                line = u"%s  %s" % (stamp, repr(line))
+        recent = self.recentLog.get(title)
+        if recent is None:
+            recent = self.recentLog.setdefault(title, deque(maxlen = self.recentLines))
+        recent.append(line)
+        if not folder:
+            return
+        logfile = folder + "\\Websocket_%s_log.txt" % title
+        self.GetLogWriter().Write(logfile, (u"\r\n" if blank else u"") + line + u"\r\n")
+
+
+    def GetLogWriter(self):
+        with self.logLock:
+            if self.logWriter is None or not self.logWriter.isAlive():
+                self.logWriter = LogWriter()
+                self.logWriter.start()
+            return self.logWriter
+
+
+    def GetRecentLog(self, title):
+        """
+        Returns the last logged lines of the server, kept in memory also
+        when logging to file is switched off.
+        """
+        return list(self.recentLog.get(title, ()))
 
 
     def PerformAction(self, action, kwargs):
@@ -2860,9 +3439,9 @@ class WebsocketSuite(eg.PluginBase):
         return  actn(*args)
 
 
-    def InteractServer(self, data, client, indx):
-        title   = self.servers[indx][1]
-        fn      = self.servers[indx][3]
+    def InteractServer(self, data, client, server):
+        title   = server[1]
+        fn      = server[3]
         if not self.clnProtocols[client][0]:
             data = data[1:]
         data = data.decode('utf-8', 'ignore')
@@ -2968,7 +3547,7 @@ class WebsocketSuite(eg.PluginBase):
     def ClientHandler(self): #Thread
         clnts = [clnt[0] for clnt in self.clients]
         while clnts:
-            readable, _, exceptional = select(clnts, [], clnts, 1)
+            readable, _, exceptional = select.select(clnts, [], clnts, 1)
             for r in readable:
                 ws = self.clientsWs[r]
                 ix = clnts.index(r)
@@ -3117,154 +3696,171 @@ class WebsocketSuite(eg.PluginBase):
             return 2
 
 
+    def DropClient(self, client, server, notify = True):
+        # Stop listening for input on the connection
+        with self.outLock:
+            self.outboxes.pop(client, None)
+            self.poller.unregister(client)
+        del self.clientsServers[client]
+        peer = server[2].pop(client, None)
+        if client in self.connected:
+            self.connected.remove(client)
+            del self.clnProtocols[client]
+            if notify and self.dataSet[server[3]][3][4]:
+                self.TriggerEvent(self.text.clnDisconnect, payload = (server[1], peer))
+            line = self.text.disconnCln % str(peer)
+            folder = self.dataSet[server[3]][3][3]
+            self.updateLogFile(folder, server[1], line)
+        client.close()
+
+
+    def ReadFrames(self, client, server):
+        """
+        Reads, what is available on the socket of a HyBi client and handles
+        all complete messages. Returns True, when the client should be closed.
+        """
+        peer = server[2][client]
+        try:
+            data = client.recv(65536)
+        except socket.error, e:
+            if e.errno in (errno.EWOULDBLOCK, errno.EAGAIN, errno.EINTR):
+                return False
+            data = None
+        if not data:
+            log('closing after reading no data [peer %s disconnected]' % str(peer))
+            return True
+        try:
+            messages = self.clnProtocols[client][1].Feed(data)
+        except ValueError, e:
+            log('closing after invalid data (%s) [peer %s disconnected]' % (e, str(peer)))
+            return True
+        for opcode, payload in messages:
+            if opcode == 8: # CLOSE frame
+                log('closing after "Close frame" from client [peer %s disconnected]' % str(peer))
+                try:
+                    client.send(createFrame(payload[:2], 0, 8))
+                except socket.error:
+                    pass
+                return True
+            elif opcode == 9: # PING frame
+                self.QueueData(client, createFrame(payload, 0, 10))
+            elif opcode == 1: # text frame
+                if self.InteractServer(payload, client, server):
+                    log('closing after reading "I\'m leaving" [peer %s disconnected]' % str(peer))
+                    return True
+        return False
+
+
     def ServerHandler(self):
-        while self.inputs:
-            readable, _, exceptional = select(self.inputs, [], self.inputs, 1)
+        while self.serving:
+            readable, writable, exceptional = self.poller.poll(1)
+            for w in writable:
+                with self.outLock:
+                    outbox = self.outboxes.get(w)
+                    if outbox is not None:
+                        self.FlushClient(w, outbox)
             for r in readable:
-                srvrs = [item[0] for item in self.servers]
-                if r in srvrs:
+                if r in self.listeners:
                     # A "readable" server socket is ready to accept a connection
                     connection, client_address = r.accept()                
-                    ix = srvrs.index(r)
                     self.clientsServers[connection] = r
                     connection.setblocking(0)
-                    self.inputs.append(connection)
-                else: #client
-                    data = None
-                    cl_close = False
-                    s = self.clientsServers[r]
-                    srvrTitle = [item[1] for item in self.servers][srvrs.index(s)]
-                    ix = srvrs.index(s) #server index
-                    if r not in self.connected: #first data => handshake
-                        log('Server %s: New client %s tries to connect' % (srvrTitle, str(r.getpeername())))
-                        try:
-                            data = r.recv(1024)
-                            prot = self.handshake(r, data)
-                            self.clnProtocols[r] = [prot, []]
-                            if prot is not None: #CONNECT ?
-                                #Add client to list:
-                                self.servers[ix][2].append(connection) 
-                                self.connected.append(r)
-                                if self.dataSet[self.servers[ix][3]][3][4]:
-                                    self.TriggerEvent(self.text.clnConnect, payload = (srvrTitle, r.getpeername()))
-                                line = self.text.connCln % str(r.getpeername())
-                                folder = self.dataSet[self.servers[ix][3]][3][3]
-                                self.updateLogFile(folder, self.servers[ix][1], line)
-                                if Persist.userVariables:  # THIS IS THE ADDED LINE
-                                    vars = Persist.userVariables[self.servers[ix][3]][1]
-                                    for v in vars:
-                                        self.send_data(r, "%s=%s" % (v[0], v[1]))
-                                        line = self.text.msgToCln % (unicode(v[0]), unicode(v[1]), r.getpeername())
-                                        self.updateLogFile(folder, self.servers[ix][1], line)
-                                actns = [item for item in self.dataSet[self.servers[ix][3]][2] if item[0]]
-                                for actn in actns:
-                                    result = self.PerformAction(actn, [])
-                                    self.send_data(r, "%s=%s" % (actn[1], result))
-                                    line = self.text.msgToCln % (actn[1], unicode(result), r.getpeername())
-                                    self.updateLogFile(folder, self.servers[ix][1], line)
-                        except:
-                            del self.clientsServers[r]
-                            self.inputs.remove(r)
-                            r.close()
-                    else: #if r in self.connected:
-                        prot = self.clnProtocols[r][0]
-                        if prot >= 7:
-                            frgmnt = GetFragment(r, 1)
-                            if frgmnt is not None:
-                                if frgmnt[0]: # ToDo frgmnt[1] == 0x09 (Ping) or 0x0A (Pong)
-                                    if frgmnt[1] == 8: # CLOSE frame
-                                        data = '\xff\x00'
-                                    elif frgmnt[1] == 1: #text frame
-                                        self.clnProtocols[r][1].append(frgmnt[2])
-                                        data =  "".join(self.clnProtocols[r][1])
-                                        self.clnProtocols[r][1] = []
-                                elif frgmnt[1] == 1: # Not fin and text frame
-                                    self.clnProtocols[r][1].append(frgmnt[2])
-                                    continue
-                            else: 
-                                data = None # after exception
-                        else:
-                            try:
-                                data = r.recv(1024)
-                            except:
-                                pass
-                        if data and data != '\xff\x00':
-                            # A readable client socket has data
-                            if self.InteractServer(data, r, ix):
-                                log('closing after reading "I\'m leaving" [peer %s disconnected]' % str(r.getpeername()))
-                                cl_close = True
-                        # if no data or data == '\xff\x00':
-                        else: #A readable socket without data available (or with data "\xff\x00") is from a client that has disconnected
-                            if data == '\xff\x00':
-                                log('closing after "Close frame" from client [peer %s disconnected]' % str(r.getpeername()))
-                            else:
-                                log('closing after reading no data or invalid data [peer %s disconnected]' % str(r.getpeername()))
+                    self.poller.register(connection)
+                    continue
+                s = self.clientsServers.get(r)
+                if s is None: # already dropped
+                    continue
+                data = None
+                cl_close = False
+                server = self.listeners[s]
+                srvrTitle = server[1]
+                if r not in self.connected: #first data => handshake
+                    log('Server %s: New client %s tries to connect' % (srvrTitle, str(r.getpeername())))
+                    try:
+                        data = r.recv(1024)
+                        prot = self.handshake(r, data)
+                        self.clnProtocols[r] = [prot, FrameParser(1)]
+                        if prot is not None: #CONNECT ?
+                            #Add client to list:
+                            peer = r.getpeername()
+                            server[2][r] = peer
+                            self.connected.add(r)
+                            self.outboxes[r] = Outbox()
+                            if self.dataSet[server[3]][3][4]:
+                                self.TriggerEvent(self.text.clnConnect, payload = (srvrTitle, peer))
+                            line = self.text.connCln % str(peer)
+                            folder = self.dataSet[server[3]][3][3]
+                            self.updateLogFile(folder, srvrTitle, line)
+                            if Persist.userVariables:  # THIS IS THE ADDED LINE
+                                vars = Persist.userVariables[server[3]][1]
+                                for v in vars:
+                                    self.send_data(r, "%s=%s" % (v[0], v[1]))
+                                    line = self.text.msgToCln % (unicode(v[0]), unicode(v[1]), peer)
+                                    self.updateLogFile(folder, srvrTitle, line)
+                            actns = [item for item in self.dataSet[server[3]][2] if item[0]]
+                            for actn in actns:
+                                result = self.PerformAction(actn, [])
+                                self.send_data(r, "%s=%s" % (actn[1], result))
+                                line = self.text.msgToCln % (actn[1], unicode(result), peer)
+                                self.updateLogFile(folder, srvrTitle, line)
+                    except:
+                        self.poller.unregister(r)
+                        del self.clientsServers[r]
+                        server[2].pop(r, None)
+                        self.connected.discard(r)
+                        self.clnProtocols.pop(r, None)
+                        r.close()
+                else: #if r in self.connected:
+                    prot = self.clnProtocols[r][0]
+                    if prot >= 7:
+                        if self.ReadFrames(r, server):
+                            self.DropClient(r, server)
+                        continue
+                    try:
+                        data = r.recv(1024)
+                    except:
+                        pass
+                    if data and data != '\xff\x00':
+                        # A readable client socket has data
+                        if self.InteractServer(data, r, server):
+                            log('closing after reading "I\'m leaving" [peer %s disconnected]' % str(server[2][r]))
                             cl_close = True
-                        if cl_close:
-                            # Stop listening for input on the connection
-                            ix = srvrs.index(s)
-                            if r in self.connected:
-                                self.connected.remove(r)
-                                del self.clnProtocols[r]
-                                if self.dataSet[self.servers[ix][3]][3][4]:
-                                    self.TriggerEvent(self.text.clnDisconnect, payload = (srvrTitle, r.getpeername()))
-                                line = self.text.disconnCln % str(r.getpeername())
-                                folder = self.dataSet[self.servers[ix][3]][3][3]
-                                self.updateLogFile(folder, self.servers[ix][1], line)
-                            self.servers[ix][2].remove(r)
-                            del self.clientsServers[r]
-                            self.inputs.remove(r)
-                            r.close()
+                    # if no data or data == '\xff\x00':
+                    else: #A readable socket without data available (or with data "\xff\x00") is from a client that has disconnected
+                        if data == '\xff\x00':
+                            log('closing after "Close frame" from client [peer %s disconnected]' % str(server[2][r]))
+                        else:
+                            log('closing after reading no data or invalid data [peer %s disconnected]' % str(server[2][r]))
+                        cl_close = True
+                    if cl_close:
+                        self.DropClient(r, server)
 
             # Handle "exceptional conditions" UNTESTED - I NOT KNOW HOW CAUSE IT !!!!!!!!!!!
             for e in exceptional:
-                log('handling exceptional condition for %s' % str(e.getpeername()))
-                # Stop listening for input on the connection
-                srvrs = [item[0] for item in self.servers]
-                if not e in srvrs:
-                    s = self.clientsServers[e]
-                    ix = srvrs.index(s)
-                    srvrTitle = [item[1] for item in self.servers][ix]
-                    if e in self.connected:
-                        self.connected.remove(e)
-                        del self.clnProtocols[e]
-                        if self.dataSet[self.servers[ix][3]][3][4]:
-                            self.TriggerEvent(self.text.clnDisconnect, payload = (srvrTitle, e.getpeername()))
-                        line = self.text.disconnCln % str(e.getpeername())
-                        folder = self.dataSet[self.servers[ix][3]][3][3]
-                        self.updateLogFile(folder, self.servers[ix][1], line)
-                    self.servers[ix][2].remove(e)
-                    del self.clientsServers[e]
-                self.inputs.remove(e)
-                e.close()
+                if e in self.listeners:
+                    continue
+                s = self.clientsServers.get(e)
+                if s is None: # already dropped
+                    continue
+                log('handling exceptional condition for %s' % str(self.listeners[s][2].get(e)))
+                self.DropClient(e, self.listeners[s])
 
             # Stop server, if any request
             for i in range(len(self.serverToStop)-1,-1,-1):
                 srvr = self.serverToStop[i]
-                srvrs = [item[0] for item in self.servers]
-                ix = srvrs.index(srvr)
-                title = self.servers[ix][1]
-                self.inputs.remove(srvr)
-                for client in self.servers[ix][2]:
-                    self.inputs.remove(client)
+                server = self.listeners.pop(srvr)
+                title = server[1]
+                self.poller.unregister(srvr)
+                for client in server[2].keys():
                     client.shutdown(socket.SHUT_RDWR)
-                    self.connected.remove(client)
-                    del self.clnProtocols[client]
-                    line = self.text.disconnCln % str(client.getpeername())
-                    folder = self.dataSet[self.servers[ix][3]][3][3]
-                    self.updateLogFile(folder, self.servers[ix][1], line)
-                    del self.clientsServers[client]
-                    client.close()
-                folder = self.dataSet[self.servers[ix][3]][3][3]
+                    self.DropClient(client, server, False)
+                folder = self.dataSet[server[3]][3][3]
                 self.updateLogFile(folder, title, self.text.servStop)
-                self.servers.pop(ix)
+                self.servers.remove(server)
                 srvr.close()
                 self.serverToStop.pop(i)
-            if self.servers == []:
-                self.clientsServers = {}
-                self.connected = []
-                self.clnProtocols = {}
-                self.serverHandler = None            
+            if not self.listeners:
+                self.serving = False
 
     #switch off all servers:
         for item in [item[2] for item in self.servers]:
@@ -3273,9 +3869,12 @@ class WebsocketSuite(eg.PluginBase):
                 client.close()
         for s in [item[0] for item in self.servers]:
             s.close()
+        self.poller.close()
         self.clientsServers = {}
         self.servers = []
-        self.connected = []
+        self.listeners = {}
+        self.outboxes = {}
+        self.connected = set()
         self.clnProtocols = {}
         self.serverHandler = None
 
@@ -3298,11 +3897,11 @@ class WebsocketSuite(eg.PluginBase):
                     val = eval(val)
                 if type(var) == type(val):
                     vars[iy][1] = val
-                    srvrs = [item[0] for item in self.servers if item[3]==ix]
+                    srvrs = [item for item in self.servers if item[3]==ix]
                     newVal = val if type(var).__name__ == 'unicode' else str(val)
                     msg = "%s=%s" % (variable, newVal)
                     for srvr in srvrs:
-                        self.send_data_all(msg, indx=[i[0] for i in self.servers].index(srvr))
+                        self.send_data_all(msg, server=srvr)
                     return val
                 else:
                     eg.PrintError(
@@ -3341,10 +3940,10 @@ class WebsocketSuite(eg.PluginBase):
                     else:
                         eg.PrintError(self.text.notInt % variable)
                 if abs(value):
-                    srvrs = [item[0] for item in self.servers if item[3]==ix]
+                    srvrs = [item for item in self.servers if item[3]==ix]
                     msg = "%s=%s" % (variable, str(vars[iy][1]))
                     for srvr in srvrs:
-                        self.send_data_all(msg, indx=[i[0] for i in self.servers].index(srvr))  
+                        self.send_data_all(msg, server=srvr)
                 return vars[iy][1]
             else:
                 eg.PrintError(self.text.notVar % (prot,var))
@@ -3370,8 +3969,9 @@ class WebsocketSuite(eg.PluginBase):
         tmpLst = [item[0].getsockname() for item in self.servers]
         if (host, port) in tmpLst:
             ix = tmpLst.index((host, port))
-            for client in self.servers[ix][2]:
-                self.send_data(client, message)
+            frames = self.EncodeFrames(message)
+            for client in self.servers[ix][2].keys():
+                self.send_data(client, message, frames)
             return 0
         else:
             eg.PrintError(self.text.servError2 % (host, port))
@@ -3401,10 +4001,9 @@ class WebsocketSuite(eg.PluginBase):
         tmpLst = [item[0].getsockname() for item in self.servers]
         if (host, port) in tmpLst:
             ix = tmpLst.index((host, port))
-            tmpList = [i.getpeername() for i in self.servers[ix][2]]
-            if client in tmpList:
-                iy = tmpList.index(client)
-                self.send_data(self.servers[ix][2][iy], message)
+            clients = [i for i, peer in self.servers[ix][2].items() if peer == client]
+            if clients:
+                self.send_data(clients[0], message)
                 return 0
             else:
                 eg.PrintError(self.text.servMessError % (self.servers[ix][1], str(client)))
@@ -3438,17 +4037,23 @@ class WebsocketSuite(eg.PluginBase):
                 srvr.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
                 srvr.bind ((ipaddress, port))
                 srvr.listen(maxCon)
+                server = [srvr, title, OrderedDict(), interact] # clients: socket -> peer
                 if not self.serverHandler:
                     self.clientsServers = {}
-                    self.servers = [[srvr,title,[],interact],]
-                    self.connected = []
+                    self.servers = [server,]
+                    self.listeners = {srvr: server}
+                    self.outboxes = {}
+                    self.connected = set()
                     self.clnProtocols = {}
-                    self.inputs = [srvr,]
+                    self.poller = SocketPoller()
+                    self.poller.register(srvr)
+                    self.serving = True
                     self.serverHandler = Thread(target = self.ServerHandler, name = "WebsocketServerHandler")
                     self.serverHandler.start()
                 else:
-                    self.servers.append([srvr, title, [], interact])
-                    self.inputs.append(srvr)
+                    self.servers.append(server)
+                    self.listeners[srvr] = server
+                    self.poller.register(srvr)
                 folder = self.dataSet[interact][3][3]
                 self.updateLogFile(folder, title, self.text.servStart, True)
                 return 0
@@ -3464,7 +4069,7 @@ class WebsocketSuite(eg.PluginBase):
 
     def StopAllServers(self):
         if self.serverHandler:
-            self.inputs = []
+            self.serving = False
             return 0
         else:
             return 1
@@ -4088,6 +4693,56 @@ class StopAllServers(eg.ActionBase):
         return self.plugin.StopAllServers()
 #===============================================================================
 
+class LoadTestServer(eg.ActionBase):
+
+    class text:
+        host = "Server host"
+        port = "Server port"
+        clients = "Number of clients"
+        rounds = "Pings per client"
+        result = (
+            "%d clients: %.0f handshakes/s, %.0f ping round trips/s, "
+            "%d failed"
+        )
+
+    def __call__(self, host = "127.0.0.1", port = 1234, clients = 1000, rounds = 10):
+        result = LoadTest(host, port, clients, rounds)
+        print self.text.result % (
+            clients,
+            result["handshakes"],
+            result["roundTrips"],
+            result["failed"]
+        )
+        return result
+
+
+    def Configure(self, host = "127.0.0.1", port = 1234, clients = 1000, rounds = 10):
+        text = self.text
+        panel = eg.ConfigPanel()
+        hostCtrl = wx.TextCtrl(panel, -1, host)
+        portCtrl = eg.SpinIntCtrl(panel, -1, port, min = 1, max = 65535)
+        clientsCtrl = eg.SpinIntCtrl(panel, -1, clients, min = 1, max = 100000)
+        roundsCtrl = eg.SpinIntCtrl(panel, -1, rounds, min = 1, max = 100000)
+        sizer = wx.FlexGridSizer(4, 2, 10, 10)
+        for label, ctrl in (
+            (text.host, hostCtrl),
+            (text.port, portCtrl),
+            (text.clients, clientsCtrl),
+            (text.rounds, roundsCtrl),
+        ):
+            sizer.Add(wx.StaticText(panel, -1, label), 0, wx.ALIGN_CENTER_VERTICAL)
+            sizer.Add(ctrl)
+        panel.sizer.Add(sizer, 0, wx.ALL, 10)
+
+        while panel.Affirmed():
+            panel.SetResult(
+                hostCtrl.GetValue(),
+                portCtrl.GetValue(),
+                clientsCtrl.GetValue(),
+                roundsCtrl.GetValue()
+            )
+#===============================================================================
+
 class StartClient(eg.ActionBase):
 
     class text:
@@ -4803,6 +5458,33 @@ class SetValue(eg.ActionBase):
             )
 #===============================================================================
 
+class BenchmarkFrames(eg.ActionBase):
+
+    class text:
+        volume = "Megabytes per message size"
+        result = "%7d B messages: unmask %.0f MB/s, parse %.0f MB/s"
+        batched = "One read with many 100 B frames: %.0f frames/s"
+
+    def __call__(self, volume = 10):
+        results, batched = BenchmarkFraming(volume = volume * 1000000)
+        for result in results:
+            print self.text.result % result
+        print self.text.batched % batched
+        return results, batched
+
+
+    def Configure(self, volume = 10):
+        panel = eg.ConfigPanel()
+        volumeCtrl = eg.SpinIntCtrl(panel, -1, volume, min = 1, max = 1000)
+        sizer = wx.BoxSizer(wx.HORIZONTAL)
+        sizer.Add(wx.StaticText(panel, -1, self.text.volume), 0, wx.ALIGN_CENTER_VERTICAL)
+        sizer.Add(volumeCtrl, 0, wx.LEFT, 10)
+        panel.sizer.Add(sizer, 0, wx.ALL, 10)
+
+        while panel.Affirmed():
+            panel.SetResult(volumeCtrl.GetValue())
+#===============================================================================
+
 ACTIONS = (
     ( eg.ActionGroup, 'ServerActions', 'Server actions', 'Server actions',(
         (StartServer, 'StartServer', 'Start server', 'Starts server.', None),
@@ -4823,6 +5505,10 @@ ACTIONS = (
         (GetValue, 'IncrementInteger', 'Increment integer value', 'Increment integer value.', 1),
         (GetValue, 'DecrementInteger', 'Decrement integer value', 'Decrement integer value.', -1),
         )),
+    ( eg.ActionGroup, 'Benchmarks', 'Benchmarks', 'Benchmarks',(
+        (LoadTestServer, 'LoadTestServer', 'Load test server', 'Connects many local clients to a server and measures handshakes and ping round trips.', None),
+        (BenchmarkFrames, 'BenchmarkFrames', 'Benchmark frames', 'Measures the unmasking and parsing throughput for 100 B to 1 MB messages.', None),
+        )),
 )
 
             
\ No newline at end of file